@@ -7,9 +7,8 @@ from typing import NoReturn
 
 from PySide6 import QtWidgets
 
-from normcap import argparser, environment
+from normcap import environment
 from normcap import logger_config as logger_
-from normcap.gui.application import NormcapApp
 from normcap.system import info
 
 logger = logging.getLogger(__name__)
@@ -23,6 +22,10 @@ def _init_normcap() -> QtWidgets.QApplication:
     Returns:
         NormcapApp instance.
     """
+    # Imported here, to not load the GUI for the batch command
+    from normcap import argparser
+    from normcap.gui.application import NormcapApp
+
     args = argparser.get_args()
 
     logger_.prepare_logging(
@@ -43,7 +46,15 @@ def _init_normcap() -> QtWidgets.QApplication:
 
 
 def run() -> NoReturn:
-    """Run the main application."""
+    """Run the main application, or the batch or stream command if requested."""
+    if sys.argv[1:2] == ["batch"]:
+        from normcap import batch
+
+        sys.exit(batch.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["stream"]:
+        from normcap import stream
+
+        sys.exit(stream.main(sys.argv[2:]))
     sys.exit(_init_normcap().exec())
 
 
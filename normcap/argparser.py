@@ -5,6 +5,8 @@ from typing import Any
 
 from normcap import __version__
 from normcap.clipboard import Handler as ClipboardHandler
+from normcap.detection.models import OutputFormat
+from normcap.gui import watcher
 from normcap.gui.settings import DEFAULT_SETTINGS
 from normcap.notification import Handler as NotificationHandler
 from normcap.screenshot import Handler as ScreenshotHandler
@@ -39,6 +41,21 @@ def _patch_print_help(parser: argparse.ArgumentParser) -> argparse.ArgumentParse
     return parser
 
 
+def _parse_region(value: str) -> tuple[int, int, int, int]:
+    """Parse a region given as "X,Y,W,H" in pixels."""
+    try:
+        left, top, width, height = (int(v) for v in value.split(","))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            f"expected four integers 'X,Y,W,H', got '{value}'"
+        ) from exc
+    if left < 0 or top < 0 or width < 1 or height < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected non-negative position and positive size, got '{value}'"
+        )
+    return left, top, width, height
+
+
 def _create_argparser() -> argparse.ArgumentParser:
     """Create and configure the argument parser.
 
@@ -97,6 +114,59 @@ def _create_argparser() -> argparse.ArgumentParser:
         action="store_true",
         help="Print text after detection to stdout and exits immediately",
     )
+    parser.add_argument(
+        "--output-format",
+        action="store",
+        choices=[f.value for f in OutputFormat],
+        help=(
+            "Format of the output in cli mode. All formats except 'text' include "
+            "word boxes and confidences, json(l) also codes and timings. Implies "
+            "--cli-mode (default: text)"
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keep recognizing the selected region(s) periodically and output the text "
+            "whenever it changed, until cancelled via tray or Ctrl+C"
+        ),
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        action="store",
+        help=(
+            "Seconds between two captures in watch mode "
+            f"(default: {watcher.DEFAULT_INTERVAL})"
+        ),
+    )
+    parser.add_argument(
+        "--watch-max-cpu",
+        type=float,
+        action="store",
+        help=(
+            "Limit the average CPU usage in watch mode, in percent of a single core "
+            f"(default: {watcher.DEFAULT_MAX_CPU})"
+        ),
+    )
+    parser.add_argument(
+        "--region",
+        type=_parse_region,
+        action="store",
+        metavar="X,Y,W,H",
+        help=(
+            "Detect the given region of the screen right away, without showing any "
+            "UI. Coordinates are pixels of the screenshot"
+        ),
+    )
+    parser.add_argument(
+        "--screen",
+        type=int,
+        action="store",
+        metavar="N",
+        help="Index of the screen the --region refers to (default: 0)",
+    )
     parser.add_argument(
         "--background-mode",
         action="store_true",
@@ -147,12 +217,23 @@ def get_args() -> argparse.Namespace:
     Auto-enable tray for "background mode", which starts NormCap in tray without
     immediately opening the select-region window.
     """
-    args = _create_argparser().parse_args()
+    parser = _create_argparser()
+    args = parser.parse_args()
 
     if args.version:
         print(f"NormCap {__version__}")  # noqa: T201
         sys.exit(0)
 
+    if args.watch and args.output_format not in (None, OutputFormat.TEXT.value):
+        parser.error("--watch only supports the output format 'text'")
+
+    if args.watch_interval is not None and args.watch_interval <= 0:
+        parser.error("--watch-interval has to be positive")
+
+    if args.output_format and args.output_format != OutputFormat.TEXT.value:
+        # Structured output is only printed in cli mode
+        args.cli_mode = True
+
     if args.background_mode:
         # Background mode requires tray icon
         args.tray = True
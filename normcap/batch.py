@@ -0,0 +1,322 @@
+"""Detect text and codes in image files, e.g. existing screenshots.
+
+Usage: normcap batch [options] <paths or globs>
+
+The files are processed by a pool of worker processes, each of which warms up the
+detection engine once on start. Only a limited number of files is submitted to the
+pool at a time, so memory usage doesn't grow with the number of files.
+
+One JSON object per file is written (JSONL), in the order the files finish. Failed
+files, including those whose text recognition timed out, get a line with an "error"
+key. If the output file already exists, files with a successful result in it are
+skipped and new lines are appended, so an interrupted run can be resumed by simply
+running it again.
+
+This module doesn't depend on NormCap's GUI.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import glob
+import itertools
+import json
+import logging
+import signal
+import sys
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, TextIO
+
+from PySide6 import QtGui
+
+from normcap import logger_config as logger_
+from normcap.detection import detector, output, shared_image, thread_budget
+from normcap.detection.models import DetectionDetails, DetectionMode, Profile
+from normcap.detection.ocr.models import OcrEngine
+from normcap.detection.shared_image import ImageHandle
+from normcap.system import info
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp"}
+
+# Files submitted per worker, so that workers don't idle while results are written
+IN_FLIGHT_PER_WORKER = 2
+
+# Arguments for detector.detect in worker processes, set by init_worker()
+_detect_kwargs: dict[str, Any] = {}
+
+
+def _parse_bool(string: str) -> bool:
+    if string.lower() in {"true", "1"}:
+        return True
+    if string.lower() in {"false", "0"}:
+        return False
+    raise argparse.ArgumentTypeError(f"expected bool, got '{string}'")
+
+
+def add_detection_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options shared by all commands which run a worker pool."""
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of worker processes (default: 0 = number of CPUs)",
+    )
+    parser.add_argument(
+        "-l",
+        "--language",
+        nargs="+",
+        default=["eng"],
+        help="Language(s) for text recognition, e.g. '-l eng deu' (default: eng)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=[p.value for p in Profile],
+        default=Profile.BALANCED.value,
+        help="Trade-off between speed and quality (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--ocr-engine",
+        choices=[e.value for e in OcrEngine],
+        default=OcrEngine.TESSERACT.value,
+        help="Engine for text recognition (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--ocr-timeout",
+        type=float,
+        default=0,
+        help="Abort recognition of an image after so many seconds (default: 0 = never)",
+    )
+    for key, help_ in (
+        ("parse-text", "Determine the text's type and format it accordingly"),
+        ("detect-codes", "Detect barcodes and QR codes"),
+        ("detect-text", "Detect text using OCR"),
+    ):
+        parser.add_argument(
+            f"--{key}",
+            type=_parse_bool,
+            default=True,
+            help=f"{help_} (default: True)",
+        )
+    parser.add_argument(
+        "-v",
+        "--verbosity",
+        default="warning",
+        choices=["error", "warning", "info", "debug"],
+        help="Set level of detail for console output (default: %(default)s)",
+    )
+
+
+def _create_argparser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="normcap batch",
+        description="Detect text and codes in image files and write results as JSONL.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Image files, directories (searched recursively) or glob patterns",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help=(
+            "Append results to this file instead of printing them. Files already "
+            "contained in it are skipped, to resume an interrupted run"
+        ),
+    )
+    add_detection_arguments(parser)
+    return parser
+
+
+def collect_paths(patterns: Iterable[str]) -> list[str]:
+    """Expand directories and glob patterns to image files.
+
+    Returns:
+        Paths in order of the patterns, without duplicates.
+    """
+    paths: dict[str, None] = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(str(p) for p in path.rglob("*") if p.is_file())
+        elif path.is_file():
+            candidates = [pattern]
+        else:
+            candidates = sorted(glob.glob(pattern, recursive=True))  # noqa: PTH207
+        paths.update(
+            dict.fromkeys(
+                c
+                for c in candidates
+                if c == pattern or Path(c).suffix.lower() in IMAGE_SUFFIXES
+            )
+        )
+    return list(paths)
+
+
+def read_finished_paths(output_file: Path) -> set[str]:
+    """Paths with a successful result in an existing output file."""
+    if not output_file.exists():
+        return set()
+    finished = set()
+    with output_file.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # E.g. last line of an interrupted run
+            if "error" not in record and "path" in record:
+                finished.add(record["path"])
+    return finished
+
+
+def init_worker(detect_kwargs: dict[str, Any]) -> None:
+    """Store the settings and warm up the detection in a new worker process."""
+    # Only the main process handles CTRL+C and requests for statistics
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    _detect_kwargs.update(detect_kwargs)
+
+    # Loads the engine's models (and the binaries into the OS' page cache)
+    image = QtGui.QImage(64, 32, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    try:
+        detector.detect(image=image, **_detect_kwargs)
+    except Exception as exc:
+        logger.debug("Warm up of worker failed: %s", exc)
+
+
+def _detect(image: QtGui.QImage, metadata: dict) -> dict:
+    if image.isNull():
+        raise ValueError("Could not read image")
+    details = DetectionDetails()
+    results = detector.detect(image=image, **_detect_kwargs, details=details)
+    if details.timed_out and not results:
+        # Reported as error, so that the file gets retried when resuming
+        raise TimeoutError("Text recognition timed out")
+    return output.to_dict(results, details, metadata=metadata)
+
+
+def detect_image(source: str | bytes | ImageHandle, metadata: dict) -> dict:
+    """Detect an image in a worker process.
+
+    Args:
+        source: Path of an image file, the content of one, or a decoded image in
+            shared memory.
+        metadata: Information to include in the result, e.g. the path.
+
+    Returns:
+        Report of the detection.
+    """
+    if isinstance(source, ImageHandle):
+        # The image is a view on the shared memory, only valid inside the context
+        with shared_image.attach(source) as image:
+            return _detect(image, metadata)
+    if isinstance(source, str):
+        return _detect(QtGui.QImage(source), metadata)
+    return _detect(QtGui.QImage.fromData(source), metadata)
+
+
+def _detect_files(
+    pool: concurrent.futures.Executor, paths: Iterable[str], max_in_flight: int
+) -> Iterator[dict]:
+    """Detect files in the pool, with a limited number of files submitted at once.
+
+    Yields:
+        Results or errors in the order the files finished.
+    """
+    pending: dict[concurrent.futures.Future, str] = {}
+    remaining = iter(paths)
+    while True:
+        for path in itertools.islice(remaining, max_in_flight - len(pending)):
+            pending[pool.submit(detect_image, path, {"path": path})] = path
+        if not pending:
+            return
+        finished, _ = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in finished:
+            path = pending.pop(future)
+            try:
+                yield future.result()
+            except Exception as exc:
+                logger.warning("Detection of %s failed: %s", path, exc)
+                yield {"path": path, "error": str(exc)}
+
+
+def get_detect_kwargs(args: argparse.Namespace, workers: int) -> dict[str, Any]:
+    detect_mode = DetectionMode(0)
+    if args.detect_codes:
+        detect_mode |= DetectionMode.CODES
+    if args.detect_text:
+        detect_mode |= DetectionMode.TESSERACT
+    return {
+        "tesseract_bin_path": info.get_tesseract_bin_path(
+            is_briefcase_package=info.is_briefcase_package()
+        ),
+        "tessdata_path": info.get_tessdata_path(
+            config_directory=info.config_directory(), is_packaged=info.is_packaged()
+        ),
+        "language": args.language,
+        "detect_mode": detect_mode,
+        "parse_text": args.parse_text,
+        "profile": Profile(args.profile),
+        # The processes already use all CPUs, so each one gets its share only
+        "max_threads": max(thread_budget.available_cpus() // workers, 1),
+        "timeout": args.ocr_timeout or None,
+        "ocr_engine": OcrEngine(args.ocr_engine),
+        "model_path": info.config_directory() / "onnx",
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run batch detection with the given command line arguments.
+
+    Returns:
+        Exit code, 1 if any file failed.
+    """
+    args = _create_argparser().parse_args(argv)
+    logger_.prepare_logging(log_level=args.verbosity)
+
+    paths = collect_paths(args.paths)
+    if args.output:
+        finished = read_finished_paths(args.output)
+        logger.info("Skip %s already finished files", len(finished & set(paths)))
+        paths = [p for p in paths if p not in finished]
+
+    workers = args.workers or thread_budget.available_cpus()
+    logger.info("Detect %s files using %s worker(s)", len(paths), workers)
+
+    failed = 0
+    with contextlib.ExitStack() as stack:
+        out: TextIO = (
+            stack.enter_context(args.output.open("a", encoding="utf-8"))
+            if args.output
+            else sys.stdout
+        )
+        pool = stack.enter_context(
+            concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(get_detect_kwargs(args, workers),),
+            )
+        )
+        try:
+            for record in _detect_files(
+                pool, paths, max_in_flight=workers * IN_FLIGHT_PER_WORKER
+            ):
+                failed += "error" in record
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+        except KeyboardInterrupt:
+            logger.warning("Interrupted, run again to resume")
+            pool.shutdown(cancel_futures=True)
+            return 130
+
+    logger.info("Finished %s files, %s failed", len(paths), failed)
+    return 1 if failed else 0
@@ -1,43 +1,98 @@
 """Barcode and QR Code detection."""
 
+import concurrent.futures
+import contextlib
 import logging
 import os
-from collections.abc import Generator
+from collections.abc import Generator, Iterable, Iterator
 
 import zxingcpp
-from PySide6 import QtGui
+from PySide6 import QtCore, QtGui
 
-from normcap.detection.codes.models import CodeType
-from normcap.detection.models import DetectionResult, TextDetector, TextType
+from normcap.detection import thread_budget
+from normcap.detection.codes.models import CodeFormat, CodeType, LocatedCode
+from normcap.detection.models import (
+    DetectionDetails,
+    DetectionResult,
+    TextDetector,
+    TextType,
+)
 
 logger = logging.getLogger(__name__)
 
+_ZXING_FORMATS: dict[CodeFormat, tuple[zxingcpp.BarcodeFormat, ...]] = {
+    CodeFormat.QR: (
+        zxingcpp.BarcodeFormat.QRCode,
+        zxingcpp.BarcodeFormat.MicroQRCode,
+        zxingcpp.BarcodeFormat.RMQRCode,
+    ),
+    CodeFormat.DATA_MATRIX: (zxingcpp.BarcodeFormat.DataMatrix,),
+    CodeFormat.AZTEC: (zxingcpp.BarcodeFormat.Aztec,),
+    CodeFormat.PDF417: (zxingcpp.BarcodeFormat.PDF417,),
+    CodeFormat.MAXICODE: (zxingcpp.BarcodeFormat.MaxiCode,),
+    CodeFormat.LINEAR: (zxingcpp.BarcodeFormat.AllLinear,),
+}
+
+# Images with a longer side than this are first scanned at a lower resolution, as
+# scanning the full resolution of e.g. a 4K screen takes several times longer
+_PYRAMID_MIN_SIZE = 2000
+_PYRAMID_SCALE = 0.5
+
+# Whole screens can be scanned in overlapping tiles in parallel. Codes larger than
+# the overlap are found by an additional scan at lower resolution.
+_TILE_SIZE = 1024
+_TILE_OVERLAP = 256
+
+# Margin around possible codes, which are scanned again in full resolution,
+# relative to the size of the code
+_CANDIDATE_MARGIN = 0.25
 
-def _image_to_memoryview(image: QtGui.QImage) -> memoryview:
-    """Transform Qimage to a bytearray without padding.
+
+def _image_to_image_view(
+    image: QtGui.QImage, region: QtCore.QRect | None = None
+) -> zxingcpp.ImageView:
+    """Wrap the buffer of a grayscale image (or a region of it) without copying it.
+
+    The lines of the buffer can be padded, which is handled by passing the stride.
+    The image has to be kept alive as long as the view is used.
 
     Args:
-        image: Input image.
+        image: Input image in Format_Grayscale8.
+        region: Part of the image to view. Defaults to the whole image.
 
     Returns:
-        Memoryview of the image data as 3D array: width x height x RGB.
+        View on the image data.
     """
-    image = image.convertToFormat(QtGui.QImage.Format.Format_RGB888)
-    ptr = image.constBits()
-    bytes_per_line = image.bytesPerLine()  # Includes padding
-    width = image.width()
-    height = image.height()
-    channels = 3  # RGB888 has 3 channels
-
-    # Create a new bytearray to exclude padding
-    raw_data = bytearray()
-    for y in range(height):
-        row_start = y * bytes_per_line
-        row_end = row_start + (width * channels)
-        raw_data.extend(ptr[row_start:row_end])  # Exclude padding
-
-    return memoryview(raw_data).cast(
-        "B", shape=(image.height(), image.width(), channels)
+    if image.format() != QtGui.QImage.Format.Format_Grayscale8:
+        raise ValueError(f"Expected grayscale image, got {image.format()}")
+    if region is None:
+        region = image.rect()
+    offset = region.top() * image.bytesPerLine() + region.left()
+    return zxingcpp.ImageView(
+        image.constBits()[offset:],
+        region.width(),
+        region.height(),
+        zxingcpp.ImageFormat.Lum,
+        row_stride=image.bytesPerLine(),
+    )
+
+
+def _get_zxing_formats(
+    formats: str | Iterable[str] | None,
+) -> tuple[zxingcpp.BarcodeFormat, ...]:
+    """Translate enabled code formats to zxing's formats. Empty means all."""
+    if formats is None:
+        return ()
+    code_formats = {
+        CodeFormat(f) for f in ([formats] if isinstance(formats, str) else formats)
+    }
+    if CodeFormat.ALL in code_formats:
+        return ()
+    return tuple(
+        zxing_format
+        for code_format in CodeFormat
+        if code_format in code_formats
+        for zxing_format in _ZXING_FORMATS[code_format]
     )
 
 
@@ -65,26 +120,298 @@ def _get_text_type_and_transform(text: str) -> tuple[str, TextType]:
     return text, text_type
 
 
+def _get_corners(position: zxingcpp.Position) -> list[tuple[int, int]]:
+    """Corners of the code, clockwise starting top left."""
+    return [
+        (point.x, point.y)
+        for point in (
+            position.top_left,
+            position.top_right,
+            position.bottom_right,
+            position.bottom_left,
+        )
+    ]
+
+
+def _get_candidate_region(
+    corners: list[tuple[int, int]], image: QtGui.QImage
+) -> QtCore.QRect:
+    """Bounding box around a possible code including a margin, within the image."""
+    xs, ys = [c[0] for c in corners], [c[1] for c in corners]
+    margin = round(max(max(xs) - min(xs), max(ys) - min(ys)) * _CANDIDATE_MARGIN)
+    return QtCore.QRect(
+        QtCore.QPoint(min(xs) - margin, min(ys) - margin),
+        QtCore.QPoint(max(xs) + margin, max(ys) + margin),
+    ).intersected(image.rect())
+
+
+def _merge_regions(regions: Iterable[QtCore.QRect]) -> list[QtCore.QRect]:
+    """Unite overlapping regions, e.g. the same candidate found in several tiles."""
+    merged: list[QtCore.QRect] = []
+    for region in regions:
+        united = region
+        while overlapping := [m for m in merged if m.intersects(united)]:
+            for other in overlapping:
+                merged.remove(other)
+                united = united.united(other)
+        merged.append(united)
+    return merged
+
+
+def _scale(image: QtGui.QImage, factor: float) -> QtGui.QImage:
+    return image.scaled(
+        round(image.width() * factor),
+        round(image.height() * factor),
+        QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+        QtCore.Qt.TransformationMode.SmoothTransformation,
+    ).convertToFormat(QtGui.QImage.Format.Format_Grayscale8)
+
+
+def _scale_corners(
+    barcodes: list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]],
+    source: QtGui.QImage,
+    target: QtGui.QImage,
+) -> list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]]:
+    """Map corners of codes from a scaled version of an image to the image."""
+    scale_x = target.width() / source.width()
+    scale_y = target.height() / source.height()
+    return [
+        (barcode, [(round(x * scale_x), round(y * scale_y)) for x, y in corners])
+        for barcode, corners in barcodes
+    ]
+
+
+def _scan(
+    image: QtGui.QImage,
+    options: dict,
+    executor: concurrent.futures.ThreadPoolExecutor | None = None,
+) -> list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]]:
+    """Scan the whole image, in overlapping tiles if an executor is provided.
+
+    Codes smaller than the overlap are completely visible in at least one tile.
+    Larger codes are found in an additional scan of the whole image at lower
+    resolution.
+
+    Returns:
+        Codes and their corners in coordinates of the image, without duplicates.
+    """
+    tiles = _get_tiles(image) if executor else []
+    if executor is None or len(tiles) < 2:  # noqa: PLR2004
+        return _read_region(image, image.rect(), options)
+
+    overview = _scale(image, _PYRAMID_SCALE)
+    overview_future = executor.submit(_read_region, overview, overview.rect(), options)
+    futures = [executor.submit(_read_region, image, tile, options) for tile in tiles]
+    barcodes = [barcode for future in futures for barcode in future.result()]
+    barcodes.extend(_scale_corners(overview_future.result(), overview, image))
+    logger.debug("Scanned %s tiles of image %s", len(tiles), image.size().toTuple())
+    return _deduplicate(barcodes)
+
+
+def _read_barcodes(
+    image: QtGui.QImage,
+    formats: tuple[zxingcpp.BarcodeFormat, ...],
+    try_harder: bool,
+    executor: concurrent.futures.ThreadPoolExecutor | None = None,
+) -> list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]]:
+    """Read codes, scanning large images in a fast pass at lower resolution first.
+
+    Regions, in which the fast pass located a code without being able to decode it,
+    are scanned again in full resolution.
+
+    Args:
+        image: Grayscale input image.
+        formats: Formats to search for. Empty means all.
+        try_harder: Also search for rotated, inverted and downscaled codes.
+        executor: Pool of threads to scan tiles of the image and the regions of
+            possible codes in parallel. If None, everything is scanned in sequence.
+
+    Returns:
+        Codes and their corners in coordinates of the image.
+    """
+    options = {
+        "formats": formats,
+        "try_rotate": try_harder,
+        "try_downscale": try_harder,
+        "try_invert": try_harder,
+    }
+    if max(image.width(), image.height()) < _PYRAMID_MIN_SIZE:
+        return _scan(image, options, executor)
+
+    small_image = _scale(image, _PYRAMID_SCALE)
+    barcodes = []
+    candidates = []
+    for barcode, corners in _scale_corners(
+        _scan(small_image, {**options, "return_errors": True}, executor),
+        small_image,
+        image,
+    ):
+        if barcode.valid:
+            barcodes.append((barcode, corners))
+        else:
+            candidates.append(corners)
+
+    # Skip candidates without a position, and those of already decoded codes
+    decoded_regions = [_get_candidate_region(c, image) for _, c in barcodes]
+    regions = _merge_regions(
+        region
+        for region in (_get_candidate_region(c, image) for c in candidates)
+        if region.width() > 1
+        and region.height() > 1
+        and not any(region.intersects(r) for r in decoded_regions)
+    )
+
+    logger.debug("Scan %s possible codes in full resolution", len(regions))
+    if executor:
+        futures = [executor.submit(_read_region, image, r, options) for r in regions]
+        barcodes.extend(b for future in futures for b in future.result())
+    else:
+        for region in regions:
+            barcodes.extend(_read_region(image, region, options))
+    return barcodes
+
+
+@contextlib.contextmanager
+def _tile_executor(
+    image: QtGui.QImage, max_threads: int
+) -> Iterator[concurrent.futures.ThreadPoolExecutor | None]:
+    """Provide a pool of threads for scanning the tiles of an image.
+
+    zxing releases the GIL, so the tiles are really scanned in parallel.
+
+    Yields:
+        The pool, or None if the budget allows a single thread only.
+    """
+    with thread_budget.reserve(
+        job_size=len(_get_tiles(image)), max_threads=max_threads
+    ) as budget:
+        if budget.workers < 2:  # noqa: PLR2004
+            yield None
+            return
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=budget.workers, thread_name_prefix="scan-tile"
+        ) as executor:
+            yield executor
+
+
+def _read_region(
+    image: QtGui.QImage, region: QtCore.QRect, options: dict
+) -> list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]]:
+    """Read codes in a region of a grayscale image, without copying it.
+
+    Returns:
+        Codes and their corners in coordinates of the whole image.
+    """
+    # zxing expects complete lines of the stride in the buffer, also after the last
+    # pixel of the region. Regions at the bottom of the image have to be copied.
+    view_image, view_region = image, region
+    if (region.bottom() + 1) * image.bytesPerLine() + region.left() > (
+        image.sizeInBytes()
+    ):
+        view_image = image.copy(region)
+        view_region = view_image.rect()
+    return [
+        (
+            barcode,
+            [
+                (x + region.left(), y + region.top())
+                for x, y in _get_corners(barcode.position)
+            ],
+        )
+        for barcode in zxingcpp.read_barcodes(
+            _image_to_image_view(view_image, view_region), **options
+        )
+    ]
+
+
+def _get_tile_starts(length: int) -> list[int]:
+    step = _TILE_SIZE - _TILE_OVERLAP
+    starts = list(range(0, max(length - _TILE_SIZE, 0) + 1, step))
+    if starts[-1] + _TILE_SIZE < length:
+        starts.append(length - _TILE_SIZE)
+    return starts
+
+
+def _get_tiles(image: QtGui.QImage) -> list[QtCore.QRect]:
+    """Split the image into a grid of overlapping tiles."""
+    return [
+        QtCore.QRect(
+            left,
+            top,
+            min(_TILE_SIZE, image.width() - left),
+            min(_TILE_SIZE, image.height() - top),
+        )
+        for top in _get_tile_starts(image.height())
+        for left in _get_tile_starts(image.width())
+    ]
+
+
+def _deduplicate(
+    barcodes: list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]],
+) -> list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]]:
+    """Remove codes with same content and format found at the same position."""
+    unique: list[tuple[zxingcpp.Barcode, list[tuple[int, int]]]] = []
+    for barcode, corners in barcodes:
+        center = _get_center(corners)
+        xs, ys = [c[0] for c in corners], [c[1] for c in corners]
+        tolerance = max(max(xs) - min(xs), max(ys) - min(ys), 1) / 2
+        if any(
+            other.text == barcode.text
+            and other.format == barcode.format
+            and all(
+                abs(a - b) <= tolerance
+                for a, b in zip(center, _get_center(other_corners), strict=True)
+            )
+            for other, other_corners in unique
+        ):
+            continue
+        unique.append((barcode, corners))
+    return unique
+
+
+def _get_center(corners: list[tuple[int, int]]) -> tuple[float, float]:
+    return (
+        sum(c[0] for c in corners) / len(corners),
+        sum(c[1] for c in corners) / len(corners),
+    )
+
+
 def _detect_codes_via_zxing(
-    image: memoryview,
-) -> Generator[tuple[str, TextType, CodeType], None, None]:
+    image: QtGui.QImage,
+    try_harder: bool = True,
+    formats: str | Iterable[str] | None = None,
+    tiled: bool = False,
+    max_threads: int = 0,
+) -> Generator[tuple[str, TextType, CodeType, dict], None, None]:
     """Decode QR and barcodes from image.
 
     Args:
-        image: Input image.
+        image: Grayscale input image.
+        try_harder: Also search for rotated, inverted and downscaled codes.
+        formats: Names of the enabled code formats. Defaults to all.
+        tiled: Scan overlapping tiles of the image in parallel.
+        max_threads: Upper limit of threads for tiled scans, 0 for no limit.
 
-    Returns:
-        URL(s), separated bye newline
+    Yields:
+        Text, its type, the type of code and format and position of the code.
     """
     logger.info("Detect Barcodes and QR Codes")
 
-    results = zxingcpp.read_barcodes(image)
+    with contextlib.ExitStack() as stack:
+        executor = (
+            stack.enter_context(_tile_executor(image, max_threads)) if tiled else None
+        )
+        results = _read_barcodes(
+            image,
+            formats=_get_zxing_formats(formats),
+            try_harder=try_harder,
+            executor=executor,
+        )
 
     if not results:
         return None
 
-    codes = [result.text for result in results if result.text]
-    code_types = [r.format for r in results]
+    results = [(r, corners) for r, corners in results if r.text]
 
     qr_formats = {
         zxingcpp.BarcodeFormat.QRCode,
@@ -92,9 +419,10 @@ def _detect_codes_via_zxing(
         zxingcpp.BarcodeFormat.MicroQRCode,
     }
 
-    logger.info("Found %s codes", len(codes))
+    logger.info("Found %s codes", len(results))
 
-    for code, code_format in zip(codes, code_types, strict=True):
+    for result, corners in results:
+        code_format = result.format
         if code_format in qr_formats:
             code_type = CodeType.QR
         elif code_format not in (qr_formats):
@@ -102,33 +430,104 @@ def _detect_codes_via_zxing(
         else:
             raise ValueError()
 
-        text = code.strip()
+        text = result.text.strip()
         text, text_type = _get_text_type_and_transform(text)
-        yield text, text_type, code_type
+        code_info = {
+            "format": code_format.name,
+            "corners": corners,
+        }
+        yield text, text_type, code_type, code_info
+
+
+def locate_codes(
+    image: QtGui.QImage,
+    try_harder: bool = True,
+    formats: str | Iterable[str] | None = None,
+    tiled: bool = False,
+    max_threads: int = 0,
+) -> list[LocatedCode]:
+    """Decode QR and barcodes from image and keep their positions.
+
+    Args:
+        image: Input image with potentially one or more barcocdes / QR Codes.
+        try_harder: Also search for rotated, inverted and downscaled codes.
+        formats: Names of the enabled code formats, see CodeFormat. Defaults to all.
+        tiled: Scan overlapping tiles of the image in parallel, which is faster for
+            large images, e.g. screenshots of whole (multi monitor) desktops.
+        max_threads: Upper limit of threads for tiled scans, 0 for no limit.
+
+    Returns:
+        Decoded codes with their corners in coordinates of the image.
+    """
+    # zxing works on the luminance only, so the buffer of the grayscale image can be
+    # passed on without copying.
+    gray_image = image.convertToFormat(QtGui.QImage.Format.Format_Grayscale8)
+
+    return [
+        LocatedCode(
+            result=DetectionResult(
+                text=text,
+                text_type=text_type,
+                detector=TextDetector[code_type.value],
+            ),
+            format=code_info["format"],
+            corners=code_info["corners"],
+        )
+        for text, text_type, code_type, code_info in _detect_codes_via_zxing(
+            image=gray_image,
+            try_harder=try_harder,
+            formats=formats,
+            tiled=tiled,
+            max_threads=max_threads,
+        )
+    ]
+
+
+def codes_in_region(
+    codes: Iterable[LocatedCode], region: QtCore.QRect
+) -> list[LocatedCode]:
+    """Select codes lying completely inside a region of the scanned image.
 
+    Args:
+        codes: Codes located in the whole image.
+        region: Part of the image, e.g. a selection on a screenshot.
 
-def detect_codes(image: QtGui.QImage) -> list[DetectionResult]:
+    Returns:
+        Codes inside the region, with corners in coordinates of the region.
+    """
+    return [
+        code._replace(
+            corners=[(x - region.left(), y - region.top()) for x, y in code.corners]
+        )
+        for code in codes
+        if all(region.contains(x, y) for x, y in code.corners)
+    ]
+
+
+def detect_codes(
+    image: QtGui.QImage,
+    try_harder: bool = True,
+    details: DetectionDetails | None = None,
+    formats: str | Iterable[str] | None = None,
+) -> list[DetectionResult]:
     """Decode & decode QR and barcodes from image.
 
     Args:
         image: Input image with potentially one or more barcocdes / QR Codes.
+        try_harder: Also search for rotated, inverted and downscaled codes.
+        details: If provided, format and position of the codes are added to it.
+        formats: Names of the enabled code formats, see CodeFormat. Defaults to all.
 
     Returns:
         Result of the detection. If more than one code is detected, the detected values
             are separated by newlines. If no code is detected, None is returned.
     """
     logger.debug("Start QR/Barcode detection")
-    # ONHOLD: Switch to using QImage directly, when a new zxingcpp is released
-    image_buffer = _image_to_memoryview(image)
-
-    results = []
-    for text, text_type, code_type in _detect_codes_via_zxing(image=image_buffer):
-        text_detector = TextDetector[code_type.value]
-        results.append(
-            DetectionResult(text=text, text_type=text_type, detector=text_detector)
-        )
+    codes = locate_codes(image, try_harder=try_harder, formats=formats)
 
-    if not results:
+    if details is not None:
+        details.codes.extend(c.as_dict() for c in codes)
+    if not codes:
         logger.debug("No codes found")
 
-    return results
+    return [c.result for c in codes]
@@ -1,4 +1,7 @@
 import enum
+from typing import NamedTuple
+
+from normcap.detection.models import DetectionResult
 
 
 class CodeType(str, enum.Enum):
@@ -7,6 +10,19 @@ class CodeType(str, enum.Enum):
     BARCODE = "BARCODE"
 
 
+# ONHOLD: Switch to StrEnum when Python 3.11
+class CodeFormat(str, enum.Enum):
+    """Groups of code formats which can be enabled for the detection."""
+
+    ALL = "all"
+    QR = "qr"  # Including Micro QR and rMQR codes
+    DATA_MATRIX = "datamatrix"
+    AZTEC = "aztec"
+    PDF417 = "pdf417"
+    MAXICODE = "maxicode"
+    LINEAR = "linear"  # All 1D barcodes, e.g. EAN, Code 128
+
+
 class TextType(str, enum.Enum):
     """Describe format/content of the detected text."""
 
@@ -17,3 +33,19 @@ class TextType(str, enum.Enum):
     SINGLE_LINE = "SINGLE_LINE"
     MULTI_LINE = "MULTI_LINE"
     PARAGRAPH = "PARAGRAPH"
+
+
+class LocatedCode(NamedTuple):
+    """Decoded code together with its position in the scanned image."""
+
+    result: DetectionResult
+    format: str  # Name of zxing's barcode format
+    corners: list[tuple[int, int]]  # Clockwise, starting top left
+
+    def as_dict(self) -> dict:
+        """Describe the code, e.g. for the detection details."""
+        return {
+            "text": self.result.text,
+            "format": self.format,
+            "corners": self.corners,
+        }
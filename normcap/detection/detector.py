@@ -1,15 +1,176 @@
+import concurrent.futures
+import functools
 import logging
+import subprocess
 import time
+from collections.abc import Callable, Iterable
 from pathlib import Path
 
 from PySide6 import QtGui
 
-from normcap.detection import codes, ocr
-from normcap.detection.models import DetectionMode, DetectionResult
+from normcap.detection import codes, ocr, profiles, thread_budget
+from normcap.detection.codes.models import LocatedCode
+from normcap.detection.models import (
+    DetectionDetails,
+    DetectionMode,
+    DetectionResult,
+    Profile,
+)
+from normcap.detection.ocr.memo import MemoRegion
+from normcap.detection.ocr.models import OcrBackend, OcrEngine
+from normcap.detection.scheduler import CancellationToken, CancelledError
 
 logger = logging.getLogger(__name__)
 
 
+def _get_backend(
+    ocr_engine: OcrEngine,
+    tesseract_bin_path: Path,
+    model_path: Path | None,
+    num_threads: int,
+) -> OcrBackend:
+    """Select the backend for text recognition, fall back to tesseract."""
+    if OcrEngine(ocr_engine) == OcrEngine.ONNX:
+        backend = ocr.onnx.OnnxBackend(
+            model_path=model_path or "", num_threads=num_threads
+        )
+        if backend.is_installed():
+            return backend
+        logger.warning(
+            "Can't use onnx for text recognition, fall back to tesseract. %s",
+            backend.install_instructions,
+        )
+
+    return ocr.tesseract.TesseractBackend(
+        tesseract_bin_path=tesseract_bin_path, omp_thread_limit=num_threads
+    )
+
+
+def _detect_codes(
+    image: QtGui.QImage,
+    try_harder: bool,
+    formats: str | Iterable[str] | None,
+    details: DetectionDetails,
+) -> list[DetectionResult]:
+    start_time = time.time()
+    codes_result = codes.detector.detect_codes(
+        image, try_harder=try_harder, details=details, formats=formats
+    )
+    details.timings["codes"] = time.time() - start_time
+    logger.debug("Code detection took %s", f"{details.timings['codes']:.4f}s")
+    return codes_result
+
+
+def _child_token(
+    parent: CancellationToken | None,
+) -> tuple[CancellationToken, Callable[[], None] | None]:
+    """Token that gets cancelled with its parent, but can also be cancelled alone.
+
+    Returns:
+        The token and a function to unlink it from the parent again.
+    """
+    token = CancellationToken()
+    return token, parent.on_cancel(token.cancel) if parent else None
+
+
+def _cancel_if_codes_found(
+    future: concurrent.futures.Future, token: CancellationToken
+) -> None:
+    if not future.cancelled() and not future.exception() and future.result():
+        token.cancel()
+
+
+def _detect_text(
+    image: QtGui.QImage,
+    tesseract_bin_path: Path,
+    tessdata_path: Path | None,
+    language: str,
+    parse_text: bool,
+    config: profiles.ProfileConfig,
+    max_threads: int,
+    timeout: float | None,
+    cancel_token: CancellationToken | None,
+    ocr_engine: OcrEngine,
+    model_path: Path | None,
+    details: DetectionDetails | None = None,
+    memo: MemoRegion | None = None,
+) -> list[DetectionResult]:
+    pixels = int(image.width() * image.height() * config.resize_factor**2)
+    with thread_budget.reserve(pixels=pixels, max_threads=max_threads) as budget:
+        backend = _get_backend(
+            ocr_engine=ocr_engine,
+            tesseract_bin_path=tesseract_bin_path,
+            model_path=model_path,
+            num_threads=budget.omp_thread_limit,
+        )
+        if details is not None:
+            details.ocr_engine = (
+                OcrEngine.ONNX.value
+                if isinstance(backend, ocr.onnx.OnnxBackend)
+                else OcrEngine.TESSERACT.value
+            )
+        return ocr.recognize.get_text_from_image(
+            languages=language,
+            image=image,
+            tesseract_bin_path=tesseract_bin_path,
+            tessdata_path=profiles.get_tessdata_path(
+                config=config, tessdata_path=tessdata_path, languages=language
+            ),
+            parse=parse_text,
+            resize_factor=config.resize_factor,
+            padding_size=config.padding_size,
+            oem=config.oem,
+            psm=profiles.get_psm(config=config, image=image),
+            timeout=timeout,
+            cancel_token=cancel_token,
+            backend=backend,
+            details=details,
+            memo=memo,
+        )
+
+
+def _detect_text_with_retry(
+    detect_text: Callable[..., list[DetectionResult]],
+    profile: Profile,
+    retry_on_timeout: bool,
+    details: DetectionDetails,
+    cancel_token: CancellationToken | None = None,
+) -> list[DetectionResult] | None:
+    """Recognize text, optionally retry with faster profiles on timeouts.
+
+    Returns None on timeouts, and if the recognition got aborted in favor of codes.
+    A cancellation of the whole detection (via `cancel_token`) is raised.
+    """
+    while True:
+        start_time = time.time()
+        try:
+            ocr_result = detect_text(config=profiles.get_config(profile))
+        except CancelledError:
+            if cancel_token and cancel_token.is_cancelled:
+                raise
+            logger.debug("Codes detected, aborted OCR.")
+            return None
+        except (subprocess.TimeoutExpired, TimeoutError):
+            faster_profile = profiles.get_faster_profile(profile)
+            if not retry_on_timeout or not faster_profile:
+                logger.warning(
+                    "Text recognition timed out after %.1fs.", time.time() - start_time
+                )
+                details.timed_out = True
+                return None
+            logger.warning(
+                "Text recognition timed out after %.1fs. Retry with profile '%s'.",
+                time.time() - start_time,
+                faster_profile.value,
+            )
+            profile = faster_profile
+            details.profile = profile.value
+        else:
+            details.timings["ocr"] = time.time() - start_time
+            logger.debug("OCR detection took %s", f"{details.timings['ocr']:.4f}s")
+            return ocr_result
+
+
 def detect(
     image: QtGui.QImage,
     tesseract_bin_path: Path,
@@ -17,35 +178,127 @@ def detect(
     language: str,
     detect_mode: DetectionMode,
     parse_text: bool,
+    profile: Profile = Profile.BALANCED,
+    max_threads: int = 0,
+    timeout: float | None = None,
+    retry_on_timeout: bool = False,
+    cancel_token: CancellationToken | None = None,
+    ocr_engine: OcrEngine = OcrEngine.TESSERACT,
+    model_path: Path | None = None,
+    details: DetectionDetails | None = None,
+    memo: MemoRegion | None = None,
+    code_formats: str | Iterable[str] | None = None,
+    located_codes: list[LocatedCode] | None = None,
+    indexed_words: list[dict] | None = None,
 ) -> list[DetectionResult]:
+    """Detect codes or text in the image.
+
+    Codes might have been located in advance, e.g. by a speculative scan of the whole
+    screenshot. If any of those are provided, they are returned right away.
+
+    If details are provided, they get filled with meta information like word boxes,
+    code positions and the durations of the stages.
+
+    If a memo of the screenshot is provided, text blocks recognized by previous
+    detections on overlapping regions are reused.
+
+    Words might have been recognized in advance as well, e.g. by a background pass
+    over the whole screenshot. If any of those are provided, the text is compiled
+    from them instead of running the OCR.
+
+    Text is recognized by the selected OCR engine. The onnx engine loads its models
+    from `model_path` and falls back to tesseract, if those are unavailable.
+
+    Only codes of the given formats (see CodeFormat) are detected, by default all.
+    Codes and text are detected concurrently. As codes take precedence, the text
+    recognition gets aborted as soon as codes are found.
+
+    If the detection gets cancelled via the token, or the text recognition exceeds
+    the timeout, an empty list is returned. A timeout is flagged in the details.
+    After a timeout, the recognition can optionally be retried using the next faster
+    profile.
+    """
     ocr_result = None
     codes_result = None
 
-    if DetectionMode.CODES in detect_mode:
-        start_time = time.time()
-        codes_result = codes.detector.detect_codes(image)
-        logger.debug("Code detection took %s", f"{time.time() - start_time:.4f}s")
+    config = profiles.get_config(profile)
+    logger.debug("Detect using profile '%s': %s", Profile(profile).value, config)
 
-    if codes_result:
-        logger.debug("Codes detected, skipping OCR.")
-        return codes_result
+    if details is None:
+        details = DetectionDetails()
+    details.image_size = (image.width(), image.height())
+    details.profile = Profile(profile).value
 
-    if DetectionMode.TESSERACT in detect_mode:
-        start_time = time.time()
-        ocr_result = ocr.recognize.get_text_from_image(
-            languages=language,
-            image=image,
-            tesseract_bin_path=tesseract_bin_path,
-            tessdata_path=tessdata_path,
-            parse=parse_text,
-            resize_factor=2,
-            padding_size=80,
-        )
-        logger.debug("OCR detection took %s s", f"{time.time() - start_time:.4f}.")
+    if located_codes and DetectionMode.CODES in detect_mode:
+        logger.debug("Use %s codes located in advance.", len(located_codes))
+        details.codes.extend(c.as_dict() for c in located_codes)
+        return [c.result for c in located_codes]
 
-    if ocr_result:
-        logger.debug("Text detected.")
-        return ocr_result
+    ocr_token, unregister_ocr_token = cancel_token, None
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="detect-codes"
+    ) as executor:
+        try:
+            codes_future = None
+            if DetectionMode.CODES in detect_mode:
+                codes_future = executor.submit(
+                    _detect_codes,
+                    image=image,
+                    try_harder=config.code_try_harder,
+                    formats=code_formats,
+                    details=details,
+                )
+                # Codes take precedence over text. Therefore, the OCR runs in parallel
+                # and gets aborted as soon as codes were found.
+                ocr_token, unregister_ocr_token = _child_token(cancel_token)
+                codes_future.add_done_callback(
+                    functools.partial(_cancel_if_codes_found, token=ocr_token)
+                )
+
+            if indexed_words and DetectionMode.TESSERACT in detect_mode:
+                logger.debug("Use %s words recognized in advance.", len(indexed_words))
+                ocr_result = ocr.recognize.get_text_from_words(
+                    languages=language,
+                    words=indexed_words,
+                    parse=parse_text,
+                    details=details,
+                )
+            elif DetectionMode.TESSERACT in detect_mode:
+                ocr_result = _detect_text_with_retry(
+                    functools.partial(
+                        _detect_text,
+                        image=image,
+                        tesseract_bin_path=tesseract_bin_path,
+                        tessdata_path=tessdata_path,
+                        language=language,
+                        parse_text=parse_text,
+                        max_threads=max_threads,
+                        timeout=timeout,
+                        cancel_token=ocr_token,
+                        ocr_engine=ocr_engine,
+                        model_path=model_path,
+                        details=details,
+                        memo=memo,
+                    ),
+                    profile=profile,
+                    retry_on_timeout=retry_on_timeout,
+                    details=details,
+                    cancel_token=cancel_token,
+                )
+
+            codes_result = codes_future.result() if codes_future else None
+
+        except CancelledError:
+            logger.info("Detection got cancelled.")
+            return []
+
+        finally:
+            if unregister_ocr_token:
+                unregister_ocr_token()
+
+    if codes_result:
+        logger.debug("Codes detected.")
+        return codes_result
 
-    logger.debug("No codes or text found!")
-    return []
+    logger.debug("Text detected." if ocr_result else "No codes or text found!")
+    return ocr_result or []
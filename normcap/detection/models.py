@@ -1,4 +1,5 @@
 import enum
+from dataclasses import dataclass, field
 from typing import NamedTuple
 
 
@@ -7,6 +8,26 @@ class DetectionMode(enum.Flag):
     CODES = enum.auto()
 
 
+# ONHOLD: Switch to StrEnum when Python 3.11
+class Profile(str, enum.Enum):
+    """Trade-off between speed and quality of the recognition."""
+
+    FAST = "fast"
+    BALANCED = "balanced"
+    BEST = "best"
+
+
+# ONHOLD: Switch to StrEnum when Python 3.11
+class OutputFormat(str, enum.Enum):
+    """Format in which the results get printed in cli mode."""
+
+    TEXT = "text"
+    JSON = "json"
+    JSONL = "jsonl"
+    HOCR = "hocr"
+    ALTO = "alto"
+
+
 # ONHOLD: Switch to StrEnum when Python 3.11
 class TextType(str, enum.Enum):
     """Describe format/content of the detected text."""
@@ -18,6 +39,7 @@ class TextType(str, enum.Enum):
     SINGLE_LINE = "SINGLE_LINE"
     MULTI_LINE = "MULTI_LINE"
     PARAGRAPH = "PARAGRAPH"
+    TABLE = "TABLE"
     VEVENT = "VEVENT"
     VCARD = "VCARD"
 
@@ -27,6 +49,7 @@ PlaintextTextTypes = [
     TextType.SINGLE_LINE,
     TextType.MULTI_LINE,
     TextType.PARAGRAPH,
+    TextType.TABLE,
 ]
 
 
@@ -44,3 +67,21 @@ class DetectionResult(NamedTuple):
     text: str
     text_type: TextType
     detector: TextDetector
+
+
+@dataclass
+class DetectionDetails:
+    """Meta information collected during a detection, e.g. for structured output.
+
+    Positions are in pixels of the image passed to the detection.
+    """
+
+    image_size: tuple[int, int] = (0, 0)
+    profile: str = ""
+    ocr_engine: str = ""
+    words: list[dict] = field(default_factory=list)  # Word records of the OCR
+    transformer: str | None = None  # Transformer used to parse the text
+    transformer_scores: dict[str, float] = field(default_factory=dict)
+    codes: list[dict] = field(default_factory=list)  # Text, format & corners of codes
+    timings: dict[str, float] = field(default_factory=dict)  # Duration per stage in s
+    timed_out: bool = False  # Text recognition exceeded the timeout
@@ -1,3 +1,11 @@
-from normcap.detection.ocr import models, recognize, tesseract
+from normcap.detection.ocr import (
+    index,
+    layout,
+    memo,
+    models,
+    onnx,
+    recognize,
+    tesseract,
+)
 
-__all__ = ["models", "recognize", "tesseract"]
+__all__ = ["index", "layout", "memo", "models", "onnx", "recognize", "tesseract"]
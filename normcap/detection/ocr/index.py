@@ -0,0 +1,109 @@
+"""Spatial index over recognized words for fast queries by region or position.
+
+Words are assigned to all cells of a uniform grid which their boxes overlap. A query
+only visits the cells overlapping the queried area, so its cost depends on the number
+of words close to it, not on the number of words on the whole screen.
+"""
+
+import collections
+import logging
+from collections.abc import Iterator
+
+from normcap.detection.ocr import layout
+
+logger = logging.getLogger(__name__)
+
+# Edge length of the grid cells in pixels, roughly a few lines of text
+_CELL_SIZE = 64
+
+
+def _center(word: dict) -> tuple[float, float]:
+    return word["left"] + word["width"] / 2, word["top"] + word["height"] / 2
+
+
+class WordIndex:
+    """Words of an image, e.g. a whole screenshot, indexed by their position.
+
+    The index is immutable and can be queried from several threads at once.
+    """
+
+    def __init__(self, words: list[dict], cell_size: int = _CELL_SIZE) -> None:
+        self.words = [
+            w for w in words if w.get("text", "").strip() and layout.has_boxes([w])
+        ]
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[int]] = collections.defaultdict(list)
+        for idx, word in enumerate(self.words):
+            for cell in self._get_cells(
+                word["left"],
+                word["top"],
+                word["left"] + word["width"],
+                word["top"] + word["height"],
+            ):
+                self._cells[cell].append(idx)
+        logger.debug("Indexed %s words in %s cells", len(self.words), len(self._cells))
+
+    def __len__(self) -> int:
+        """Number of indexed words."""
+        return len(self.words)
+
+    def _get_cells(
+        self, left: float, top: float, right: float, bottom: float
+    ) -> Iterator[tuple[int, int]]:
+        """Cells overlapping the box, where right and bottom are exclusive."""
+        size = self._cell_size
+        for row in range(int(top // size), int(max(bottom - 1, top) // size) + 1):
+            for col in range(int(left // size), int(max(right - 1, left) // size) + 1):
+                yield col, row
+
+    def words_in(self, left: int, top: int, width: int, height: int) -> list[dict]:
+        """Find the words whose center lies inside a rectangle.
+
+        Args:
+            left: Horizontal position of the rectangle.
+            top: Vertical position of the rectangle.
+            width: Width of the rectangle.
+            height: Height of the rectangle.
+
+        Returns:
+            The indexed words, in index order. They must not be modified.
+        """
+        right, bottom = left + width, top + height
+        indices = {
+            idx
+            for cell in self._get_cells(left, top, right, bottom)
+            for idx in self._cells.get(cell, ())
+        }
+        return [
+            word
+            for word in (self.words[idx] for idx in sorted(indices))
+            if left <= _center(word)[0] < right and top <= _center(word)[1] < bottom
+        ]
+
+    def query(self, left: int, top: int, width: int, height: int) -> list[dict]:
+        """Find the words whose center lies inside a rectangle.
+
+        Returns:
+            Copies of the words in coordinates of the rectangle, in index order.
+        """
+        return [
+            {**word, "left": word["left"] - left, "top": word["top"] - top}
+            for word in self.words_in(left, top, width, height)
+        ]
+
+    def word_at(self, x: float, y: float) -> dict | None:
+        """Find the word whose box contains a position.
+
+        Returns:
+            The word, or None if there is no word at the position.
+        """
+        for idx in self._cells.get(
+            (int(x // self._cell_size), int(y // self._cell_size)), ()
+        ):
+            word = self.words[idx]
+            if (
+                word["left"] <= x < word["left"] + word["width"]
+                and word["top"] <= y < word["top"] + word["height"]
+            ):
+                return word
+        return None
@@ -0,0 +1,280 @@
+"""Reconstruct reading order and structure of the recognized text from word boxes.
+
+Tesseract's block, paragraph and line numbers are unreliable for multi column layouts
+and mixed font sizes. Therefore, the structure is rebuilt from the words' bounding
+boxes:
+
+1. Columns and sections are separated by recursive XY-cuts at the gaps in the
+   projections of the boxes onto the x- and y-axis. Columns come first, so the
+   reading order is column by column. Each cut splits at all sufficiently wide gaps
+   at once, so the depth of the cut tree depends on the nesting of columns and
+   sections, not on their number.
+2. Within each section, words are grouped into lines by their vertical overlap and
+   baseline, and ordered from left to right.
+3. Consecutive lines are grouped into paragraphs, which get split where the font
+   size (approximated by the word height) changes.
+
+All steps rely on sorting, i.e. they take O(n log n) per level of the cut tree.
+"""
+
+import bisect
+import logging
+import os
+import statistics
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+_BOX_KEYS = ("left", "top", "width", "height")
+
+# Thresholds, relative to the median word height
+_COLUMN_GAP = 1.5  # Min horizontal gap between two columns
+_MIN_COLUMN_HEIGHT = 1.5  # Columns have to consist of more than a single line
+_SECTION_GAP = 0.8  # Min vertical gap between two sections, e.g. paragraphs
+_MIN_LINE_OVERLAP = 0.5  # Min vertical overlap of a word with its line
+_BASELINE_TOLERANCE = 0.5  # Max distance of a word's bottom to its line's baseline
+
+_FONT_SIZE_CHANGE = 1.25  # Ratio of word heights which starts a new paragraph
+
+
+@dataclass
+class Line:
+    words: list[dict] = field(default_factory=list)
+
+    @property
+    def top(self) -> int:
+        return min(w["top"] for w in self.words)
+
+    @property
+    def bottom(self) -> int:
+        return max(_bottom(w) for w in self.words)
+
+    @property
+    def x_height(self) -> float:
+        """Median word height as indicator for the font size."""
+        return statistics.median(w["height"] for w in self.words)
+
+    def text(self, word_sep: str = " ") -> str:
+        return word_sep.join(w["text"] for w in self.words)
+
+
+@dataclass
+class Paragraph:
+    lines: list[Line] = field(default_factory=list)
+
+
+@dataclass
+class Block:
+    """Section of text, e.g. (a part of) a column."""
+
+    paragraphs: list[Paragraph] = field(default_factory=list)
+
+
+def _bottom(word: dict) -> int:
+    return word["top"] + word["height"]
+
+
+def _right(word: dict) -> int:
+    return word["left"] + word["width"]
+
+
+def bounding_box(words: Iterable[dict]) -> tuple[int, int, int, int]:
+    """Box around all words as (left, top, right, bottom)."""
+    words = list(words)
+    return (
+        min(w["left"] for w in words),
+        min(w["top"] for w in words),
+        max(_right(w) for w in words),
+        max(_bottom(w) for w in words),
+    )
+
+
+def has_boxes(words: Iterable[dict]) -> bool:
+    """Check if all words come with bounding boxes."""
+    return all(all(k in w for k in _BOX_KEYS) for w in words)
+
+
+def _from_tesseract_numbers(words: list[dict]) -> list[Block]:
+    """Take over the structure as detected by tesseract."""
+    blocks: list[Block] = []
+    last_nums: tuple | None = None
+    for word in words:
+        nums = tuple(word.get(k) for k in ("block_num", "par_num", "line_num"))
+        if last_nums is None or nums[0] != last_nums[0]:
+            blocks.append(Block(paragraphs=[Paragraph(lines=[Line()])]))
+        elif nums[1] != last_nums[1]:
+            blocks[-1].paragraphs.append(Paragraph(lines=[Line()]))
+        elif nums[2] != last_nums[2]:
+            blocks[-1].paragraphs[-1].lines.append(Line())
+        blocks[-1].paragraphs[-1].lines[-1].words.append(word)
+        last_nums = nums
+    return blocks
+
+
+def projection_gaps(intervals: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Find gaps between intervals projected onto one axis."""
+    gaps = []
+    sorted_intervals = sorted(intervals)
+    end = sorted_intervals[0][1]
+    for start, stop in sorted_intervals[1:]:
+        if start > end:
+            gaps.append((end, start))
+        end = max(end, stop)
+    return gaps
+
+
+def _split(
+    words: list[dict], gaps: list[tuple[int, int]], start: Callable[[dict], int]
+) -> list[list[dict]]:
+    """Split words at gaps of their projection, in order of the gaps."""
+    parts: list[list[dict]] = [[] for _ in range(len(gaps) + 1)]
+    gap_starts = [g[0] for g in gaps]
+    for word in words:
+        parts[bisect.bisect_right(gap_starts, start(word))].append(word)
+    return parts
+
+
+def _cut(words: list[dict], unit: float) -> list[list[dict]]:
+    """Recursively split words into sections using XY-cuts.
+
+    Args:
+        words: Words of the region to split.
+        unit: Median word height, to which all thresholds are relative.
+
+    Returns:
+        Words of the sections, in reading order.
+    """
+    if len(words) < 2:  # noqa: PLR2004
+        return [words]
+
+    if column_gaps := [
+        g
+        for g in projection_gaps((w["left"], _right(w)) for w in words)
+        if g[1] - g[0] >= _COLUMN_GAP * unit
+    ]:
+        columns = _split(words, column_gaps, start=lambda w: w["left"])
+        if all(
+            max(_bottom(w) for w in c) - min(w["top"] for w in c)
+            >= _MIN_COLUMN_HEIGHT * unit
+            for c in columns
+        ):
+            return [section for c in columns for section in _cut(c, unit)]
+
+    if section_gaps := [
+        g
+        for g in projection_gaps((w["top"], _bottom(w)) for w in words)
+        if g[1] - g[0] >= _SECTION_GAP * unit
+    ]:
+        sections = _split(words, section_gaps, start=lambda w: w["top"])
+        return [s for section in sections for s in _cut(section, unit)]
+
+    return [words]
+
+
+def _is_in_line(word: dict, line: Line, line_top: int, line_bottom: int) -> bool:
+    overlap = min(_bottom(word), line_bottom) - max(word["top"], line_top)
+    min_height = min(word["height"], line_bottom - line_top)
+    max_height = max(word["height"], line_bottom - line_top)
+    return (
+        overlap >= _MIN_LINE_OVERLAP * min_height
+        and abs(_bottom(word) - _bottom(line.words[0]))
+        <= _BASELINE_TOLERANCE * max_height
+    )
+
+
+def group_lines(words: list[dict]) -> list[Line]:
+    """Group words into lines, sorted top to bottom and left to right."""
+    lines: list[Line] = []
+    line_top = line_bottom = 0
+    for word in sorted(words, key=lambda w: w["top"] + w["height"] / 2):
+        if lines and _is_in_line(word, lines[-1], line_top, line_bottom):
+            lines[-1].words.append(word)
+            line_top = min(line_top, word["top"])
+            line_bottom = max(line_bottom, _bottom(word))
+        else:
+            lines.append(Line(words=[word]))
+            line_top, line_bottom = word["top"], _bottom(word)
+
+    for line in lines:
+        line.words.sort(key=lambda w: w["left"])
+    return lines
+
+
+def _group_paragraphs(lines: list[Line]) -> list[Paragraph]:
+    """Group consecutive lines of similar font size into paragraphs."""
+    paragraphs: list[Paragraph] = []
+    last_height = 0.0
+    for line in lines:
+        height = max(line.x_height, 1)
+        if not paragraphs or not (
+            1 / _FONT_SIZE_CHANGE <= height / last_height <= _FONT_SIZE_CHANGE
+        ):
+            paragraphs.append(Paragraph())
+        paragraphs[-1].lines.append(line)
+        last_height = height
+    return paragraphs
+
+
+def reconstruct(words: list[dict]) -> list[Block]:
+    """Derive blocks, paragraphs and lines of words in reading order.
+
+    Falls back to the structure detected by tesseract, if word boxes are missing.
+
+    Args:
+        words: Word records as returned by the OCR backends.
+
+    Returns:
+        Blocks of text in reading order.
+    """
+    words = [w for w in words if w.get("text", "").strip()]
+    if not words:
+        return []
+    if not has_boxes(words):
+        return _from_tesseract_numbers(words)
+
+    unit = max(statistics.median(w["height"] for w in words), 1)
+    return [
+        Block(paragraphs=_group_paragraphs(group_lines(section)))
+        for section in _cut(words, unit)
+    ]
+
+
+def renumber(words: list[dict]) -> list[dict]:
+    """Assign block, paragraph, line and word numbers according to the layout.
+
+    Returns:
+        Copies of the words in reading order.
+    """
+    numbered: list[dict] = []
+    for block_num, block in enumerate(reconstruct(words), start=1):
+        for par_num, paragraph in enumerate(block.paragraphs, start=1):
+            for line_num, line in enumerate(paragraph.lines, start=1):
+                numbered.extend(
+                    {
+                        **word,
+                        "block_num": block_num,
+                        "par_num": par_num,
+                        "line_num": line_num,
+                        "word_num": word_num,
+                    }
+                    for word_num, word in enumerate(line.words, start=1)
+                )
+    return numbered
+
+
+def to_text(
+    blocks: list[Block],
+    block_sep: str = os.linesep * 2,
+    par_sep: str = os.linesep,
+    line_sep: str = os.linesep,
+    word_sep: str = " ",
+) -> str:
+    """Join the words of the layout to a string using the given separators."""
+    return block_sep.join(
+        par_sep.join(
+            line_sep.join(line.text(word_sep=word_sep) for line in par.lines)
+            for par in block.paragraphs
+        )
+        for block in blocks
+    ).strip()
@@ -0,0 +1,228 @@
+"""Reuse already recognized text blocks for overlapping selections.
+
+Users often select a region, notice that it was slightly too small, and select a
+larger region on the same screenshot. To not recognize everything again, the blocks
+of text recognized on a screenshot are kept in a memo, keyed by their rectangle in
+screen coordinates and a hash of their pixels.
+
+When a new selection contains memorized blocks whose pixels are unchanged, those
+blocks are masked out with the background color before the OCR runs. So only the
+not yet covered area gets recognized, and the memorized words are spliced into the
+result afterwards.
+
+A memo belongs to one screenshot and has to be discarded together with it.
+"""
+
+import collections
+import hashlib
+import logging
+import threading
+from collections.abc import Hashable
+
+from PySide6 import QtCore, QtGui
+
+from normcap.detection.ocr import layout
+
+logger = logging.getLogger(__name__)
+
+_Box = tuple[int, int, int, int]  # left, top, right, bottom
+
+# Blocks closer to the border of a selection (relative to their word height) might
+# continue outside of it and are therefore not memorized
+_EDGE_MARGIN = 1.0
+
+# Pixels around a block which get masked as well, e.g. for antialiasing artifacts
+_MASK_PADDING = 2
+
+
+def _pixel_hash(image: QtGui.QImage, box: _Box) -> bytes:
+    left, top, right, bottom = box
+    region = image.copy(left, top, right - left, bottom - top).convertToFormat(
+        QtGui.QImage.Format.Format_RGB32
+    )
+    return hashlib.blake2b(region.constBits(), digest_size=16).digest()
+
+
+def _shift(words: list[dict], dx: int, dy: int) -> list[dict]:
+    return [{**w, "left": w["left"] + dx, "top": w["top"] + dy} for w in words]
+
+
+def _is_inside(inner: _Box, outer: _Box, margin: float = 0) -> bool:
+    return (
+        inner[0] - margin >= outer[0]
+        and inner[1] - margin >= outer[1]
+        and inner[2] + margin <= outer[2]
+        and inner[3] + margin <= outer[3]
+    )
+
+
+def _overlaps(box: _Box, other: _Box) -> bool:
+    return (
+        box[0] < other[2]
+        and other[0] < box[2]
+        and box[1] < other[3]
+        and other[1] < box[3]
+    )
+
+
+def _background_color(image: QtGui.QImage, box: _Box) -> QtGui.QColor:
+    """Most common color at the corners and edge centers of the box."""
+    left, top, right, bottom = box
+    xs = (left, (left + right) // 2, right - 1)
+    ys = (top, (top + bottom) // 2, bottom - 1)
+    colors = collections.Counter(
+        image.pixel(x, y) for x in xs for y in ys if (x, y) != (xs[1], ys[1])
+    )
+    return QtGui.QColor.fromRgb(colors.most_common(1)[0][0])
+
+
+def mask(image: QtGui.QImage, blocks: list[list[dict]]) -> QtGui.QImage:
+    """Paint over the boxes of the blocks with their background color."""
+    masked = image.convertToFormat(QtGui.QImage.Format.Format_RGB32)
+    painter = QtGui.QPainter(masked)
+    for words in blocks:
+        left, top, right, bottom = layout.bounding_box(words)
+        box = (
+            max(left - _MASK_PADDING, 0),
+            max(top - _MASK_PADDING, 0),
+            min(right + _MASK_PADDING, image.width()),
+            min(bottom + _MASK_PADDING, image.height()),
+        )
+        painter.fillRect(
+            QtCore.QRect(box[0], box[1], box[2] - box[0], box[3] - box[1]),
+            _background_color(masked, box),
+        )
+    painter.end()
+    return masked
+
+
+class BlockMemo:
+    """Recognized blocks of text of a single screenshot.
+
+    The memo can be used from several worker threads at once.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._blocks: dict[tuple[Hashable, _Box], tuple[bytes, list[dict]]] = {}
+
+    def __len__(self) -> int:
+        """Number of memorized blocks."""
+        return len(self._blocks)
+
+    def region(self, left: int, top: int) -> "MemoRegion":
+        """Access the memo from a selection at the given position."""
+        return MemoRegion(memo=self, left=left, top=top)
+
+    def clear(self) -> None:
+        """Forget all blocks."""
+        with self._lock:
+            self._blocks.clear()
+
+
+class MemoRegion:
+    """View on a memo from the perspective of a selected region.
+
+    All words are in coordinates of the region's image, the memo itself stores them
+    in screen coordinates.
+    """
+
+    def __init__(self, memo: BlockMemo, left: int, top: int) -> None:
+        self.memo = memo
+        self.left = left
+        self.top = top
+
+    def lookup(self, image: QtGui.QImage, config: Hashable) -> list[list[dict]]:
+        """Find memorized blocks inside the image, whose pixels did not change.
+
+        Args:
+            image: Image of the selected region.
+            config: Settings which affect the recognition, e.g. the languages. Only
+                blocks recognized with the same config are returned.
+
+        Returns:
+            Words of the blocks, largest blocks first.
+        """
+        region_box = (
+            self.left,
+            self.top,
+            self.left + image.width(),
+            self.top + image.height(),
+        )
+        with self.memo._lock:
+            candidates = [
+                (box, pixel_hash, words)
+                for (cfg, box), (pixel_hash, words) in self.memo._blocks.items()
+                if cfg == config and _is_inside(box, region_box)
+            ]
+
+        found: list[_Box] = []
+        blocks = []
+        for box, pixel_hash, words in sorted(
+            candidates, key=lambda c: (c[0][2] - c[0][0]) * (c[0][3] - c[0][1])
+        )[::-1]:
+            if any(_overlaps(box, f) for f in found):
+                continue
+            local_box = (
+                box[0] - self.left,
+                box[1] - self.top,
+                box[2] - self.left,
+                box[3] - self.top,
+            )
+            if _pixel_hash(image, local_box) != pixel_hash:
+                continue
+            found.append(box)
+            blocks.append(_shift(words, -self.left, -self.top))
+
+        logger.debug("Reuse %s memorized blocks", len(blocks))
+        return blocks
+
+    def store(self, image: QtGui.QImage, config: Hashable, words: list[dict]) -> None:
+        """Memorize the blocks of recognized words.
+
+        Blocks close to the border of the image are skipped, as they might continue
+        outside of the selection.
+
+        Args:
+            image: Image of the selected region.
+            config: Settings which affected the recognition.
+            words: Recognized words in coordinates of the image.
+        """
+        if not layout.has_boxes(words):
+            return
+
+        image_box = (0, 0, image.width(), image.height())
+        new_blocks = {}
+        for block in layout.reconstruct(words):
+            block_words = [
+                w for p in block.paragraphs for li in p.lines for w in li.words
+            ]
+            box = layout.bounding_box(block_words)
+            margin = _EDGE_MARGIN * max(
+                li.x_height for p in block.paragraphs for li in p.lines
+            )
+            if not _is_inside(box, image_box, margin=margin):
+                continue
+            screen_box = (
+                box[0] + self.left,
+                box[1] + self.top,
+                box[2] + self.left,
+                box[3] + self.top,
+            )
+            new_blocks[config, screen_box] = (
+                _pixel_hash(image, box),
+                _shift(block_words, self.left, self.top),
+            )
+
+        with self.memo._lock:
+            self.memo._blocks.update(new_blocks)
+        logger.debug("Memorized %s blocks", len(new_blocks))
+
+
+def splice(words: list[dict], blocks: list[list[dict]]) -> list[dict]:
+    """Merge words of memorized blocks into recognized words.
+
+    The block, paragraph, line and word numbers are reassigned according to the
+    reconstructed layout, so that the merged words are in reading order.
+    """
+    return layout.renumber(words + [w for b in blocks for w in b])
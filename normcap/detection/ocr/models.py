@@ -1,4 +1,5 @@
 import enum
+import functools
 import os
 from dataclasses import dataclass, field
 from os import PathLike
@@ -6,6 +7,9 @@ from typing import Protocol
 
 from PySide6 import QtGui
 
+from normcap.detection.ocr.layout import Block, reconstruct
+from normcap.detection.scheduler import CancellationToken
+
 
 @enum.unique
 class PSM(enum.IntEnum):
@@ -39,12 +43,22 @@ class OEM(enum.IntEnum):
     DEFAULT = 3  # Run both and combine results - best accuracy.
 
 
+class OcrEngine(str, enum.Enum):
+    """Available backends for text recognition."""
+
+    # ONHOLD: Switch to StrEnum when Python 3.11
+
+    TESSERACT = "tesseract"
+    ONNX = "onnx"
+
+
 class Transformer(str, enum.Enum):
     SINGLE_LINE = "SINGLE_LINE"
     MULTI_LINE = "MULTI_LINE"
     PARAGRAPH = "PARAGRAPH"
     MAIL = "MAIL"
     URL = "URL"
+    TABLE = "TABLE"
 
 
 @dataclass
@@ -168,6 +182,14 @@ class OcrResult:
 
         return text.strip()
 
+    @functools.cached_property
+    def layout(self) -> list[Block]:
+        """Blocks, paragraphs and lines reconstructed from the word boxes.
+
+        Computed once on first access, so the words must not be changed afterwards.
+        """
+        return reconstruct(self.words)
+
     @property
     def num_chars(self) -> int:
         """Provide number of chars without word separators."""
@@ -213,3 +235,44 @@ class TransformerProtocol(Protocol):
         Returns:
             Transformed text.
         """
+
+
+class OcrBackend(Protocol):
+    """Engine which recognizes words and their positions in an image.
+
+    All backends return the same word records as tesseract's tsv output, i.e. dicts
+    with the keys `block_num`, `par_num`, `line_num`, `word_num`, `left`, `top`,
+    `width`, `height`, `conf` (0-100) and `text`. Positions are in pixels of the
+    image passed to `recognize()`.
+    """
+
+    install_instructions: str
+
+    def is_installed(self) -> bool:
+        """Check if the dependencies (binaries, packages, models) are available.
+
+        Returns:
+            Backend can be used
+        """
+        ...  # pragma: no cover
+
+    def recognize(
+        self,
+        image: QtGui.QImage,
+        args: TessArgs,
+        timeout: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> list[dict]:
+        """Recognize the words in the image.
+
+        Arguments:
+            image: Preprocessed image to recognize.
+            args: Language and mode options. Backends ignore options they don't
+                support.
+            timeout: Abort the recognition after this many seconds.
+            cancel_token: Abort the recognition when cancelled.
+
+        Returns:
+            Word records, ordered by line.
+        """
+        ...  # pragma: no cover
@@ -0,0 +1,409 @@
+"""Recognize text with PP-OCR models running on the CPU via ONNX Runtime.
+
+The backend expects the PaddleOCR models, exported to onnx, in a local directory:
+
+- `det.onnx`: Text detection model (DB), which returns a text probability map.
+- `rec.onnx`: Text recognition model with CTC head.
+- `dict.txt`: Character dictionary of the recognition model, one char per line.
+
+The text detection yields line segments. Word boxes are derived from the positions
+of the characters in the CTC output of the recognition model.
+"""
+
+import functools
+import logging
+import time
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Any, NamedTuple, cast
+
+from PySide6 import QtCore, QtGui
+
+from normcap.detection.ocr.models import TessArgs
+from normcap.detection.scheduler import CancellationToken
+
+# Imported separately, as the pre- and postprocessing only need numpy
+try:
+    import numpy as np
+except ImportError:
+    np = cast(Any, None)
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = cast(Any, None)
+
+
+logger = logging.getLogger(__name__)
+
+DET_MODEL_FILE = "det.onnx"
+REC_MODEL_FILE = "rec.onnx"
+DICT_FILE = "dict.txt"
+
+_DET_MAX_SIDE = 960  # Larger images are scaled down before text detection
+_DET_STRIDE = 32  # Input sides of the detection model have to be multiples of this
+_DET_MEAN = (0.485, 0.456, 0.406)
+_DET_STD = (0.229, 0.224, 0.225)
+_DET_THRESHOLD = 0.3  # Min probability of a pixel to belong to text
+_DET_BOX_THRESHOLD = 0.6  # Min mean probability of a text region
+_DET_UNCLIP_RATIO = 1.5  # DB detects shrunk regions, which have to be expanded
+_DET_MIN_SIZE = 3  # Ignore smaller text regions (in px of the probability map)
+
+_REC_HEIGHT = 48
+_REC_MAX_WIDTH = 3200
+
+
+class _Box(NamedTuple):
+    left: int
+    top: int
+    right: int  # exclusive
+    bottom: int  # exclusive
+    score: float
+
+
+class _Char(NamedTuple):
+    text: str
+    step: int  # Time step of the CTC output at which the char was emitted
+    conf: float
+
+
+def _load_dictionary(dict_path: Path) -> list[str]:
+    """Read the char list, including CTC blank (first) and space (last)."""
+    chars = dict_path.read_text(encoding="utf-8").splitlines()
+    return ["", *[c for c in chars if c], " "]
+
+
+@functools.cache
+def _load_models(
+    model_path: Path, num_threads: int
+) -> tuple[Any, Any, list[str]]:  # pragma: no cover # requires models
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = num_threads
+    options.inter_op_num_threads = 1
+    providers = ["CPUExecutionProvider"]
+
+    start_time = time.time()
+    det_session = ort.InferenceSession(
+        str(model_path / DET_MODEL_FILE), options, providers=providers
+    )
+    rec_session = ort.InferenceSession(
+        str(model_path / REC_MODEL_FILE), options, providers=providers
+    )
+    chars = _load_dictionary(model_path / DICT_FILE)
+    logger.debug("Loading onnx models took %s", f"{time.time() - start_time:.4f}s")
+    return det_session, rec_session, chars
+
+
+def _image_to_array(image: QtGui.QImage) -> "np.ndarray":
+    """Convert image to an array of shape (height, width, 3) with RGB values."""
+    image = image.convertToFormat(QtGui.QImage.Format.Format_RGB888)
+    width, height, bytes_per_line = image.width(), image.height(), image.bytesPerLine()
+    buffer = np.frombuffer(
+        image.constBits(), dtype=np.uint8, count=bytes_per_line * height
+    )
+    return buffer.reshape(height, bytes_per_line)[:, : width * 3].reshape(
+        height, width, 3
+    )
+
+
+def _to_model_input(
+    rgb: "np.ndarray", mean: tuple[float, ...], std: tuple[float, ...]
+) -> "np.ndarray":
+    """Normalize RGB array and reorder it to shape (1, 3, height, width)."""
+    normalized = (rgb.astype(np.float32) / 255.0 - mean) / std
+    return normalized.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+
+
+def _get_detection_size(width: int, height: int) -> tuple[int, int]:
+    """Scale size to fit the detection model, keeping the aspect ratio."""
+    scale = min(1.0, _DET_MAX_SIDE / max(width, height))
+
+    def _round(side: int) -> int:
+        return max(_DET_STRIDE, round(side * scale / _DET_STRIDE) * _DET_STRIDE)
+
+    return _round(width), _round(height)
+
+
+def _find_regions(mask: "np.ndarray") -> list[tuple[int, int, int, int]]:
+    """Find bounding boxes of 8-connected regions in a binary mask.
+
+    Connects horizontal runs of set pixels with the overlapping runs of the previous
+    row using union-find, which is much faster than a pixel wise flood fill.
+
+    Returns:
+        Bounding boxes as (left, top, right, bottom), right and bottom exclusive.
+    """
+    parents: list[int] = []
+    runs: list[tuple[int, int, int]] = []  # (row, start, end)
+
+    def _find(idx: int) -> int:
+        while parents[idx] != idx:
+            parents[idx] = parents[parents[idx]]
+            idx = parents[idx]
+        return idx
+
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    changes = np.diff(padded, axis=1)
+
+    previous_row: list[int] = []
+    for row in range(mask.shape[0]):
+        starts = np.flatnonzero(changes[row] == 1).tolist()
+        ends = np.flatnonzero(changes[row] == -1).tolist()
+        current_row = []
+        prev_idx = 0
+        for start, end in zip(starts, ends, strict=True):
+            run_idx = len(runs)
+            runs.append((row, start, end))
+            parents.append(run_idx)
+            current_row.append(run_idx)
+
+            # Skip runs of previous row, which end before this one starts
+            while (
+                prev_idx < len(previous_row) and runs[previous_row[prev_idx]][2] < start
+            ):
+                prev_idx += 1
+            # Union with all runs of the previous row which touch this one
+            idx = prev_idx
+            while idx < len(previous_row) and runs[previous_row[idx]][1] <= end:
+                parents[_find(previous_row[idx])] = _find(run_idx)
+                idx += 1
+            prev_idx = max(prev_idx, idx - 1)
+        previous_row = current_row
+
+    regions: dict[int, list[int]] = {}
+    for run_idx, (row, start, end) in enumerate(runs):
+        root = _find(run_idx)
+        if root not in regions:
+            regions[root] = [start, row, end, row + 1]
+        else:
+            region = regions[root]
+            region[0] = min(region[0], start)
+            region[2] = max(region[2], end)
+            region[3] = row + 1
+    return [tuple(r) for r in regions.values()]  # type: ignore[misc]
+
+
+def _get_text_boxes(
+    prob_map: "np.ndarray", scale_x: float, scale_y: float, width: int, height: int
+) -> list[_Box]:
+    """Extract text line boxes from the probability map of the detection model.
+
+    Args:
+        prob_map: Text probability per pixel, shape (height, width).
+        scale_x: Factor to map the x-coordinates to the input image.
+        scale_y: Factor to map the y-coordinates to the input image.
+        width: Width of the input image.
+        height: Height of the input image.
+
+    Returns:
+        Boxes in coordinates of the input image.
+    """
+    mask = prob_map > _DET_THRESHOLD
+    boxes = []
+    for left, top, right, bottom in _find_regions(mask):
+        box_width, box_height = right - left, bottom - top
+        if min(box_width, box_height) < _DET_MIN_SIZE:
+            continue
+
+        region_mask = mask[top:bottom, left:right]
+        score = float(prob_map[top:bottom, left:right][region_mask].mean())
+        if score < _DET_BOX_THRESHOLD:
+            continue
+
+        offset = (
+            box_width * box_height * _DET_UNCLIP_RATIO / (2 * (box_width + box_height))
+        )
+        boxes.append(
+            _Box(
+                left=max(0, int((left - offset) * scale_x)),
+                top=max(0, int((top - offset) * scale_y)),
+                right=min(width, int((right + offset) * scale_x + 0.5)),
+                bottom=min(height, int((bottom + offset) * scale_y + 0.5)),
+                score=score,
+            )
+        )
+    return boxes
+
+
+def _decode_ctc(probs: "np.ndarray", chars: list[str]) -> list[_Char]:
+    """Greedy decoding of the CTC output of shape (time steps, classes)."""
+    indices = probs.argmax(axis=1)
+    confs = probs.max(axis=1)
+    decoded = []
+    last_idx = 0
+    for step, (idx, conf) in enumerate(
+        zip(indices.tolist(), confs.tolist(), strict=True)
+    ):
+        if idx not in (0, last_idx) and idx < len(chars):
+            decoded.append(_Char(text=chars[idx], step=step, conf=conf))
+        last_idx = idx
+    return decoded
+
+
+def _split_words(
+    chars: list[_Char], box: _Box, num_steps: int
+) -> list[tuple[str, int, int, float]]:
+    """Split decoded line into words and estimate their horizontal extent.
+
+    Returns:
+        Words as (text, left, right, confidence in percent).
+    """
+    step_width = (box.right - box.left) / max(num_steps, 1)
+    words = []
+    word: list[_Char] = []
+    for char in [*chars, _Char(text=" ", step=num_steps, conf=1)]:
+        if not char.text.isspace():
+            word.append(char)
+            continue
+        if word:
+            words.append(
+                (
+                    "".join(c.text for c in word),
+                    box.left + int(word[0].step * step_width),
+                    box.left + int((word[-1].step + 1) * step_width + 0.5),
+                    100 * sum(c.conf for c in word) / len(word),
+                )
+            )
+        word = []
+    return words
+
+
+def _group_lines(boxes: list[_Box]) -> list[list[_Box]]:
+    """Group boxes into lines, sorted top to bottom and left to right."""
+    lines: list[list[_Box]] = []
+    for box in sorted(boxes, key=lambda b: (b.top + b.bottom) / 2):
+        center = (box.top + box.bottom) / 2
+        if lines:
+            line = lines[-1]
+            line_top = min(b.top for b in line)
+            line_bottom = max(b.bottom for b in line)
+            if line_top < center < line_bottom:
+                line.append(box)
+                continue
+        lines.append([box])
+    return [sorted(line, key=lambda b: b.left) for line in lines]
+
+
+@dataclass
+class OnnxBackend:
+    """Recognize text using PP-OCR models on the CPU."""
+
+    model_path: PathLike | str
+    num_threads: int = 1
+
+    install_instructions = (
+        "The Python packages 'onnxruntime' and 'numpy' are required, e.g. "
+        "'pip install onnxruntime numpy'. The PP-OCR models have to be exported to "
+        f"onnx and placed as '{DET_MODEL_FILE}', '{REC_MODEL_FILE}' and "
+        f"'{DICT_FILE}' into the model directory."
+    )
+
+    def is_installed(self) -> bool:
+        if np is None or ort is None:
+            logger.debug("Python package 'onnxruntime' or 'numpy' is missing")
+            return False
+
+        model_path = Path(self.model_path)
+        if missing := [
+            f
+            for f in (DET_MODEL_FILE, REC_MODEL_FILE, DICT_FILE)
+            if not (model_path / f).is_file()
+        ]:
+            logger.debug("Missing onnx model files in %s: %s", model_path, missing)
+            return False
+
+        return True
+
+    def _detect_boxes(self, session: Any, image: QtGui.QImage) -> list[_Box]:  # noqa: ANN401
+        width, height = _get_detection_size(image.width(), image.height())
+        scaled = image.scaled(
+            width,
+            height,
+            QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+            QtCore.Qt.TransformationMode.SmoothTransformation,
+        )
+        model_input = _to_model_input(_image_to_array(scaled), _DET_MEAN, _DET_STD)
+        output = session.run(None, {session.get_inputs()[0].name: model_input})[0]
+        return _get_text_boxes(
+            prob_map=output[0, 0],
+            scale_x=image.width() / width,
+            scale_y=image.height() / height,
+            width=image.width(),
+            height=image.height(),
+        )
+
+    def _recognize_box(
+        self,
+        session: Any,  # noqa: ANN401
+        chars: list[str],
+        image: QtGui.QImage,
+        box: _Box,
+    ) -> list[tuple[str, int, int, float]]:
+        crop = image.copy(
+            QtCore.QRect(box.left, box.top, box.right - box.left, box.bottom - box.top)
+        )
+        width = round(crop.width() * _REC_HEIGHT / max(crop.height(), 1))
+        crop = crop.scaled(
+            min(max(width, _REC_HEIGHT), _REC_MAX_WIDTH),
+            _REC_HEIGHT,
+            QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+            QtCore.Qt.TransformationMode.SmoothTransformation,
+        )
+        model_input = _to_model_input(_image_to_array(crop), (0.5,) * 3, (0.5,) * 3)
+        probs = session.run(None, {session.get_inputs()[0].name: model_input})[0][0]
+        return _split_words(
+            _decode_ctc(probs, chars), box=box, num_steps=probs.shape[0]
+        )
+
+    def recognize(
+        self,
+        image: QtGui.QImage,
+        args: TessArgs,
+        timeout: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> list[dict]:
+        """Detect text lines, then recognize each line segment.
+
+        The models are language specific, therefore the language in `args` is
+        ignored. The timeout is checked between two line segments.
+        """
+        deadline = time.time() + timeout if timeout else None
+        det_session, rec_session, chars = _load_models(
+            Path(self.model_path), self.num_threads
+        )
+
+        boxes = self._detect_boxes(det_session, image)
+        logger.debug("Detected %s text segments", len(boxes))
+
+        words = []
+        for line_num, line in enumerate(_group_lines(boxes), start=1):
+            word_num = 0
+            for box in line:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                if deadline and time.time() > deadline:
+                    raise TimeoutError(f"Onnx OCR did not finish within {timeout}s")
+
+                for text, left, right, conf in self._recognize_box(
+                    rec_session, chars, image, box
+                ):
+                    word_num += 1
+                    words.append(
+                        {
+                            "level": 5,
+                            "page_num": 1,
+                            "block_num": 1,
+                            "par_num": 1,
+                            "line_num": line_num,
+                            "word_num": word_num,
+                            "left": left,
+                            "top": box.top,
+                            "width": right - left,
+                            "height": box.bottom - box.top,
+                            "conf": conf,
+                            "text": text,
+                        }
+                    )
+        return words
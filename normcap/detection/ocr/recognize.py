@@ -10,9 +10,17 @@ from pathlib import Path
 
 from PySide6 import QtGui
 
-from normcap.detection.models import DetectionResult, TextDetector, TextType
-from normcap.detection.ocr import enhance, tesseract, transformer
-from normcap.detection.ocr.models import OEM, PSM, OcrResult, TessArgs
+from normcap.detection.models import (
+    DetectionDetails,
+    DetectionResult,
+    TextDetector,
+    TextType,
+)
+from normcap.detection.ocr import enhance, layout, tesseract, transformer
+from normcap.detection.ocr import memo as ocr_memo
+from normcap.detection.ocr.memo import MemoRegion
+from normcap.detection.ocr.models import OEM, PSM, OcrBackend, OcrResult, TessArgs
+from normcap.detection.scheduler import CancellationToken
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +40,44 @@ def _save_image_in_temp_folder(image: QtGui.QImage, postfix: str = "") -> None:
     image.save(str(temp_dir / file_name))
 
 
+def _to_input_coordinates(
+    words: list[dict], resize_factor: float | None, padding_size: int | None
+) -> list[dict]:
+    """Map word boxes from the preprocessed image back to the input image."""
+    factor = resize_factor or 1
+    padding = padding_size or 0
+    return [
+        {
+            **word,
+            "left": round((word["left"] - padding) / factor),
+            "top": round((word["top"] - padding) / factor),
+            "width": round(word["width"] / factor),
+            "height": round(word["height"] / factor),
+        }
+        if all(k in word for k in ("left", "top", "width", "height"))
+        else word
+        for word in words
+    ]
+
+
+def _to_image_coordinates(
+    words: list[dict], resize_factor: float | None, padding_size: int | None
+) -> list[dict]:
+    """Map word boxes from the input image to the preprocessed image."""
+    factor = resize_factor or 1
+    padding = padding_size or 0
+    return [
+        {
+            **word,
+            "left": round(word["left"] * factor + padding),
+            "top": round(word["top"] * factor + padding),
+            "width": round(word["width"] * factor),
+            "height": round(word["height"] * factor),
+        }
+        for word in words
+    ]
+
+
 def get_text_from_image(
     languages: str | Iterable[str],
     image: QtGui.QImage,
@@ -40,10 +86,25 @@ def get_text_from_image(
     parse: bool = True,
     resize_factor: float | None = None,
     padding_size: int | None = None,
+    oem: OEM = OEM.DEFAULT,
+    psm: PSM = PSM.AUTO,
+    omp_thread_limit: int | None = None,
+    timeout: float | None = None,
+    cancel_token: CancellationToken | None = None,
+    backend: OcrBackend | None = None,
+    details: DetectionDetails | None = None,
+    memo: MemoRegion | None = None,
 ) -> list[DetectionResult]:
-    """Apply OCR on selected image section."""
-    image = enhance.preprocess(image, resize_factor=resize_factor, padding=padding_size)
-    _save_image_in_temp_folder(image, postfix="_enhanced")
+    """Apply OCR on selected image section.
+
+    The text is recognized by tesseract, unless another backend is provided. If
+    details are provided, the words (in coordinates of the input image), the scores
+    of the transformers and the durations of the steps are added to it.
+
+    If a memo is provided, memorized blocks of text inside the image are not
+    recognized again, and the newly recognized blocks get memorized.
+    """
+    timings = details.timings if details is not None else {}
 
     # TODO: Improve handling of tesseract_cmd and tessdata_path
     if sys.platform == "win32" and tessdata_path:
@@ -52,20 +113,100 @@ def get_text_from_image(
     tess_args = TessArgs(
         tessdata_path=tessdata_path,
         lang=languages if isinstance(languages, str) else "+".join(languages),
-        oem=OEM.DEFAULT,
-        psm=PSM.AUTO,
+        oem=oem,
+        psm=psm,
     )
+    if backend is None:
+        backend = tesseract.TesseractBackend(
+            tesseract_bin_path=tesseract_bin_path, omp_thread_limit=omp_thread_limit
+        )
+
+    start_time = time.perf_counter()
+    memo_config = (
+        type(backend).__name__,
+        tess_args.lang,
+        oem,
+        psm,
+        resize_factor,
+        padding_size,
+    )
+    memorized_blocks = memo.lookup(image, memo_config) if memo else []
+    input_image = image
+    if memorized_blocks:
+        image = ocr_memo.mask(image, memorized_blocks)
+    image = enhance.preprocess(image, resize_factor=resize_factor, padding=padding_size)
+    _save_image_in_temp_folder(image, postfix="_enhanced")
+    timings["ocr_preprocess"] = time.perf_counter() - start_time
+
     logger.debug(
-        "Run Tesseract on image of size %s with args:\n%s",
+        "Run %s on image of size %s with args:\n%s",
+        type(backend).__name__,
         (image.width(), image.height()),
         tess_args,
     )
-    ocr_result_data = tesseract.perform_ocr(
-        tesseract_bin_path=tesseract_bin_path, image=image, args=tess_args.as_list()
+    start_time = time.perf_counter()
+    ocr_result_data = backend.recognize(
+        image=image, args=tess_args, timeout=timeout, cancel_token=cancel_token
     )
+    timings["ocr_recognize"] = time.perf_counter() - start_time
+    if memo:
+        words = _to_input_coordinates(
+            ocr_result_data, resize_factor=resize_factor, padding_size=padding_size
+        )
+        memo.store(input_image, memo_config, words)
+    if memorized_blocks:
+        ocr_result_data = ocr_memo.splice(
+            ocr_result_data,
+            [
+                _to_image_coordinates(
+                    b, resize_factor=resize_factor, padding_size=padding_size
+                )
+                for b in memorized_blocks
+            ],
+        )
     result = OcrResult(tess_args=tess_args, words=ocr_result_data, image=image)
     logger.debug("OCR detections:\n%s", ",\n".join(str(w) for w in result.words))
+    if details is not None:
+        details.words = _to_input_coordinates(
+            result.words, resize_factor=resize_factor, padding_size=padding_size
+        )
+
+    return _to_detection_results(result, parse=parse, details=details)
+
 
+def get_text_from_words(
+    languages: str | Iterable[str],
+    words: list[dict],
+    parse: bool = True,
+    details: DetectionDetails | None = None,
+) -> list[DetectionResult]:
+    """Compile results from words, which were recognized in advance.
+
+    E.g. the words inside a selection, taken from a recognition of the whole screen.
+    Block, paragraph, line and word numbers are reassigned according to the layout
+    of the words, as the words might be just a part of the original blocks.
+    """
+    words = layout.renumber(words)
+    result = OcrResult(
+        tess_args=TessArgs(
+            tessdata_path=None,
+            lang=languages if isinstance(languages, str) else "+".join(languages),
+            oem=OEM.DEFAULT,
+            psm=PSM.AUTO,
+        ),
+        words=words,
+        image=QtGui.QImage(),
+    )
+    if details is not None:
+        details.words = words
+    return _to_detection_results(result, parse=parse, details=details)
+
+
+def _to_detection_results(
+    result: OcrResult, parse: bool, details: DetectionDetails | None
+) -> list[DetectionResult]:
+    """Apply the transformers, if parsing is enabled, and wrap up the texts."""
+    timings = details.timings if details is not None else {}
     if not parse:
         return [
             DetectionResult(
@@ -75,8 +216,16 @@ def get_text_from_image(
             )
         ]
 
+    start_time = time.perf_counter()
     result = transformer.apply(result)
+    timings["ocr_transform"] = time.perf_counter() - start_time
     logger.debug("Parsed text:\n%s", result.parsed)
+    if details is not None:
+        best_transformer = result.best_scored_transformer
+        details.transformer = best_transformer.value if best_transformer else None
+        details.transformer_scores = {
+            t.value: s for t, s in result.transformer_scores.items()
+        }
     text_type = (
         TextType[result.best_scored_transformer.value]
         if result.best_scored_transformer
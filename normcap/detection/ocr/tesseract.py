@@ -2,17 +2,24 @@ import csv
 import ctypes
 import functools
 import logging
+import os
 import re
+import shutil
 import subprocess
 import sys
 import tempfile
 import time
 from ctypes import wintypes
+from dataclasses import dataclass
 from os import PathLike, linesep
 from pathlib import Path
+from typing import Any
 
 from PySide6 import QtGui
 
+from normcap.detection.ocr.models import TessArgs
+from normcap.detection.scheduler import CancellationToken
+
 logger = logging.getLogger(__name__)
 
 
@@ -58,18 +65,69 @@ def _raise_on_error(proc: subprocess.CompletedProcess) -> None:
         )
 
 
-def _run_command(cmd_args: list[str]) -> str:
+def _run_cancellable(
+    cmd_args: list[str],
+    cancel_token: CancellationToken,
+    timeout: float | None,
+    **kwargs: Any,  # noqa: ANN401
+) -> subprocess.CompletedProcess:
+    """Run command and kill it, as soon as the token gets cancelled."""
+    cancel_token.raise_if_cancelled()
+    with subprocess.Popen(  # noqa: S603
+        cmd_args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        **kwargs,
+    ) as proc:
+        unregister = cancel_token.on_cancel(proc.kill)
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("Kill '%s' after timeout of %ss", cmd_args[0], timeout)
+            proc.kill()
+            proc.communicate()
+            raise
+        finally:
+            unregister()
+
+    if cancel_token.is_cancelled:
+        logger.debug("Killed '%s' due to cancellation", cmd_args[0])
+        cancel_token.raise_if_cancelled()
+
+    return subprocess.CompletedProcess(
+        args=cmd_args, returncode=proc.returncode, stdout=stdout, stderr=stderr
+    )
+
+
+def _run_command(
+    cmd_args: list[str],
+    env: dict[str, str] | None = None,
+    timeout: float | None = None,
+    cancel_token: CancellationToken | None = None,
+) -> str:
     logger.debug("Executing '%s'", " ".join(cmd_args))
     try:
         creationflags = getattr(subprocess, "CREATE_NO_WINDOW", None)
-        kwargs = {"creationflags": creationflags} if creationflags else {}
-        proc = subprocess.run(  # noqa: S603
-            cmd_args,
-            capture_output=True,
-            text=True,
-            check=False,
-            **kwargs,
+        kwargs: dict[str, Any] = (
+            {"creationflags": creationflags} if creationflags else {}
         )
+        if env:
+            kwargs["env"] = {**os.environ, **env}
+
+        if cancel_token:
+            proc = _run_cancellable(
+                cmd_args, cancel_token=cancel_token, timeout=timeout, **kwargs
+            )
+        else:
+            proc = subprocess.run(  # noqa: S603
+                cmd_args,
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=timeout,
+                **kwargs,
+            )
         _raise_on_error(proc)
         out_str = proc.stdout
         logger.debug(
@@ -119,7 +177,12 @@ def _move_to_normcap_temp_dir(input_file: Path, postfix: str) -> None:
 
 
 def _run_tesseract(
-    tesseract_bin_path: PathLike | str, image: QtGui.QImage, args: list[str]
+    tesseract_bin_path: PathLike | str,
+    image: QtGui.QImage,
+    args: list[str],
+    omp_thread_limit: int | None = None,
+    timeout: float | None = None,
+    cancel_token: CancellationToken | None = None,
 ) -> list[list[str]]:
     input_image_filename = "normcap_tesseract_input.png"
 
@@ -144,7 +207,10 @@ def _run_tesseract(
             *args,
         ]
 
-        _ = _run_command(cmd_args=cmd_args)
+        env = {"OMP_THREAD_LIMIT": str(omp_thread_limit)} if omp_thread_limit else None
+        _ = _run_command(
+            cmd_args=cmd_args, env=env, timeout=timeout, cancel_token=cancel_token
+        )
 
         if logger.getEffectiveLevel() == logging.DEBUG:
             _move_to_normcap_temp_dir(
@@ -182,9 +248,57 @@ def _tsv_to_list_of_dict(tsv_lines: list[list[str]]) -> list[dict]:
 
 
 def perform_ocr(
-    tesseract_bin_path: PathLike | str, image: QtGui.QImage, args: list[str]
+    tesseract_bin_path: PathLike | str,
+    image: QtGui.QImage,
+    args: list[str],
+    omp_thread_limit: int | None = None,
+    timeout: float | None = None,
+    cancel_token: CancellationToken | None = None,
 ) -> list[dict]:
+    """Run tesseract on the image and return the recognized words.
+
+    Raises:
+        subprocess.TimeoutExpired: If tesseract didn't finish within the timeout.
+        CancelledError: If the cancel token was triggered while tesseract ran.
+    """
     lines = _run_tesseract(
-        tesseract_bin_path=tesseract_bin_path, image=image, args=args
+        tesseract_bin_path=tesseract_bin_path,
+        image=image,
+        args=args,
+        omp_thread_limit=omp_thread_limit,
+        timeout=timeout,
+        cancel_token=cancel_token,
     )
     return _tsv_to_list_of_dict(lines)
+
+
+@dataclass
+class TesseractBackend:
+    """Recognize text by running the tesseract binary."""
+
+    tesseract_bin_path: PathLike | str
+    omp_thread_limit: int | None = None
+
+    install_instructions = (
+        "The 'tesseract' binary is required. Install it using your system's "
+        "package manager, e.g. 'sudo apt install tesseract-ocr'."
+    )
+
+    def is_installed(self) -> bool:
+        return bool(shutil.which(str(self.tesseract_bin_path)))
+
+    def recognize(
+        self,
+        image: QtGui.QImage,
+        args: TessArgs,
+        timeout: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> list[dict]:
+        return perform_ocr(
+            tesseract_bin_path=self.tesseract_bin_path,
+            image=image,
+            args=args.as_list(),
+            omp_thread_limit=self.omp_thread_limit,
+            timeout=timeout,
+            cancel_token=cancel_token,
+        )
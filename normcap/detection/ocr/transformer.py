@@ -14,6 +14,7 @@ _transformers: dict[Transformer, TransformerProtocol] = {
     Transformer.PARAGRAPH: transformers.paragraph.ParagraphTransformer(),
     Transformer.MAIL: transformers.email_address.EmailTransformer(),
     Transformer.URL: transformers.url.UrlTransformer(),
+    Transformer.TABLE: transformers.table.TableTransformer(),
 }
 
 
@@ -3,6 +3,7 @@ from normcap.detection.ocr.transformers import (
     multi_line,
     paragraph,
     single_line,
+    table,
     url,
 )
 
@@ -11,5 +12,6 @@ __all__ = [
     "multi_line",
     "paragraph",
     "single_line",
+    "table",
     "url",
 ]
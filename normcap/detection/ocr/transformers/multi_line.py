@@ -1,5 +1,6 @@
 """Transformer to handle multi line text selection."""
 
+from normcap.detection.ocr import layout
 from normcap.detection.ocr.models import OcrResult, TransformerProtocol
 
 
@@ -14,10 +15,11 @@ class MultiLineTransformer(TransformerProtocol):
         Returns:
             Score between 0-100 (100 = more likely)
         """
+        blocks = ocr_result.layout
         if (
-            (ocr_result.num_lines > 1)
-            and (ocr_result.num_blocks == 1)
-            and (ocr_result.num_pars == 1)
+            len(blocks) == 1
+            and len(blocks[0].paragraphs) == 1
+            and len(blocks[0].paragraphs[0].lines) > 1
         ):
             return 50.0
 
@@ -34,4 +36,4 @@ class MultiLineTransformer(TransformerProtocol):
             Lines of text.
         """
         # keep all line breaks as detected:
-        return [ocr_result.add_linebreaks()]
+        return [layout.to_text(ocr_result.layout)]
@@ -2,6 +2,7 @@
 
 import os
 
+from normcap.detection.ocr import layout
 from normcap.detection.ocr.models import OcrResult, TransformerProtocol
 
 
@@ -16,7 +17,8 @@ class ParagraphTransformer(TransformerProtocol):
         Returns:
             Score between 0-100 (100 = more likely).
         """
-        breaks = max(1, ocr_result.num_blocks + ocr_result.num_pars - 1)
+        blocks = ocr_result.layout
+        breaks = max(1, sum(len(b.paragraphs) for b in blocks))
         return 100 - (100 / breaks)
 
     @staticmethod
@@ -30,4 +32,4 @@ class ParagraphTransformer(TransformerProtocol):
             Transformed text.
         """
         # ignore linebreaks within paragraphs:
-        return [ocr_result.add_linebreaks(block_sep=os.linesep, line_sep=" ")]
+        return [layout.to_text(ocr_result.layout, block_sep=os.linesep, line_sep=" ")]
@@ -0,0 +1,109 @@
+"""Transformer to handle tables, e.g. from spreadsheets or dashboards."""
+
+import bisect
+import os
+import statistics
+
+from normcap.detection.ocr import layout
+from normcap.detection.ocr.models import OcrResult, TransformerProtocol
+
+# Min horizontal gap between two cells, relative to the median word height
+_CELL_GAP = 1.0
+
+# Cells of tables are short. Longer text is more likely multi column prose.
+_MAX_MEDIAN_WORDS_PER_CELL = 3
+
+_Cell = tuple[int, int, str]  # left, right, text
+
+
+def _split_cells(line: layout.Line, min_gap: float) -> list[_Cell]:
+    """Split the (left to right sorted) words of a line at wide gaps."""
+    cells: list[list[dict]] = []
+    last_right = None
+    for word in line.words:
+        if last_right is None or word["left"] - last_right >= min_gap:
+            cells.append([])
+        cells[-1].append(word)
+        last_right = word["left"] + word["width"]
+    return [
+        (
+            cell[0]["left"],
+            max(w["left"] + w["width"] for w in cell),
+            " ".join(w["text"] for w in cell),
+        )
+        for cell in cells
+    ]
+
+
+def _get_table(words: list[dict]) -> list[list[str]]:
+    """Arrange words in a grid of rows and columns.
+
+    Rows are the lines of text, cells within a row are separated by wide gaps.
+    Columns are the gaps shared by all rows in the projection of the cells onto the
+    x-axis. Rows with a single cell (e.g. titles) don't restrict the columns.
+
+    Returns:
+        Rows of cell texts, all of equal length. Empty, if the words contain no
+        box information or do not form a table.
+    """
+    words = [w for w in words if w.get("text", "").strip()]
+    if not words or not layout.has_boxes(words):
+        return []
+
+    unit = max(statistics.median(w["height"] for w in words), 1)
+    rows = [_split_cells(line, _CELL_GAP * unit) for line in layout.group_lines(words)]
+
+    multi_cell_rows = [r for r in rows if len(r) > 1]
+    if len(multi_cell_rows) < 2:  # noqa: PLR2004
+        return []
+    if (
+        statistics.median(len(c[2].split()) for r in multi_cell_rows for c in r)
+        > _MAX_MEDIAN_WORDS_PER_CELL
+    ):
+        return []
+
+    column_gaps = layout.projection_gaps(
+        (c[0], c[1]) for r in multi_cell_rows for c in r
+    )
+    gap_starts = [g[0] for g in column_gaps]
+
+    table = []
+    for row in rows:
+        cells = [""] * (len(column_gaps) + 1)
+        for left, _, text in row:
+            col = bisect.bisect_right(gap_starts, left)
+            cells[col] = f"{cells[col]} {text}".strip()
+        table.append(cells)
+    return table
+
+
+class TableTransformer(TransformerProtocol):
+    @staticmethod
+    def score(ocr_result: OcrResult) -> float:
+        """Calc score based on how well the words fill a grid of aligned cells.
+
+        Args:
+            ocr_result: Recognized text and meta information.
+
+        Returns:
+            Score between 0-100 (100 = more likely).
+        """
+        table = _get_table(ocr_result.words)
+        if not table or len(table[0]) < 2:  # noqa: PLR2004
+            return 0
+
+        filled_cells = sum(bool(cell) for row in table for cell in row)
+        return 100 * filled_cells / (len(table) * len(table[0]))
+
+    @staticmethod
+    def transform(ocr_result: OcrResult) -> list[str]:
+        """Transform word-boxes into tab separated values.
+
+        Args:
+            ocr_result: Recognized text and meta information.
+
+        Returns:
+            Table as text with one row per line and tabs between cells.
+        """
+        table = _get_table(ocr_result.words)
+        return [os.linesep.join("\t".join(row) for row in table)]
@@ -0,0 +1,332 @@
+"""Serialize detection results into machine-readable formats.
+
+JSON(L) contains all results and meta information. hOCR and ALTO only describe the
+recognized words and their layout, as those formats have no notion of codes.
+"""
+
+import json
+import os
+from collections.abc import Iterable
+from typing import NamedTuple
+from xml.etree import ElementTree as ET
+
+from normcap import __version__
+from normcap.detection.models import DetectionDetails, DetectionResult, OutputFormat
+from normcap.detection.ocr import layout
+
+_ALTO_NAMESPACE = "http://www.loc.gov/standards/alto/ns-v4#"
+_ALTO_SCHEMA = "http://www.loc.gov/standards/alto/v4/alto-4-2.xsd"
+_XHTML_NAMESPACE = "http://www.w3.org/1999/xhtml"
+
+_WORD_KEYS = (
+    "text",
+    "conf",
+    "left",
+    "top",
+    "width",
+    "height",
+    "block_num",
+    "par_num",
+    "line_num",
+    "word_num",
+)
+
+
+def _layout_words(details: DetectionDetails) -> list[layout.Block]:
+    words = [w for w in details.words if layout.has_boxes([w])]
+    return layout.reconstruct(words)
+
+
+def to_dict(
+    results: list[DetectionResult],
+    details: DetectionDetails,
+    metadata: dict | None = None,
+) -> dict:
+    """Collect results and meta information in a JSON serializable dict.
+
+    Args:
+        results: Results of the detection.
+        details: Meta information collected during the detection.
+        metadata: Additional information to include, e.g. the selected region.
+
+    Returns:
+        Report of the detection.
+    """
+    return {
+        "version": __version__,
+        **(metadata or {}),
+        "image": {"width": details.image_size[0], "height": details.image_size[1]},
+        "profile": details.profile,
+        "ocr_engine": details.ocr_engine,
+        "results": [
+            {
+                "text": r.text,
+                "text_type": r.text_type.value,
+                "detector": r.detector.value,
+            }
+            for r in results
+        ],
+        "transformer": details.transformer,
+        "transformer_scores": details.transformer_scores,
+        "words": [{k: w[k] for k in _WORD_KEYS if k in w} for w in details.words],
+        "codes": details.codes,
+        "timings": {k: round(v, 6) for k, v in details.timings.items()},
+    }
+
+
+def to_hocr(*details: DetectionDetails) -> str:
+    """Describe words and layout as hOCR document, with a page per detection."""
+    html = ET.Element(
+        "html", {"xmlns": _XHTML_NAMESPACE, "xml:lang": "en", "lang": "en"}
+    )
+    head = ET.SubElement(html, "head")
+    ET.SubElement(head, "title").text = "NormCap"
+    ET.SubElement(
+        head,
+        "meta",
+        {"http-equiv": "Content-Type", "content": "text/html;charset=utf-8"},
+    )
+    ET.SubElement(
+        head, "meta", {"name": "ocr-system", "content": f"normcap {__version__}"}
+    )
+    ET.SubElement(
+        head,
+        "meta",
+        {
+            "name": "ocr-capabilities",
+            "content": "ocr_page ocr_carea ocr_par ocr_line ocrx_word",
+        },
+    )
+    body = ET.SubElement(html, "body")
+    word_idx = line_idx = par_idx = 0
+    for page_idx, page_details in enumerate(details, start=1):
+        width, height = page_details.image_size
+        page = ET.SubElement(
+            body,
+            "div",
+            {
+                "class": "ocr_page",
+                "id": f"page_{page_idx}",
+                "title": f"bbox 0 0 {width} {height}",
+            },
+        )
+        for block_idx, block in enumerate(_layout_words(page_details), start=1):
+            block_words = [
+                w for p in block.paragraphs for li in p.lines for w in li.words
+            ]
+            block_el = ET.SubElement(
+                page,
+                "div",
+                {
+                    "class": "ocr_carea",
+                    "id": f"block_{page_idx}_{block_idx}",
+                    "title": "bbox {} {} {} {}".format(
+                        *layout.bounding_box(block_words)
+                    ),
+                },
+            )
+            for paragraph in block.paragraphs:
+                par_idx += 1
+                par_el = ET.SubElement(
+                    block_el,
+                    "p",
+                    {
+                        "class": "ocr_par",
+                        "id": f"par_{page_idx}_{par_idx}",
+                        "title": "bbox {} {} {} {}".format(
+                            *layout.bounding_box(
+                                w for li in paragraph.lines for w in li.words
+                            )
+                        ),
+                    },
+                )
+                for line in paragraph.lines:
+                    line_idx += 1
+                    line_el = ET.SubElement(
+                        par_el,
+                        "span",
+                        {
+                            "class": "ocr_line",
+                            "id": f"line_{page_idx}_{line_idx}",
+                            "title": "bbox {} {} {} {}".format(
+                                *layout.bounding_box(line.words)
+                            ),
+                        },
+                    )
+                    for word in line.words:
+                        word_idx += 1
+                        word_el = ET.SubElement(
+                            line_el,
+                            "span",
+                            {
+                                "class": "ocrx_word",
+                                "id": f"word_{page_idx}_{word_idx}",
+                                "title": "bbox {} {} {} {}; x_wconf {}".format(
+                                    *layout.bounding_box([word]),
+                                    round(float(word.get("conf", 0))),
+                                ),
+                            },
+                        )
+                        word_el.text = word["text"]
+
+    ET.indent(html)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" '
+        '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+        + ET.tostring(html, encoding="unicode")
+    )
+
+
+def _alto_position(words: Iterable[dict]) -> dict[str, str]:
+    left, top, right, bottom = layout.bounding_box(words)
+    return {
+        "HPOS": str(left),
+        "VPOS": str(top),
+        "WIDTH": str(right - left),
+        "HEIGHT": str(bottom - top),
+    }
+
+
+def to_alto(*details: DetectionDetails) -> str:
+    """Describe words and layout as ALTO (v4) document, with a page per detection."""
+    alto = ET.Element(
+        "alto",
+        {
+            "xmlns": _ALTO_NAMESPACE,
+            "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
+            "xsi:schemaLocation": f"{_ALTO_NAMESPACE} {_ALTO_SCHEMA}",
+        },
+    )
+    description = ET.SubElement(alto, "Description")
+    ET.SubElement(description, "MeasurementUnit").text = "pixel"
+    processing = ET.SubElement(description, "OCRProcessing", {"ID": "OCR_0"})
+    step = ET.SubElement(processing, "ocrProcessingStep")
+    software = ET.SubElement(step, "processingSoftware")
+    ET.SubElement(software, "softwareName").text = "NormCap"
+    ET.SubElement(software, "softwareVersion").text = __version__
+
+    layout_el = ET.SubElement(alto, "Layout")
+    block_idx = word_idx = line_idx = 0
+    for page_idx, page_details in enumerate(details):
+        width, height = page_details.image_size
+        page = ET.SubElement(
+            layout_el,
+            "Page",
+            {
+                "ID": f"page_{page_idx}",
+                "PHYSICAL_IMG_NR": str(page_idx),
+                "WIDTH": str(width),
+                "HEIGHT": str(height),
+            },
+        )
+        print_space = ET.SubElement(
+            page,
+            "PrintSpace",
+            {"HPOS": "0", "VPOS": "0", "WIDTH": str(width), "HEIGHT": str(height)},
+        )
+
+        # ALTO has no paragraphs, so each paragraph becomes a text block
+        paragraphs = [p for b in _layout_words(page_details) for p in b.paragraphs]
+        for paragraph in paragraphs:
+            block_el = ET.SubElement(
+                print_space,
+                "TextBlock",
+                {
+                    "ID": f"block_{block_idx}",
+                    **_alto_position(w for li in paragraph.lines for w in li.words),
+                },
+            )
+            block_idx += 1
+            for line in paragraph.lines:
+                line_el = ET.SubElement(
+                    block_el,
+                    "TextLine",
+                    {"ID": f"line_{line_idx}", **_alto_position(line.words)},
+                )
+                line_idx += 1
+                for idx, word in enumerate(line.words):
+                    if idx > 0:
+                        ET.SubElement(line_el, "SP")
+                    ET.SubElement(
+                        line_el,
+                        "String",
+                        {
+                            "ID": f"string_{word_idx}",
+                            **_alto_position([word]),
+                            "WC": f"{float(word.get('conf', 0)) / 100:.2f}",
+                            "CONTENT": word["text"],
+                        },
+                    )
+                    word_idx += 1
+
+    ET.indent(alto)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(
+        alto, encoding="unicode"
+    )
+
+
+class Region(NamedTuple):
+    """Results of the detection of a region, to be serialized together."""
+
+    results: list[DetectionResult]
+    details: DetectionDetails
+    metadata: dict | None = None
+
+
+def format_regions(output_format: OutputFormat | str, regions: list[Region]) -> str:
+    """Serialize the results of the detections of several regions into one output.
+
+    JSON becomes an array with an object per region, if there is more than one
+    region. JSONL gets a line per region. hOCR and ALTO documents get a page per
+    region.
+
+    Args:
+        output_format: Target format. For TEXT, only the texts of the results are
+            returned, separated by line breaks.
+        regions: Results of the detections, in order of the output.
+
+    Returns:
+        Serialized results.
+    """
+    match OutputFormat(output_format):
+        case OutputFormat.JSON:
+            reports = [to_dict(*region) for region in regions]
+            return json.dumps(
+                reports[0] if len(reports) == 1 else reports,
+                ensure_ascii=False,
+                indent=2,
+            )
+        case OutputFormat.JSONL:
+            return os.linesep.join(
+                json.dumps(to_dict(*region), ensure_ascii=False) for region in regions
+            )
+        case OutputFormat.HOCR:
+            return to_hocr(*(region.details for region in regions))
+        case OutputFormat.ALTO:
+            return to_alto(*(region.details for region in regions))
+        case _:
+            return os.linesep.join(
+                r.text for region in regions for r in region.results
+            )
+
+
+def format_results(
+    output_format: OutputFormat | str,
+    results: list[DetectionResult],
+    details: DetectionDetails,
+    metadata: dict | None = None,
+) -> str:
+    """Serialize the results of a detection into the requested format.
+
+    Args:
+        output_format: Target format. For TEXT, only the texts of the results are
+            returned, separated by line breaks.
+        results: Results of the detection.
+        details: Meta information collected during the detection.
+        metadata: Additional information to include, if the format supports it.
+
+    Returns:
+        Serialized results.
+    """
+    return format_regions(output_format, [Region(results, details, metadata)])
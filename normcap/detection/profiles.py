@@ -0,0 +1,133 @@
+"""Bundle the tunables of the detection pipeline into selectable profiles."""
+
+import enum
+import logging
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+
+from PySide6 import QtGui
+
+from normcap.detection.models import Profile
+from normcap.detection.ocr.models import OEM, PSM
+
+logger = logging.getLogger(__name__)
+
+
+class PsmPolicy(str, enum.Enum):
+    """Strategy to select tesseract's page segmentation mode."""
+
+    AUTO = "AUTO"  # Always use full automatic page segmentation.
+    BY_SHAPE = "BY_SHAPE"  # Treat flat, wide images as single line of text.
+
+
+@dataclass(frozen=True)
+class ProfileConfig:
+    """Settings applied to the detection when a certain profile is selected."""
+
+    model_variant: str  # Postfix of tessdata directory, e.g. "fast" -> tessdata_fast
+    oem: OEM
+    psm_policy: PsmPolicy
+    resize_factor: float
+    padding_size: int
+    code_try_harder: bool  # Search rotated, inverted and downscaled codes
+
+
+PROFILES: dict[Profile, ProfileConfig] = {
+    Profile.FAST: ProfileConfig(
+        model_variant="fast",
+        oem=OEM.LSTM_ONLY,
+        psm_policy=PsmPolicy.BY_SHAPE,
+        resize_factor=1.5,
+        padding_size=40,
+        code_try_harder=False,
+    ),
+    Profile.BALANCED: ProfileConfig(
+        model_variant="",
+        oem=OEM.DEFAULT,
+        psm_policy=PsmPolicy.AUTO,
+        resize_factor=2,
+        padding_size=80,
+        code_try_harder=True,
+    ),
+    Profile.BEST: ProfileConfig(
+        model_variant="best",
+        oem=OEM.DEFAULT,
+        psm_policy=PsmPolicy.BY_SHAPE,
+        resize_factor=3,
+        padding_size=80,
+        code_try_harder=True,
+    ),
+}
+
+# Images flatter than this are considered to contain a single line of text
+_SINGLE_LINE_MAX_HEIGHT = 60
+_SINGLE_LINE_MIN_ASPECT_RATIO = 6
+
+
+def get_config(profile: Profile | str) -> ProfileConfig:
+    """Look up configuration for a profile (or its name)."""
+    return PROFILES[Profile(profile)]
+
+
+def get_faster_profile(profile: Profile | str) -> Profile | None:
+    """Next faster profile, or None if the profile is already the fastest."""
+    order = [Profile.BEST, Profile.BALANCED, Profile.FAST]
+    idx = order.index(Profile(profile))
+    return order[idx + 1] if idx + 1 < len(order) else None
+
+
+def get_psm(config: ProfileConfig, image: QtGui.QImage) -> PSM:
+    """Select page segmentation mode according to the profile's policy.
+
+    Args:
+        config: Configuration of the active profile.
+        image: Image to be recognized, before any resizing or padding.
+
+    Returns:
+        Page segmentation mode to be used by tesseract.
+    """
+    if config.psm_policy == PsmPolicy.AUTO:
+        return PSM.AUTO
+
+    height = max(image.height(), 1)
+    if (
+        image.height() <= _SINGLE_LINE_MAX_HEIGHT
+        and image.width() / height >= _SINGLE_LINE_MIN_ASPECT_RATIO
+    ):
+        logger.debug("Image is flat and wide, treat as single line of text")
+        return PSM.SINGLE_LINE
+
+    return PSM.AUTO
+
+
+def get_tessdata_path(
+    config: ProfileConfig,
+    tessdata_path: PathLike | str | None,
+    languages: str | list[str],
+) -> PathLike | str | None:
+    """Find the tessdata directory of the profile's model variant.
+
+    The model variants are expected side by side with the default tessdata directory,
+    e.g. `tessdata_fast/` and `tessdata_best/` next to `tessdata/`. If the variant or
+    one of the selected languages is not available, the default path is returned.
+    """
+    if not tessdata_path or not config.model_variant:
+        return tessdata_path
+
+    default_path = Path(tessdata_path)
+    variant_path = default_path.parent / f"{default_path.name}_{config.model_variant}"
+
+    langs = languages.split("+") if isinstance(languages, str) else languages
+    if variant_path.is_dir() and all(
+        (variant_path / f"{lang}.traineddata").is_file() for lang in langs
+    ):
+        return variant_path
+
+    logger.debug(
+        "Model variant '%s' not available for %s, fall back to %s",
+        config.model_variant,
+        langs,
+        tessdata_path,
+    )
+    return tessdata_path
@@ -0,0 +1,484 @@
+"""Run OCR jobs from different sources ordered by priority.
+
+Interactive jobs (the user waits for the result of the selected region) are executed
+on a dedicated set of worker threads and are never queued behind background work.
+While interactive jobs are pending or running, background workers pause and running
+preemptible background jobs get cancelled and re-queued.
+
+Background worker threads run with lowered OS priority. On Linux, priority and CPU
+affinity are properties of a thread and inherited by child processes, so tesseract
+processes spawned from those threads are deprioritized as well.
+
+Cancellation is cooperative: jobs receive a `CancellationToken` and are expected to
+check it, or to register a callback which stops the actual work.
+"""
+
+import enum
+import heapq
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Generic, NamedTuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(enum.IntEnum):
+    """Priority of OCR jobs, lower values are processed first."""
+
+    INTERACTIVE = 0  # User is waiting for the result
+    BATCH = 1  # Explicitly requested bulk processing
+    BACKGROUND = 2  # Prewarming and indexing
+    SPECULATIVE = 3  # Results which might not be needed at all
+
+
+class CancelledError(Exception):
+    """Raised when a job was cancelled before it finished."""
+
+
+def _call_safely(callback: Callable[..., None], *args: Any) -> None:  # noqa: ANN401
+    try:
+        callback(*args)
+    except Exception:
+        logger.exception("Callback %s failed", callback)
+
+
+class CancellationToken:
+    """Thread-safe flag to request the cancellation of a job."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Request cancellation and run registered callbacks (only once)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _call_safely(callback)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a callback to be run on cancellation.
+
+        If the token is already cancelled, the callback is run immediately.
+
+        Returns:
+            Function to unregister the callback again.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled:
+            raise CancelledError("Job was cancelled")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until cancelled or timeout, return True if cancelled."""
+        return self._event.wait(timeout)
+
+
+class Job(Generic[T]):
+    """Handle to a job submitted to the scheduler."""
+
+    def __init__(
+        self,
+        fn: Callable[[CancellationToken], T],
+        priority: Priority,
+        preemptible: bool,
+        name: str,
+    ) -> None:
+        self.fn = fn
+        self.priority = priority
+        self.preemptible = preemptible
+        self.name = name
+        self.token = CancellationToken()
+        self.submitted_at = time.monotonic()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+        self._done = threading.Event()
+        self._result: T | None = None
+        self._exception: BaseException | None = None
+        self._cancelled = False
+        self._preempted = False
+        self._callbacks: list[Callable[[Job[T]], None]] = []
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Describe job for logging."""
+        return f"<Job '{self.name}' {self.priority.name}>"
+
+    @property
+    def wait_time(self) -> float | None:
+        """Seconds the job was queued before it started."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """Request cancellation of the job, no matter if queued or running."""
+        self._cancelled = True
+        self.token.cancel()
+
+    def result(self, timeout: float | None = None) -> T:
+        """Wait for and return the job's result.
+
+        Raises:
+            TimeoutError: If the job didn't finish in time.
+            CancelledError: If the job was cancelled.
+            Exception: Any exception raised by the job itself.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self} did not finish within {timeout}s")
+        if self._cancelled:
+            raise CancelledError(f"{self} was cancelled")
+        if self._exception is not None:
+            raise self._exception
+        return self._result  # type: ignore[return-value]
+
+    def add_done_callback(self, callback: Callable[["Job[T]"], None]) -> None:
+        """Call function with the job as argument, as soon as it is done.
+
+        The callback is executed in the worker thread which ran the job, or
+        immediately, if the job is already done.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _preempt(self) -> None:
+        self._preempted = True
+        self.token.cancel()
+
+    def _reset_for_retry(self) -> None:
+        self._preempted = False
+        self.token = CancellationToken()
+        self.started_at = None
+
+    def _finish(
+        self,
+        result: T | None = None,
+        exception: BaseException | None = None,
+        cancelled: bool = False,
+    ) -> None:
+        self._result = result
+        self._exception = exception
+        self._cancelled = self._cancelled or cancelled
+        self.finished_at = time.monotonic()
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _call_safely(callback, self)
+
+
+class SchedulerMetrics(NamedTuple):
+    queue_depth: dict[Priority, int]  # Jobs waiting to be started
+    running: int  # Jobs currently executed
+    completed: int  # Jobs finished since start, including failed and cancelled
+    mean_wait: dict[Priority, float]  # Average seconds jobs waited before start
+    max_wait: dict[Priority, float]  # Longest seconds a job waited before start
+
+
+class _QueueEntry(NamedTuple):
+    priority: Priority
+    sequence: int
+    job: Job
+
+
+def _lower_thread_priority(niceness: int) -> None:
+    """Deprioritize the calling thread and the processes it spawns (Linux only)."""
+    if sys.platform != "linux":
+        return
+
+    try:
+        thread_id = threading.get_native_id()
+        current = os.getpriority(os.PRIO_PROCESS, thread_id)
+        os.setpriority(os.PRIO_PROCESS, thread_id, current + niceness)
+
+        # Keep the first CPU free for interactive work
+        cpus = sorted(os.sched_getaffinity(0))
+        if len(cpus) > 2:  # noqa: PLR2004
+            os.sched_setaffinity(0, cpus[1:])
+    except OSError as exc:
+        logger.debug("Could not lower priority of background worker: %s", exc)
+
+
+class Scheduler:
+    """Priority queue for OCR jobs executed by worker threads."""
+
+    def __init__(
+        self,
+        interactive_workers: int = 2,
+        background_workers: int = 1,
+        background_niceness: int = 10,
+    ) -> None:
+        self.interactive_workers = interactive_workers
+        self.background_workers = background_workers
+        self.background_niceness = background_niceness
+
+        self._condition = threading.Condition()
+        self._queue: list[_QueueEntry] = []
+        self._sequence = itertools.count()
+        self._running: set[Job] = set()
+        self._threads: list[threading.Thread] = []
+        self._interactive_active = 0  # Queued or running interactive jobs
+        self._is_shutdown = False
+
+        self._completed = 0
+        self._wait_sum: dict[Priority, float] = dict.fromkeys(Priority, 0.0)
+        self._wait_count: dict[Priority, int] = dict.fromkeys(Priority, 0)
+        self._wait_max: dict[Priority, float] = dict.fromkeys(Priority, 0.0)
+
+    def submit(
+        self,
+        fn: Callable[[CancellationToken], T],
+        priority: Priority = Priority.INTERACTIVE,
+        preemptible: bool = True,
+        name: str = "",
+    ) -> Job[T]:
+        """Queue a function for execution.
+
+        Args:
+            fn: Work to be done. Receives the job's cancellation token.
+            priority: Jobs with a lower value are started first.
+            preemptible: If True, a running (non interactive) job gets cancelled and
+                re-queued when interactive work arrives.
+            name: Label used for logging.
+
+        Returns:
+            Handle to retrieve the result or cancel the job.
+        """
+        job: Job[T] = Job(
+            fn=fn,
+            priority=priority,
+            preemptible=preemptible,
+            name=name or getattr(fn, "__name__", repr(fn)),
+        )
+        with self._condition:
+            if self._is_shutdown:
+                raise RuntimeError("Scheduler is already shut down")
+            self._start_workers()
+            if priority == Priority.INTERACTIVE:
+                self._interactive_active += 1
+                self._preempt_background_jobs()
+            self._push(job)
+            self._condition.notify_all()
+
+        logger.debug("Queued %s", job)
+        return job
+
+    def metrics(self) -> SchedulerMetrics:
+        """Provide current queue depth and statistics about waiting times."""
+        with self._condition:
+            queue_depth = dict.fromkeys(Priority, 0)
+            for entry in self._queue:
+                queue_depth[entry.priority] += 1
+            return SchedulerMetrics(
+                queue_depth=queue_depth,
+                running=len(self._running),
+                completed=self._completed,
+                mean_wait={
+                    p: self._wait_sum[p] / self._wait_count[p]
+                    if self._wait_count[p]
+                    else 0.0
+                    for p in Priority
+                },
+                max_wait=dict(self._wait_max),
+            )
+
+    def shutdown(self, cancel_running: bool = True) -> None:
+        """Stop the workers. Queued jobs are cancelled."""
+        with self._condition:
+            self._is_shutdown = True
+            pending = [entry.job for entry in self._queue]
+            self._queue.clear()
+            running = list(self._running)
+            self._condition.notify_all()
+
+        for job in pending:
+            job.cancel()
+            job._finish(cancelled=True)
+        if cancel_running:
+            for job in running:
+                job.cancel()
+
+    def _push(self, job: Job) -> None:
+        heapq.heappush(
+            self._queue,
+            _QueueEntry(priority=job.priority, sequence=next(self._sequence), job=job),
+        )
+
+    def _start_workers(self) -> None:
+        if self._threads:
+            return
+        for idx in range(self.interactive_workers):
+            self._start_thread(name=f"normcap-ocr-interactive-{idx}", interactive=True)
+        for idx in range(self.background_workers):
+            self._start_thread(name=f"normcap-ocr-background-{idx}", interactive=False)
+
+    def _start_thread(self, name: str, interactive: bool) -> None:
+        thread = threading.Thread(
+            target=self._work, args=(interactive,), name=name, daemon=True
+        )
+        thread.start()
+        self._threads.append(thread)
+
+    def _preempt_background_jobs(self) -> None:
+        for job in self._running:
+            if job.priority != Priority.INTERACTIVE and job.preemptible:
+                logger.debug("Preempt %s in favor of interactive job", job)
+                job._preempt()
+
+    def _can_take(self, interactive: bool) -> bool:
+        if not self._queue:
+            return False
+        is_interactive_job = self._queue[0].priority == Priority.INTERACTIVE
+        if interactive:
+            return is_interactive_job
+        return not is_interactive_job and self._interactive_active == 0
+
+    def _next_job(self, interactive: bool) -> Job | None:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._is_shutdown or self._can_take(interactive)
+            )
+            if self._is_shutdown:
+                return None
+            job = heapq.heappop(self._queue).job
+            job.started_at = time.monotonic()
+            self._running.add(job)
+            self._record_wait(job)
+            return job
+
+    def _record_wait(self, job: Job) -> None:
+        wait = job.wait_time or 0.0
+        self._wait_sum[job.priority] += wait
+        self._wait_count[job.priority] += 1
+        self._wait_max[job.priority] = max(self._wait_max[job.priority], wait)
+        logger.debug("Start %s after waiting %.3fs", job, wait)
+
+    def _work(self, interactive: bool) -> None:
+        if not interactive:
+            _lower_thread_priority(self.background_niceness)
+
+        while job := self._next_job(interactive=interactive):
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        result: Any = None
+        exception: BaseException | None = None
+        cancelled = job.token.is_cancelled
+        if not cancelled:
+            try:
+                result = job.fn(job.token)
+            except CancelledError:
+                cancelled = True
+            except Exception as exc:
+                exception = exc
+
+        with self._condition:
+            self._running.discard(job)
+            if cancelled and job._preempted and not job.cancelled():
+                job._reset_for_retry()
+                self._push(job)
+                self._condition.notify_all()
+                logger.debug("Re-queued preempted %s", job)
+                return
+            self._completed += 1
+            if job.priority == Priority.INTERACTIVE:
+                self._interactive_active -= 1
+            self._condition.notify_all()
+
+        job._finish(result=result, exception=exception, cancelled=cancelled)
+        logger.debug(
+            "Finished %s in %.3fs%s",
+            job,
+            (job.finished_at or 0) - (job.started_at or 0),
+            " (cancelled)" if cancelled else "",
+        )
+
+
+def gather(jobs: list[Job[T]], name: str = "") -> Job[list[T]]:
+    """Combine jobs into a single job, which is done once all of them are done.
+
+    The combined job is not queued itself. Its result are the results of the jobs in
+    the given order. If any of the jobs fails or gets cancelled, so does the combined
+    job. Cancelling the combined job cancels all of the jobs.
+
+    Args:
+        jobs: Already submitted jobs.
+        name: Label used for logging.
+
+    Returns:
+        Handle to retrieve the results or cancel the jobs.
+    """
+    combined: Job[list[T]] = Job(
+        fn=lambda _: [job.result() for job in jobs],
+        priority=min((job.priority for job in jobs), default=Priority.INTERACTIVE),
+        preemptible=False,
+        name=name or f"gather-{len(jobs)}-jobs",
+    )
+
+    def _cancel_jobs() -> None:
+        for job in jobs:
+            job.cancel()
+
+    lock = threading.Lock()
+    remaining = len(jobs)
+
+    def _on_job_done(_: Job[T]) -> None:
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining:
+                return
+        combined.started_at = min(
+            (job.started_at for job in jobs if job.started_at is not None),
+            default=None,
+        )
+        if any(job.cancelled() for job in jobs):
+            combined._finish(cancelled=True)
+            return
+        try:
+            combined._finish(result=combined.fn(combined.token))
+        except Exception as exc:
+            combined._finish(exception=exc)
+
+    combined.token.on_cancel(_cancel_jobs)
+    if not jobs:
+        combined._finish(result=[])
+    for job in jobs:
+        job.add_done_callback(_on_job_done)
+    return combined
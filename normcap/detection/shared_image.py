@@ -0,0 +1,163 @@
+"""Share a preprocessed image with worker processes without copying it.
+
+The grayscale buffer of an image is placed once into shared memory. Worker processes
+only receive a small, picklable handle, which describes a region of that buffer by
+offset, stride and shape. Attaching to the handle creates a QImage directly on the
+shared buffer, so N workers can read N tiles of the same capture with zero copies.
+
+Handles are meant for child processes of the owner, e.g. of a process pool. Those
+share the owner's resource tracker, which unlinks the memory if the owner crashes.
+
+Usage:
+    with SharedImage(image) as shared:
+        handles = shared.tiles(rows=2, cols=2)
+        results = pool.map(worker, handles)
+
+    def worker(handle):
+        with attach(handle) as tile:
+            ...  # tile is a QImage, valid only inside the context
+"""
+
+import contextlib
+import logging
+from collections.abc import Iterator
+from multiprocessing import shared_memory
+from typing import NamedTuple, cast
+
+from PySide6 import QtGui
+
+logger = logging.getLogger(__name__)
+
+# Qt requires the lines of (most) image formats to be aligned to 32 bit
+_STRIDE_ALIGNMENT = 4
+
+
+class ImageHandle(NamedTuple):
+    """Location of a grayscale image (or a region of it) in shared memory."""
+
+    name: str  # Name of the shared memory block
+    offset: int  # Position of the first pixel in bytes
+    width: int
+    height: int
+    stride: int  # Bytes per line of the underlying buffer
+
+    @property
+    def size(self) -> int:
+        """Bytes between the first and after the last pixel of the region."""
+        return self.stride * (self.height - 1) + self.width if self.height else 0
+
+    def crop(self, left: int, top: int, width: int, height: int) -> "ImageHandle":
+        """Handle for a region of this image, sharing the same buffer."""
+        if (
+            left < 0
+            or top < 0
+            or width <= 0
+            or height <= 0
+            or left + width > self.width
+            or top + height > self.height
+        ):
+            raise ValueError(
+                f"Region {(left, top, width, height)} exceeds image of size "
+                f"{(self.width, self.height)}"
+            )
+        return self._replace(
+            offset=self.offset + top * self.stride + left,
+            width=width,
+            height=height,
+        )
+
+
+class SharedImage:
+    """Owner of an image's grayscale buffer in shared memory.
+
+    The memory is released when the context is left, or on `close()`. Workers must
+    not access their handles anymore afterwards.
+    """
+
+    def __init__(self, image: QtGui.QImage) -> None:
+        gray = image.convertToFormat(QtGui.QImage.Format.Format_Grayscale8)
+        width, height = gray.width(), gray.height()
+        stride = -(-width // _STRIDE_ALIGNMENT) * _STRIDE_ALIGNMENT
+
+        self._shm: shared_memory.SharedMemory | None = shared_memory.SharedMemory(
+            create=True, size=max(stride * height, 1)
+        )
+        buffer = cast(memoryview, self._shm.buf)
+        bits = gray.constBits()
+        bytes_per_line = gray.bytesPerLine()
+        if bytes_per_line == stride:
+            buffer[: stride * height] = bits[: stride * height]
+        else:
+            for row in range(height):
+                src = row * bytes_per_line
+                buffer[row * stride : row * stride + width] = bits[src : src + width]
+
+        self.handle = ImageHandle(
+            name=self._shm.name, offset=0, width=width, height=height, stride=stride
+        )
+        logger.debug("Placed image of size %s in shared memory", (width, height))
+
+    # ONHOLD: Annotate as Self with Python 3.11
+    def __enter__(self):  # noqa: ANN204
+        """Provide the shared image as context."""
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Release the shared memory when leaving the context."""
+        self.close()
+
+    def tiles(self, rows: int, cols: int, overlap: int = 0) -> list[ImageHandle]:
+        """Split the image into a grid of (overlapping) tiles.
+
+        Args:
+            rows: Number of tiles in vertical direction.
+            cols: Number of tiles in horizontal direction.
+            overlap: Pixels by which neighboring tiles overlap, e.g. to not cut
+                through text at the borders.
+
+        Returns:
+            Handles of the tiles, row by row.
+        """
+        width, height = self.handle.width, self.handle.height
+        handles = []
+        for row in range(rows):
+            top = max(0, row * height // rows - overlap)
+            bottom = min(height, (row + 1) * height // rows + overlap)
+            for col in range(cols):
+                left = max(0, col * width // cols - overlap)
+                right = min(width, (col + 1) * width // cols + overlap)
+                handles.append(self.handle.crop(left, top, right - left, bottom - top))
+        return handles
+
+    def close(self) -> None:
+        """Release the shared memory."""
+        if self._shm is None:
+            return
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+@contextlib.contextmanager
+def attach(handle: ImageHandle) -> Iterator[QtGui.QImage]:
+    """Access the image region described by the handle, without copying it.
+
+    The yielded image is backed by the shared memory and must neither be used after
+    leaving the context nor be modified. Use `QImage.copy()` to keep it.
+
+    Yields:
+        Grayscale image of the region.
+    """
+    shm = shared_memory.SharedMemory(name=handle.name)
+    view = cast(memoryview, shm.buf)[handle.offset : handle.offset + handle.size]
+    try:
+        yield QtGui.QImage(
+            view,
+            handle.width,
+            handle.height,
+            handle.stride,
+            QtGui.QImage.Format.Format_Grayscale8,
+        )
+    finally:
+        view.release()
+        shm.close()
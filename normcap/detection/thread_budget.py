@@ -0,0 +1,111 @@
+"""Distribute the available CPU threads among concurrent OCR work.
+
+Tesseract parallelizes internally using OpenMP. Running several tesseract processes
+at once, each spawning one thread per core, heavily oversubscribes the CPU. Therefore,
+every OCR job asks this module how many worker processes it should run and how many
+OpenMP threads each of those processes is allowed to use.
+"""
+
+import contextlib
+import logging
+import os
+import threading
+from collections.abc import Iterator
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Tesseract barely gains speed from more threads than this
+MAX_THREADS_PER_PROCESS = 4
+
+# Below this size (in pixels) the OpenMP overhead outweighs the gain of threading
+SMALL_IMAGE_PIXELS = 500_000
+
+_lock = threading.Lock()
+_active_jobs = 0
+
+
+class ThreadBudget(NamedTuple):
+    workers: int  # Number of parallel tesseract processes
+    omp_thread_limit: int  # Value of OMP_THREAD_LIMIT for each of those processes
+
+
+def available_cpus() -> int:
+    """Number of CPUs the current process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan(
+    job_size: int = 1,
+    pixels: int = 0,
+    concurrent_jobs: int = 1,
+    max_threads: int = 0,
+) -> ThreadBudget:
+    """Decide how to split the CPU threads for a single OCR job.
+
+    Args:
+        job_size: Number of independent tesseract runs (e.g. tiles or images) the
+            job consists of.
+        pixels: Size of the (largest) image of the job in pixels, 0 if unknown.
+        concurrent_jobs: Number of OCR jobs running at the same time, including
+            this one. The CPUs are shared equally among them.
+        max_threads: Upper limit of threads to use in total, 0 for no limit.
+
+    Returns:
+        Number of worker processes and OpenMP threads per worker.
+    """
+    cpus = available_cpus()
+    if max_threads > 0:
+        cpus = min(cpus, max_threads)
+
+    share = max(1, cpus // max(1, concurrent_jobs))
+    workers = max(1, min(job_size, share))
+
+    useful_threads = 1 if 0 < pixels < SMALL_IMAGE_PIXELS else MAX_THREADS_PER_PROCESS
+    omp_thread_limit = max(1, min(share // workers, useful_threads))
+
+    budget = ThreadBudget(workers=workers, omp_thread_limit=omp_thread_limit)
+    logger.debug(
+        "Thread budget for job of size %s (%spx) with %s concurrent job(s) on %s "
+        "CPU(s): %s",
+        job_size,
+        pixels,
+        concurrent_jobs,
+        cpus,
+        budget,
+    )
+    return budget
+
+
+@contextlib.contextmanager
+def reserve(
+    job_size: int = 1, pixels: int = 0, max_threads: int = 0
+) -> Iterator[ThreadBudget]:
+    """Register a running OCR job and provide its share of the CPU threads.
+
+    Jobs reserving while others are still running get a smaller share.
+
+    Args:
+        job_size: Number of independent tesseract runs the job consists of.
+        pixels: Size of the (largest) image of the job in pixels, 0 if unknown.
+        max_threads: Upper limit of threads to use in total, 0 for no limit.
+
+    Yields:
+        Number of worker processes and OpenMP threads per worker.
+    """
+    global _active_jobs  # noqa: PLW0603
+    with _lock:
+        _active_jobs += 1
+        concurrent_jobs = _active_jobs
+    try:
+        yield plan(
+            job_size=job_size,
+            pixels=pixels,
+            concurrent_jobs=concurrent_jobs,
+            max_threads=max_threads,
+        )
+    finally:
+        with _lock:
+            _active_jobs -= 1
@@ -1,17 +1,38 @@
 """Start main application logic."""
 
+import dataclasses
+import functools
 import json
 import logging
 import os
 import sys
 import time
-from typing import Any, TypeAlias
+from collections.abc import Callable
+from typing import Any, NamedTuple, TypeAlias, cast
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from normcap import app_id, clipboard, notification, screenshot
-from normcap.detection import detector, ocr
-from normcap.detection.models import DetectionMode, DetectionResult
+from normcap.detection import codes, detector, ocr, output, profiles
+from normcap.detection.codes.models import LocatedCode
+from normcap.detection.models import (
+    DetectionDetails,
+    DetectionMode,
+    DetectionResult,
+    OutputFormat,
+    Profile,
+)
+from normcap.detection.ocr.index import WordIndex
+from normcap.detection.ocr.memo import BlockMemo
+from normcap.detection.ocr.models import OcrEngine
+from normcap.detection.scheduler import (
+    CancellationToken,
+    CancelledError,
+    Job,
+    Priority,
+    Scheduler,
+    gather,
+)
 from normcap.gui import (
     constants,
     introduction,
@@ -22,9 +43,10 @@ from normcap.gui import (
 from normcap.gui.dbus_application_service import DBusApplicationService
 from normcap.gui.language_manager import LanguageManager
 from normcap.gui.settings import Settings
-from normcap.gui.socket_server import SocketServer
+from normcap.gui.socket_server import RecognizeRequest, SocketServer
 from normcap.gui.tray import SystemTray
 from normcap.gui.update_check import UpdateChecker
+from normcap.gui.watcher import DEFAULT_INTERVAL, DEFAULT_MAX_CPU, RegionWatcher
 from normcap.gui.window import Window
 from normcap.notification.models import ACTION_NAME_NOTIFICATION_CLICKED
 from normcap.system import info
@@ -35,6 +57,25 @@ logger = logging.getLogger(__name__)
 Days: TypeAlias = int
 Seconds: TypeAlias = float
 
+# Options of requested image detections, which override the settings
+_REQUEST_OPTIONS: dict[str, Callable[[Any], Any]] = {
+    "language": lambda value: [value] if isinstance(value, str) else list(value),
+    "parse_text": bool,
+    "profile": Profile,
+    "ocr_engine": OcrEngine,
+}
+_REQUEST_DETECT_MODES = {
+    "detect_codes": DetectionMode.CODES,
+    "detect_text": DetectionMode.TESSERACT,
+}
+
+
+class _RegionDetection(NamedTuple):
+    rect: Rect
+    screen_idx: int
+    job: Job[list[DetectionResult]]
+    details: DetectionDetails
+
 
 class Communicate(QtCore.QObject):
     """Application's communication bus."""
@@ -44,6 +85,8 @@ class Communicate(QtCore.QObject):
     on_region_selected = QtCore.Signal(Rect, int)
     on_action_finished = QtCore.Signal()
     on_windows_closed = QtCore.Signal()
+    on_detection_finished = QtCore.Signal(object)
+    on_screen_indexed = QtCore.Signal(int, object)
 
 
 class NormcapApp(QtWidgets.QApplication):
@@ -52,13 +95,14 @@ class NormcapApp(QtWidgets.QApplication):
     # Used for singleton:
 
     _EXIT_DELAY_SECONDS: float = 5  # To keep tray icon visible for a while
+    _MIN_DETECTION_AREA: int = 100  # Smaller selections are likely accidental clicks
     _UPDATE_CHECK_INTERVAL_DAYS: int = 7
 
     # Only for testing purposes: forcefully enables language manager in settings menu
     # (Normally language manager is only available in pre-build version)
     _DEBUG_LANGUAGE_MANAGER = False
 
-    def __init__(self, args: dict[str, Any]) -> None:
+    def __init__(self, args: dict[str, Any]) -> None:  # noqa: PLR0915
         super().__init__()
         self.setQuitOnLastWindowClosed(False)
 
@@ -68,9 +112,12 @@ class NormcapApp(QtWidgets.QApplication):
 
         self.com = Communicate(parent=self)
 
-        # Create DBus Service to listen for notification actions and activations
+        # Create DBus Service to listen for notification actions and activations.
+        # Detections of a given region are one-shot and don't need it.
         self.dbus_service = (
-            self._get_dbus_service() if sys.platform == "linux" else None
+            self._get_dbus_service()
+            if sys.platform == "linux" and not args.get("region")
+            else None
         )
 
         # Connect to signals
@@ -78,6 +125,8 @@ class NormcapApp(QtWidgets.QApplication):
             self.dbus_service.action_activated.connect(self._handle_action_activate)
         self.com.on_exit_application.connect(self._exit_application)
         self.com.on_region_selected.connect(self._start_processing)
+        self.com.on_detection_finished.connect(self._process_detection_results)
+        self.com.on_screen_indexed.connect(self._apply_word_index)
 
         # If NormCap got activated via DBus, only process action then quit.
         if args.get("dbus_activation", False):
@@ -88,15 +137,21 @@ class NormcapApp(QtWidgets.QApplication):
             QtCore.QTimer.singleShot(1000, lambda: self.com.on_exit_application.emit(0))
             return
 
-        # Ensure that only a single instance of NormCap is running.
-        self._socket_server = SocketServer()
-        if not self._socket_server.is_first_instance:
-            self.com.on_exit_application.emit(0)
-            return
-
-        self._socket_server.com.on_capture_message.connect(
-            lambda: self._show_windows(delay_screenshot=True)
-        )
+        # Ensure that only a single instance of NormCap is running. Detections of a
+        # given region don't show any UI, so they can run alongside.
+        region = args.get("region")
+        if not region:
+            self._socket_server = SocketServer()
+            if not self._socket_server.is_first_instance:
+                self.com.on_exit_application.emit(0)
+                return
+
+            self._socket_server.com.on_capture_message.connect(
+                lambda: self._show_windows(delay_screenshot=True)
+            )
+            self._socket_server.com.on_recognize_message.connect(
+                self._recognize_socket_request
+            )
 
         # Init settings
         self.settings = Settings(init_settings=args)
@@ -104,9 +159,25 @@ class NormcapApp(QtWidgets.QApplication):
             self.settings.reset()
 
         # Init state
+        self.scheduler = Scheduler()
+        if self.dbus_service:
+            self.dbus_service.recognize_image = self.recognize_image
+        self._detection_job: Job[list[list[DetectionResult]]] | None = None
+        self._detection_regions: dict[Job, list[_RegionDetection]] = {}
         self.screens: list[Screen] = info.screens()
+        self._block_memos: dict[int, BlockMemo] = {}
+        self._code_scans: dict[int, Job[list[LocatedCode]]] = {}
+        self._word_indexes: dict[int, Job[WordIndex]] = {}
+        self._speculative_detection: _RegionDetection | None = None
+        self._selected_regions: list[tuple[Rect, int]] = []
         self.windows: dict[int, Window] = {}
+        self.tray: SystemTray | None = None
         self.cli_mode = args.get("cli_mode", False)
+        self.output_format = OutputFormat(args.get("output_format") or "text")
+        self.watch = args.get("watch", False)
+        self.watch_interval = args.get("watch_interval") or DEFAULT_INTERVAL
+        self.watch_max_cpu = args.get("watch_max_cpu") or DEFAULT_MAX_CPU
+        self.watcher: RegionWatcher | None = None
         self.installed_languages = ["eng"]
         self.screenshot_handler_name = args.get("screenshot_handler")
         self.clipboard_handler_name = args.get("clipboard_handler")
@@ -115,6 +186,11 @@ class NormcapApp(QtWidgets.QApplication):
         # Check if have screenshot permission and try to request if needed
         self._verify_screenshot_permission()
 
+        # Skip all UI, if the region to detect is already known
+        if region:
+            self._detect_region(region=region, screen_idx=args.get("screen") or 0)
+            return
+
         # Show intro (and delay screenshot to not capute the intro)
         if (
             args.get("show_introduction") is None
@@ -136,6 +212,7 @@ class NormcapApp(QtWidgets.QApplication):
         self.tray.com.on_tray_clicked.connect(
             lambda: self._show_windows(delay_screenshot=True)
         )
+        self.tray.com.on_cancel_clicked.connect(self.cancel_detection)
         self.tray.com.on_menu_exit_clicked.connect(
             lambda: self.com.on_exit_application.emit(0)
         )
@@ -206,6 +283,30 @@ class NormcapApp(QtWidgets.QApplication):
             else:
                 self.show_permissions_info()
 
+    def _detect_region(
+        self, region: tuple[int, int, int, int], screen_idx: int
+    ) -> None:
+        """Detect the content of a region given as (left, top, width, height).
+
+        The coordinates refer to the screenshot of the screen, i.e. physical pixels.
+        """
+        screenshots = self._take_screenshots(delay=False)
+        if not 0 <= screen_idx < len(screenshots):
+            logger.error(
+                "Screen %s does not exist, only %s found", screen_idx, len(screenshots)
+            )
+            self._exit_application(exit_code=2)
+            return
+        self.screens[screen_idx].screenshot = screenshots[screen_idx]
+
+        left, top, width, height = region
+        self._run_detection(
+            rect=Rect(
+                left=left, top=top, right=left + width - 1, bottom=top + height - 1
+            ),
+            screen_idx=screen_idx,
+        )
+
     def _create_window(self, index: int) -> None:
         """Open a child window for the specified screen."""
         window = Window(
@@ -215,13 +316,14 @@ class NormcapApp(QtWidgets.QApplication):
             installed_languages=self.installed_languages,
             debug_language_manager=self._DEBUG_LANGUAGE_MANAGER,
         )
-        window.com.on_esc_key_pressed.connect(
-            lambda: self._minimize_to_tray_or_exit(delay=0)
-        )
+        window.com.on_esc_key_pressed.connect(self.cancel_detection)
         window.com.on_esc_key_pressed.connect(
             lambda: self._minimize_to_tray_or_exit(delay=0)
         )
         window.com.on_region_selected.connect(self.com.on_region_selected)
+        window.com.on_region_added.connect(self._add_region)
+        window.com.on_enter_key_pressed.connect(self._finish_region_selection)
+        window.com.on_selection_settled.connect(self._start_speculative_detection)
 
         if window.menu_button is not None:
             window.menu_button.com.on_open_url.connect(self._open_url_and_hide)
@@ -247,9 +349,159 @@ class NormcapApp(QtWidgets.QApplication):
         for idx, image in enumerate(screenshots):
             self.screens[idx].screenshot = image
 
+        # Recognized blocks are only valid for the screenshot they were taken from
+        self._block_memos = {idx: BlockMemo() for idx in range(len(screenshots))}
+        self._selected_regions = []
+        self._cancel_speculative_detection()
+        self._start_code_scans()
+        self._start_text_indexing()
+
         for index in range(len(info.screens())):
             self._create_window(index)
 
+    def _start_code_scans(self) -> None:
+        """Locate codes on the screenshots while the user still selects a region.
+
+        Codes are usually visible right away, so their results can be returned
+        without further detection, if the selected region contains them.
+        """
+        for job in self._code_scans.values():
+            job.cancel()
+        self._code_scans = {}
+
+        if not self.settings.value("detect-codes", type=bool):
+            return
+
+        formats = self.settings.value("code-formats")
+        try_harder = profiles.get_config(self.settings.value("profile")).code_try_harder
+        max_threads = cast(int, self.settings.value("ocr-threads", type=int))
+        for idx, screen in enumerate(self.screens):
+
+            def _scan(
+                _: CancellationToken, image: QtGui.QImage = screen.screenshot
+            ) -> list[LocatedCode]:
+                return codes.detector.locate_codes(
+                    image,
+                    try_harder=try_harder,
+                    formats=formats,
+                    tiled=True,
+                    max_threads=max_threads,
+                )
+
+            self._code_scans[idx] = self.scheduler.submit(
+                _scan,
+                priority=Priority.SPECULATIVE,
+                preemptible=False,
+                name=f"scan-codes-screen-{idx}",
+            )
+
+    def _get_scanned_codes(
+        self, rect: Rect, screen_idx: int
+    ) -> list[LocatedCode] | None:
+        """Codes inside the region, if the scan of the screenshot has finished."""
+        job = self._code_scans.get(screen_idx)
+        if job is None or not job.done():
+            return None
+        try:
+            located_codes = job.result()
+        except Exception as exc:
+            logger.debug("Scan for codes failed: %s", exc)
+            return None
+        return codes.detector.codes_in_region(
+            located_codes, QtCore.QRect(*rect.geometry)
+        )
+
+    def _start_text_indexing(self) -> None:
+        """Recognize the text on the screenshots while the user still selects a region.
+
+        The words get indexed by their position, so the text inside the selected
+        region can be compiled without running the OCR again.
+        """
+        for job in self._word_indexes.values():
+            job.cancel()
+        self._word_indexes = {}
+
+        if not (
+            self.settings.value("ocr-background", type=bool)
+            and self.settings.value("detect-text", type=bool)
+        ):
+            return
+
+        detect_kwargs = {
+            **self._get_detect_kwargs(),
+            "detect_mode": DetectionMode.TESSERACT,
+            "parse_text": False,
+            "timeout": None,
+            "retry_on_timeout": False,
+        }
+        for idx, screen in enumerate(self.screens):
+
+            def _index(
+                token: CancellationToken, image: QtGui.QImage = screen.screenshot
+            ) -> WordIndex:
+                details = DetectionDetails()
+                detector.detect(
+                    **detect_kwargs, image=image, cancel_token=token, details=details
+                )
+                token.raise_if_cancelled()
+                return WordIndex(details.words)
+
+            self._word_indexes[idx] = self.scheduler.submit(
+                _index,
+                priority=Priority.BACKGROUND,
+                preemptible=True,
+                name=f"index-text-screen-{idx}",
+            )
+            self._word_indexes[idx].add_done_callback(
+                functools.partial(self.com.on_screen_indexed.emit, idx)
+            )
+
+    @QtCore.Slot(int, object)
+    def _apply_word_index(self, screen_idx: int, job: Job[WordIndex]) -> None:
+        """Let the window highlight the words recognized on its screenshot."""
+        window = self.windows.get(screen_idx)
+        if (
+            window is None
+            or job is not self._word_indexes.get(screen_idx)
+            or job.cancelled()
+        ):
+            return
+        try:
+            window.set_word_index(job.result())
+        except Exception as exc:
+            logger.debug("Background recognition failed: %s", exc)
+
+    def _get_indexed_words(self, rect: Rect, screen_idx: int) -> list[dict] | None:
+        """Words inside the region, if they were recognized in advance.
+
+        The words are taken from the background recognition of the whole screenshot,
+        or from a finished speculative detection of a region containing this one.
+        """
+        job = self._word_indexes.get(screen_idx)
+        if job is not None and job.done():
+            try:
+                return job.result().query(*rect.geometry)
+            except Exception as exc:
+                logger.debug("Background recognition failed: %s", exc)
+
+        speculative = self._speculative_detection
+        if (
+            not speculative
+            or speculative.screen_idx != screen_idx
+            or not speculative.job.done()
+            or speculative.job.cancelled()
+            or speculative.details.codes
+            or not speculative.details.words
+            or not speculative.rect.contains(rect)
+        ):
+            return None
+        return WordIndex(speculative.details.words).query(
+            rect.left - speculative.rect.left,
+            rect.top - speculative.rect.top,
+            rect.width,
+            rect.height,
+        )
+
     @QtCore.Slot()
     def _close_windows(self) -> None:
         """Hide all windows of normcap."""
@@ -309,24 +561,200 @@ class NormcapApp(QtWidgets.QApplication):
     def _start_processing(self, rect: Rect, screen_idx: int) -> None:
         self._close_windows()
 
-        QtCore.QTimer.singleShot(
-            20, lambda: self._run_detection(rect=rect, screen_idx=screen_idx)
+        process = self._start_watching if self.watch else self._run_detection
+        QtCore.QTimer.singleShot(20, lambda: process(rect=rect, screen_idx=screen_idx))
+
+    @QtCore.Slot()
+    def _start_watching(self, rect: Rect, screen_idx: int) -> None:
+        """Recognize the selected regions periodically and output changed text."""
+        self._stop_watching()
+        for index_job in self._word_indexes.values():
+            index_job.cancel()
+        self._cancel_speculative_detection()
+
+        regions = [*self._selected_regions, (rect, screen_idx)]
+        self._selected_regions = []
+        self.watcher = RegionWatcher(
+            regions=regions,
+            capture=functools.partial(self._take_screenshots, delay=False),
+            scheduler=self.scheduler,
+            detect_kwargs=self._get_detect_kwargs(),
+            interval=self.watch_interval,
+            max_cpu=self.watch_max_cpu,
+            parent=self,
         )
+        self.watcher.com.on_text_changed.connect(self._output_watched_text)
+        self._set_processing(True)
+        self.watcher.start(screenshots=[s.screenshot for s in self.screens])
+
+    def _stop_watching(self) -> None:
+        if self.watcher:
+            logger.info("Stop watching")
+            self.watcher.stop()
+            self.watcher = None
+            self._set_processing(False)
+
+    @QtCore.Slot(str)
+    def _output_watched_text(self, text: str) -> None:
+        """Print or copy the changed text of the watched regions."""
+        if self.cli_mode:
+            print(text, file=sys.stdout, flush=True)  # noqa: T201
+        else:
+            self._copy_to_clipboard(text=text)
+
+    @QtCore.Slot(Rect, int)
+    def _add_region(self, rect: Rect, screen_idx: int) -> None:
+        """Remember a region to be detected together with the finally selected one."""
+        logger.debug("Add region %s of screen %s to selection", rect, screen_idx)
+        self._selected_regions.append((rect, screen_idx))
+
+    @QtCore.Slot()
+    def _finish_region_selection(self) -> None:
+        """Start processing the added regions, without selecting another one."""
+        if self._selected_regions:
+            rect, screen_idx = self._selected_regions.pop()
+            self.com.on_region_selected.emit(rect, screen_idx)
 
     @QtCore.Slot()
     def _run_detection(self, rect: Rect, screen_idx: int) -> None:
-        """Crop screenshot, perform content recognition on it and process result."""
+        """Crop screenshots, perform content recognition on them and process result.
+
+        Regions added before during the same capture are detected in parallel with
+        the selected region. Their results are joined in the order of selection.
+        """
+        # The screenshots won't be selected again, so unfinished background
+        # recognition would only slow down the detection of the selected regions
+        for index_job in self._word_indexes.values():
+            index_job.cancel()
+
+        regions = [*self._selected_regions, (rect, screen_idx)]
+        self._selected_regions = []
+        detections = [
+            detection
+            for region_rect, region_screen_idx in regions
+            if (detection := self._get_region_detection(region_rect, region_screen_idx))
+        ]
+        self._cancel_speculative_detection()
+
+        if not detections:
+            self._minimize_to_tray_or_exit(delay=0)
+            return
+
+        job = gather([d.job for d in detections], name="detect-selected-regions")
+        self._detection_regions[job] = detections
+        self._detection_job = job
+        self._set_processing(True)
+        job.add_done_callback(self.com.on_detection_finished.emit)
+
+    def _get_region_detection(
+        self, rect: Rect, screen_idx: int
+    ) -> _RegionDetection | None:
+        """Start the detection of a selected region, if it wasn't finished already.
+
+        An unfinished speculative detection of the same region is not reused, as it
+        runs with low priority on the background worker. It gets cancelled instead,
+        to free the CPU for the interactive detection.
+
+        Returns:
+            The detection, or None if the region is too small to be detected.
+        """
+        speculative = self._speculative_detection
+        if (
+            speculative
+            and speculative.rect == rect
+            and speculative.screen_idx == screen_idx
+            and not speculative.job.cancelled()
+        ):
+            if speculative.job.done():
+                logger.debug("Selection matches speculative detection, reuse it.")
+                self._speculative_detection = None
+                return speculative
+            logger.debug("Speculative detection unfinished, resubmit as interactive.")
+            self._cancel_speculative_detection()
+
         cropped_screenshot = utils.crop_image(
             image=self.screens[screen_idx].screenshot, rect=rect
         )
-
-        minimum_image_area = 100
         image_area = cropped_screenshot.width() * cropped_screenshot.height()
-        if image_area < minimum_image_area:
+        if image_area < self._MIN_DETECTION_AREA:
             logger.warning("Area of %spx is too small. Skip detection.", image_area)
-            self._minimize_to_tray_or_exit(delay=0)
+            return None
+
+        return self._submit_detection(
+            rect=rect,
+            screen_idx=screen_idx,
+            image=cropped_screenshot,
+            priority=Priority.INTERACTIVE,
+            name="detect-selected-region",
+        )
+
+    def _submit_detection(
+        self,
+        rect: Rect,
+        screen_idx: int,
+        image: QtGui.QImage,
+        priority: Priority,
+        name: str,
+    ) -> _RegionDetection:
+        """Queue the detection of the content of a region of a screenshot.
+
+        Results obtained in advance for the screenshot are passed on to the detection.
+        """
+        detect_kwargs = {"image": image, **self._get_detect_kwargs()}
+        if (located_codes := self._get_scanned_codes(rect, screen_idx)) is not None:
+            detect_kwargs["located_codes"] = located_codes
+        if (indexed_words := self._get_indexed_words(rect, screen_idx)) is not None:
+            detect_kwargs["indexed_words"] = indexed_words
+        if (memo := self._block_memos.get(screen_idx)) is not None:
+            detect_kwargs["memo"] = memo.region(left=rect.left, top=rect.top)
+        details = DetectionDetails()
+
+        # Run in worker thread to keep the UI responsive. The signal delivers the
+        # finished job back to the main thread.
+        job = self.scheduler.submit(
+            lambda token: detector.detect(
+                **detect_kwargs, cancel_token=token, details=details
+            ),
+            priority=priority,
+            preemptible=False,
+            name=name,
+        )
+        return _RegionDetection(
+            rect=rect, screen_idx=screen_idx, job=job, details=details
+        )
+
+    @QtCore.Slot(Rect, int)
+    def _start_speculative_detection(self, rect: Rect, screen_idx: int) -> None:
+        """Detect the content of a selection, before the mouse button is released.
+
+        The selection usually stays unchanged for a moment before it gets released.
+        If it is released as is, the result might already be available by then.
+        """
+        self._cancel_speculative_detection()
+        image = utils.crop_image(image=self.screens[screen_idx].screenshot, rect=rect)
+        if image.width() * image.height() < self._MIN_DETECTION_AREA:
             return
 
+        self._speculative_detection = self._submit_detection(
+            rect=rect,
+            screen_idx=screen_idx,
+            image=image,
+            priority=Priority.SPECULATIVE,
+            name="detect-settled-selection",
+        )
+
+    def _cancel_speculative_detection(self) -> None:
+        if self._speculative_detection:
+            self._speculative_detection.job.cancel()
+            self._speculative_detection = None
+
+    def _set_processing(self, is_processing: bool) -> None:
+        """Indicate running detections in the tray, if there is one."""
+        if self.tray:
+            self.tray.is_processing = is_processing
+
+    def _get_detect_kwargs(self) -> dict[str, Any]:
+        """Arguments for the detection according to the current settings."""
         tessdata_path = info.get_tessdata_path(
             config_directory=info.config_directory(),
             is_packaged=info.is_packaged(),
@@ -341,18 +769,155 @@ class NormcapApp(QtWidgets.QApplication):
         if bool(self.settings.value("detect-text", type=bool)):
             detection_mode |= DetectionMode.TESSERACT
 
-        results = detector.detect(
-            image=cropped_screenshot,
-            tesseract_bin_path=tesseract_bin_path,
-            tessdata_path=tessdata_path,
-            language=self.settings.value("language"),
-            detect_mode=detection_mode,
-            parse_text=bool(self.settings.value("parse-text", type=bool)),
+        return {
+            "tesseract_bin_path": tesseract_bin_path,
+            "tessdata_path": tessdata_path,
+            "language": self.settings.value("language"),
+            "detect_mode": detection_mode,
+            "parse_text": bool(self.settings.value("parse-text", type=bool)),
+            "profile": Profile(self.settings.value("profile")),
+            "max_threads": cast(int, self.settings.value("ocr-threads", type=int)),
+            "timeout": cast(float, self.settings.value("ocr-timeout", type=float))
+            or None,
+            "retry_on_timeout": bool(
+                self.settings.value("ocr-timeout-retry", type=bool)
+            ),
+            "ocr_engine": OcrEngine(self.settings.value("ocr-engine")),
+            "code_formats": self.settings.value("code-formats"),
+            "model_path": info.config_directory() / "onnx",
+        }
+
+    def _get_request_detect_kwargs(self, options: dict[str, Any]) -> dict[str, Any]:
+        """Arguments for the detection of a requested image, with its options applied.
+
+        Raises:
+            ValueError: If an option is unknown or has an invalid value.
+        """
+        if unknown := set(options) - set(_REQUEST_OPTIONS) - set(_REQUEST_DETECT_MODES):
+            raise ValueError(f"Unknown option(s) {', '.join(sorted(unknown))}")
+
+        detect_kwargs = self._get_detect_kwargs()
+        for key, value in options.items():
+            if mode := _REQUEST_DETECT_MODES.get(key):
+                detect_kwargs["detect_mode"] = (
+                    detect_kwargs["detect_mode"] | mode
+                    if value
+                    else detect_kwargs["detect_mode"] & ~mode
+                )
+            else:
+                detect_kwargs[key] = _REQUEST_OPTIONS[key](value)
+        return detect_kwargs
+
+    def recognize_image(
+        self, read_image: Callable[[], bytes], options: dict[str, Any]
+    ) -> Job[dict]:
+        """Queue the detection of an image sent by another program, e.g. a script.
+
+        The job has batch priority, so it doesn't delay the detection of regions
+        selected meanwhile.
+
+        Args:
+            read_image: Returns the content of an image file, e.g. a PNG. Called in a
+                worker thread.
+            options: Settings to override for this detection.
+
+        Raises:
+            ValueError: If an option is unknown or has an invalid value.
+
+        Returns:
+            Job resolving to the report of the detection, or to an error.
+        """
+        detect_kwargs = self._get_request_detect_kwargs(options)
+        # Preempted jobs get restarted, but e.g. a pipe can only be read once
+        read_image = functools.cache(read_image)
+
+        def _recognize(token: CancellationToken) -> dict:
+            image = QtGui.QImage.fromData(read_image())
+            if image.isNull():
+                return {"error": "Could not read image"}
+            details = DetectionDetails()
+            try:
+                results = detector.detect(
+                    image=image, **detect_kwargs, cancel_token=token, details=details
+                )
+            except CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Detection of requested image failed: %s", exc)
+                return {"error": str(exc)}
+            # Detection returns no results on cancellation. Raise, so that a
+            # preempted job gets re-queued instead of reporting an empty result.
+            token.raise_if_cancelled()
+            return output.to_dict(results, details)
+
+        return self.scheduler.submit(
+            _recognize, priority=Priority.BATCH, name="recognize-image"
         )
 
+    @QtCore.Slot(object)
+    def _recognize_socket_request(self, request: RecognizeRequest) -> None:
+        """Detect an image sent to the socket server by a client."""
+        try:
+            job = self.recognize_image(lambda: request.image, request.options)
+        except (TypeError, ValueError) as exc:
+            self._socket_server.respond(request, {"error": str(exc)})
+            return
+        job.add_done_callback(
+            lambda job: self._socket_server.respond(
+                request, {"error": "Cancelled"} if job.cancelled() else job.result()
+            )
+        )
+
+    @QtCore.Slot()
+    def cancel_detection(self) -> None:
+        """Abort a running detection, including its tesseract process."""
+        self._selected_regions = []
+        self._cancel_speculative_detection()
+        if self.watcher:
+            self._stop_watching()
+            self._minimize_to_tray_or_exit(delay=0)
+        if self._detection_job and not self._detection_job.done():
+            logger.info("Cancel running detection")
+            self._detection_job.cancel()
+
+    @QtCore.Slot(object)
+    def _process_detection_results(self, job: Job[list[list[DetectionResult]]]) -> None:
+        """Output the joined results of the detection jobs of all selected regions."""
+        if job is self._detection_job:
+            self._detection_job = None
+            self._set_processing(False)
+        detections = self._detection_regions.pop(job, [])
+
+        # A new capture might have been started while the detection was running
+        capture_in_progress = bool(self.windows)
+
+        if job.cancelled():
+            logger.info("Detection was cancelled, discard results.")
+            if not capture_in_progress:
+                self._minimize_to_tray_or_exit(delay=0)
+            return
+
+        try:
+            region_results = job.result()
+        except Exception as exc:
+            logger.error("Detection failed: %s", exc)
+            region_results = [[] for _ in detections]
+        results = [r for rr in region_results for r in rr]
         result_text = os.linesep.join(r.text for r in results)
 
-        if result_text and self.cli_mode:
+        if self.cli_mode and self.output_format != OutputFormat.TEXT:
+            self._print_to_stdout_and_exit(
+                text=output.format_regions(
+                    self.output_format,
+                    [
+                        self._get_output_region(detection, rr)
+                        for detection, rr in zip(
+                            detections, region_results, strict=True
+                        )
+                    ],
+                )
+            )
+        elif result_text and self.cli_mode:
             self._print_to_stdout_and_exit(text=result_text)
         elif result_text:
             self._copy_to_clipboard(text=result_text)
@@ -362,8 +927,29 @@ class NormcapApp(QtWidgets.QApplication):
         if self.settings.value("notification", type=bool):
             self._send_notification(detection_results=results)
 
-        self._minimize_to_tray_or_exit(delay=self._EXIT_DELAY_SECONDS)
-        self.tray.show_completion_icon()
+        if not capture_in_progress:
+            self._minimize_to_tray_or_exit(delay=self._EXIT_DELAY_SECONDS)
+        if self.tray:
+            self.tray.show_completion_icon()
+
+    def _get_output_region(
+        self, detection: _RegionDetection, results: list[DetectionResult]
+    ) -> output.Region:
+        """Collect the results of a region including meta information."""
+        job, details = detection.job, detection.details
+        details.timings["queue"] = job.wait_time or 0.0
+        if job.started_at is not None and job.finished_at is not None:
+            details.timings["job"] = job.finished_at - job.started_at
+        return output.Region(
+            results=results,
+            details=details,
+            metadata={
+                "region": {
+                    **dataclasses.asdict(detection.rect),
+                    "screen": detection.screen_idx,
+                }
+            },
+        )
 
     def _copy_to_clipboard(self, text: str) -> None:
         """Copy results to clipboard."""
@@ -484,24 +1070,30 @@ class NormcapApp(QtWidgets.QApplication):
         self.settings.setValue("language", active_languages)
 
     @QtCore.Slot(bool)
-    def _exit_application(self, delay: Seconds = 0) -> None:
+    def _exit_application(self, delay: Seconds = 0, exit_code: int = 0) -> None:
         if delay:
-            QtCore.QTimer.singleShot(int(delay * 1000), self._exit_application)
+            QtCore.QTimer.singleShot(
+                int(delay * 1000), lambda: self._exit_application(exit_code=exit_code)
+            )
             return
 
-        if hasattr(self, "tray"):
+        if tray := getattr(self, "tray", None):
             # Hide avoids having the icon dangling in system tray for a few seconds
-            # (Tray wasn't created if another instance was already running)
-            self.tray.hide()
+            # (Tray wasn't created if another instance was already running, or if
+            # the region to detect was given)
+            tray.hide()
 
         if hasattr(self, "_socket_server"):
             self._socket_server.close()
 
+        if hasattr(self, "scheduler"):
+            self.scheduler.shutdown()
+
         logger.info("Exit normcap")
         logger.debug("Debug images in %s%snormcap", utils.tempfile.gettempdir(), os.sep)
 
         # Not sure why, but quit doesn't work reliably if called directly
-        QtCore.QTimer.singleShot(0, self.quit)
+        QtCore.QTimer.singleShot(0, lambda: self.exit(exit_code))
 
         # Use harsher fallback if quit() didn't work
         QtCore.QTimer.singleShot(500, lambda: sys.exit(1))
@@ -509,7 +1101,7 @@ class NormcapApp(QtWidgets.QApplication):
     @QtCore.Slot()
     def _minimize_to_tray_or_exit(self, delay: Seconds) -> None:
         self._close_windows()
-        if self.settings.value("tray", type=bool):
+        if self.tray and self.settings.value("tray", type=bool):
             return
 
         self.com.on_exit_application.emit(delay)
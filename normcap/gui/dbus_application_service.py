@@ -2,13 +2,21 @@
 
 This module provides DBus service activation functionality, allowing external
 applications to activate NormCap via DBus calls with optional parameters.
+
+Additionally, other applications can detect the content of images using the
+Recognize and RecognizeFd methods, without starting NormCap each time.
 """
 
+import contextlib
+import json
 import logging
+import os
+from collections.abc import Callable
 
 from PySide6 import QtCore, QtDBus
 
 from normcap import app_id
+from normcap.detection.scheduler import Job
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +37,9 @@ class DBusApplicationService(QtCore.QObject):
     activated = QtCore.Signal(list)
     action_activated = QtCore.Signal(str, list)
 
+    # Queues the detection of an image, set by the application once it is ready
+    recognize_image: Callable[[Callable[[], bytes], dict], Job[dict]] | None = None
+
     def __init__(self, parent: QtCore.QObject | None = None) -> None:
         """Initialize the DBus activation service.
 
@@ -183,6 +194,79 @@ class DBusApplicationService(QtCore.QObject):
         self.action_activated.emit(action_name, params)
         return True
 
+    @QtCore.Slot(QtCore.QByteArray, dict, result=str)
+    def Recognize(self, image: QtCore.QByteArray, options: dict) -> str:  # noqa: N802
+        """DBus method: Detect text and codes in an image.
+
+        Args:
+            image: Content of an image file, e.g. a PNG.
+            options: Settings to override, e.g. {"language": ["eng", "deu"]}.
+
+        Returns:
+            JSON encoded report of the detection, or an object with an "error".
+        """
+        data = image.data()
+        return self._recognize(lambda: bytes(data), options)
+
+    @QtCore.Slot(QtDBus.QDBusUnixFileDescriptor, dict, result=str)
+    def RecognizeFd(  # noqa: N802
+        self, image_fd: QtDBus.QDBusUnixFileDescriptor, options: dict
+    ) -> str:
+        """DBus method: Detect text and codes in an image passed as file descriptor.
+
+        Passing e.g. a memfd avoids copying large images over the bus.
+
+        Args:
+            image_fd: File, memfd or pipe containing an image file, e.g. a PNG. It
+                is read from the start, if possible.
+            options: Settings to override, e.g. {"language": ["eng", "deu"]}.
+
+        Returns:
+            JSON encoded report of the detection, or an object with an "error".
+        """
+        # The descriptor stays open until the method returns, after the detection
+        return self._recognize(
+            lambda: _read_file_descriptor(image_fd.fileDescriptor()), options
+        )
+
+    def _recognize(self, read_image: Callable[[], bytes], options: dict) -> str:
+        """Detect an image and wait for the result.
+
+        QtDBus can't defer replies in Python, so the method waits for the result
+        while running a local event loop. Other events, including further DBus
+        calls, are processed meanwhile.
+        """
+        if not self.recognize_image:
+            return json.dumps({"error": "NormCap is not ready"})
+        try:
+            job = self.recognize_image(read_image, options)
+        except (TypeError, ValueError) as exc:
+            return json.dumps({"error": str(exc)})
+
+        loop = QtCore.QEventLoop()
+
+        def _quit_loop(_: Job) -> None:
+            # Called in a worker thread, so quit in the loop's thread
+            QtCore.QMetaObject.invokeMethod(
+                loop, "quit", QtCore.Qt.ConnectionType.QueuedConnection
+            )
+
+        job.add_done_callback(_quit_loop)
+        loop.exec()
+        return json.dumps(
+            {"error": "Cancelled"} if job.cancelled() else job.result(),
+            ensure_ascii=False,
+        )
+
     def __del__(self) -> None:
         """Cleanup when object is destroyed."""
         self.unregister_service()
+
+
+def _read_file_descriptor(fd: int) -> bytes:
+    with contextlib.suppress(OSError):
+        os.lseek(fd, 0, os.SEEK_SET)  # Not possible e.g. for pipes
+    chunks = []
+    while chunk := os.read(fd, 1024 * 1024):
+        chunks.append(chunk)
+    return b"".join(chunks)
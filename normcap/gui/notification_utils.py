@@ -85,6 +85,10 @@ def perform_action(texts_and_types: list) -> None:
             temp_file = _get_shared_temp_dir() / "normcap_result.ics"
             temp_file.write_text(text)
             urls = [temp_file.as_uri()]
+        case [TextType.TABLE]:
+            temp_file = _get_shared_temp_dir() / "normcap_result.tsv"
+            temp_file.write_text(line_sep.join(texts))
+            urls = [temp_file.as_uri()]
         case _:
             temp_file = _get_shared_temp_dir() / "normcap_result.txt"
             temp_file.write_text(line_sep.join(texts))
@@ -196,6 +200,13 @@ def _get_elements_description(detection_results: list[DetectionResult]) -> str:
             title = translate.ngettext(
                 "1 paragraph captured", "{count} paragraphs captured", count
             ).format(count=count)
+        case [TextType.TABLE]:
+            count = sum(d.text.count(os.linesep) + 1 for d in detection_results)
+            # L10N: Notification title.
+            # Do NOT translate the variables in curly brackets "{some_variable}"!
+            title = translate.ngettext(
+                "1 table row captured", "{count} table rows captured", count
+            ).format(count=count)
         case [TextType.MULTI_LINE]:
             count = sum(d.text.count(os.linesep) + 1 for d in detection_results)
             # L10N: Notification title.
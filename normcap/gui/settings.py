@@ -3,6 +3,9 @@ import logging
 from PySide6 import QtCore
 
 from normcap import __version__
+from normcap.detection.codes.models import CodeFormat
+from normcap.detection.models import Profile
+from normcap.detection.ocr.models import OcrEngine
 from normcap.gui.models import Setting
 from normcap.system.info import config_directory, is_portable_windows_package
 
@@ -63,6 +66,19 @@ DEFAULT_SETTINGS = (
         cli_arg=True,
         nargs=None,
     ),
+    Setting(
+        key="code-formats",
+        flag="",
+        type_=str,
+        value=CodeFormat.ALL.value,
+        help_=(
+            "Limit the detection to certain code formats, e.g. '--code-formats qr' "
+            "or '--code-formats qr linear'"
+        ),
+        choices=tuple(f.value for f in CodeFormat),
+        cli_arg=True,
+        nargs="+",
+    ),
     Setting(
         key="detect-text",
         flag="",
@@ -73,6 +89,76 @@ DEFAULT_SETTINGS = (
         cli_arg=True,
         nargs=None,
     ),
+    Setting(
+        key="profile",
+        flag="",
+        type_=str,
+        value=Profile.BALANCED.value,
+        help_=(
+            "Trade-off between speed and quality of the text recognition. Affects "
+            "e.g. the language models, image scaling and the effort to find codes."
+        ),
+        choices=tuple(p.value for p in Profile),
+        cli_arg=True,
+        nargs=None,
+    ),
+    Setting(
+        key="ocr-engine",
+        flag="",
+        type_=str,
+        value=OcrEngine.TESSERACT.value,
+        help_=(
+            "Engine for text recognition. 'onnx' requires the Python package "
+            "onnxruntime and PP-OCR models in the 'onnx' subfolder of the config "
+            "directory."
+        ),
+        choices=tuple(e.value for e in OcrEngine),
+        cli_arg=True,
+        nargs=None,
+    ),
+    Setting(
+        key="ocr-threads",
+        flag="",
+        type_=int,
+        value=0,
+        help_="Maximum number of CPU threads used for text recognition (0 = auto)",
+        choices=None,
+        cli_arg=True,
+        nargs=None,
+    ),
+    Setting(
+        key="ocr-timeout",
+        flag="",
+        type_=float,
+        value=30.0,
+        help_="Abort text recognition after this many seconds (0 = never)",
+        choices=None,
+        cli_arg=True,
+        nargs=None,
+    ),
+    Setting(
+        key="ocr-timeout-retry",
+        flag="",
+        type_=_parse_str_to_bool,
+        value=True,
+        help_="Retry with a faster profile if the text recognition timed out",
+        choices=(True, False),
+        cli_arg=True,
+        nargs=None,
+    ),
+    Setting(
+        key="ocr-background",
+        flag="",
+        type_=_parse_str_to_bool,
+        value=False,
+        help_=(
+            "Recognize the text of the whole screen in the background while a region "
+            "gets selected. If it finished in time, the result is available instantly."
+        ),
+        choices=(True, False),
+        cli_arg=True,
+        nargs=None,
+    ),
     Setting(
         key="notification",
         flag="n",
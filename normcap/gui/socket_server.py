@@ -1,5 +1,27 @@
+"""Local socket to communicate with the running NormCap instance.
+
+Another NormCap instance uses it to trigger a capture, scripts use it to recognize
+images without starting NormCap (and loading its models) each time.
+
+All messages, in both directions, consist of the size of a JSON header and the size
+of a binary body (two unsigned 4 byte integers, big endian), followed by the header
+in UTF-8 and the body. Requests are distinguished by the header's "command":
+
+- {"command": "capture"}: Show the windows to select a region.
+- {"command": "recognize", "id": ..., <options>}: Detect the image file in the
+  body, e.g. a PNG. The optional "id" is returned in the response, for clients
+  sending several requests without waiting for the responses in between.
+
+The response to "recognize" is a message without body, whose header is either the
+report of the detection or contains an "error".
+"""
+
 import atexit
+import dataclasses
+import json
 import logging
+import struct
+from typing import Any
 
 from PySide6 import QtCore, QtNetwork
 
@@ -7,30 +29,84 @@ from normcap import __version__
 
 logger = logging.getLogger(__name__)
 
+_SIZES = struct.Struct(">II")
+_MAX_HEADER_SIZE = 64 * 1024
+_MAX_BODY_SIZE = 256 * 1024 * 1024
+
+# Requests beyond this number are rejected, until pending ones are answered
+_MAX_PENDING_REQUESTS = 32
+
+
+def encode_message(header: dict, body: bytes = b"") -> bytes:
+    """Frame a message for sending it over the socket."""
+    header_bytes = json.dumps(header).encode("utf-8")
+    return _SIZES.pack(len(header_bytes), len(body)) + header_bytes + body
+
+
+def decode_messages(buffer: bytearray) -> list[tuple[dict, bytes]]:
+    """Take all complete messages from the start of the buffer.
+
+    Raises:
+        ValueError: If the buffer doesn't start with a valid message.
+
+    Returns:
+        Headers and bodies of the messages.
+    """
+    messages = []
+    while len(buffer) >= _SIZES.size:
+        header_size, body_size = _SIZES.unpack_from(buffer)
+        if header_size > _MAX_HEADER_SIZE or body_size > _MAX_BODY_SIZE:
+            raise ValueError("Message exceeds the size limit")
+        end = _SIZES.size + header_size + body_size
+        if len(buffer) < end:
+            break
+        header = json.loads(buffer[_SIZES.size : _SIZES.size + header_size])
+        if not isinstance(header, dict):
+            raise ValueError("Message header is not a JSON object")  # noqa: TRY004
+        messages.append((header, bytes(buffer[_SIZES.size + header_size : end])))
+        del buffer[:end]
+    return messages
+
+
+@dataclasses.dataclass
+class RecognizeRequest:
+    """Image to detect, received from a client."""
+
+    socket: QtNetwork.QLocalSocket
+    id: Any
+    options: dict
+    image: bytes
+
 
 class Communicate(QtCore.QObject):
     """Application's communication bus."""
 
     on_capture_message = QtCore.Signal()
+    on_recognize_message = QtCore.Signal(object)
     on_other_instance_running = QtCore.Signal()
+    on_response_ready = QtCore.Signal(object, object)
 
 
 class SocketServer(QtCore.QObject):
     _name = f"v{__version__}-normcap"
     _out: QtNetwork.QLocalSocket | None = None
-    _in: QtNetwork.QLocalSocket | None = None
     _server: QtNetwork.QLocalServer | None = None
     is_first_instance: bool
 
     def __init__(self) -> None:
         super().__init__()
         self.com = Communicate()
+        self.com.on_response_ready.connect(self._send_response)
+
+        # Received, but not yet complete messages of each client
+        self._buffers: dict[QtNetwork.QLocalSocket, bytearray] = {}
+        self._pending_requests = 0
 
         self._out = self._connect_to_other_instance()
         if self._out:
             # Send message to other instance
             logger.debug("Another instance is already running. Sending capture signal.")
-            self._out.write(b"capture")
+            self._out.write(encode_message({"command": "capture"}))
             self._out.waitForBytesWritten(1000)
             self.is_first_instance = False
         else:
@@ -54,31 +130,81 @@ class SocketServer(QtCore.QObject):
         """Open socket server to listen for other NormCap instances."""
         QtNetwork.QLocalServer().removeServer(self._name)
         self._server = QtNetwork.QLocalServer(self)
+        self._server.setSocketOptions(
+            QtNetwork.QLocalServer.SocketOption.UserAccessOption
+        )
         self._server.newConnection.connect(self._on_socket_connect)
         self._server.listen(self._name)
         logger.debug("Listen on local socket %s.", self._server.serverName())
 
     @QtCore.Slot()
     def _on_socket_connect(self) -> None:
-        """Open incoming socket to listen for messages from other NormCap instances."""
+        """Open incoming sockets to listen for messages from clients."""
         if not self._server:
             return
-        self._in = self._server.nextPendingConnection()
-        if self._in:
+        while socket := self._server.nextPendingConnection():
             logger.debug("Connect to incoming socket.")
-            self._in.readyRead.connect(self._on_socket_ready_read)
+            self._buffers[socket] = bytearray()
+            socket.readyRead.connect(lambda s=socket: self._on_socket_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._buffers.pop(s, None))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _on_socket_ready_read(self, socket: QtNetwork.QLocalSocket) -> None:
+        """Process messages received from a client."""
+        if (buffer := self._buffers.get(socket)) is None:
+            return
 
-    @QtCore.Slot()
-    def _on_socket_ready_read(self) -> None:
-        """Process messages received from other NormCap instances."""
-        if not self._in:
+        buffer += socket.readAll().data()
+        try:
+            messages = decode_messages(buffer)
+        except ValueError as exc:
+            logger.warning("Received invalid socket message: %s", exc)
+            self._write(socket, {"error": f"Invalid message: {exc}"})
+            socket.disconnectFromServer()
             return
 
-        message = self._in.readAll().data().decode("utf-8", errors="ignore")
-        logger.info("Received socket message '%s'", message)
+        for header, body in messages:
+            self._process_message(socket, header, body)
+
+    def _process_message(
+        self, socket: QtNetwork.QLocalSocket, header: dict, body: bytes
+    ) -> None:
+        command = header.get("command")
+        logger.info("Received socket message '%s'", command)
 
-        if message == "capture":
+        if command == "capture":
             self.com.on_capture_message.emit()
+        elif command != "recognize":
+            self._write(socket, {"id": header.get("id"), "error": "Unknown command"})
+        elif self._pending_requests >= _MAX_PENDING_REQUESTS:
+            self._write(socket, {"id": header.get("id"), "error": "Too many requests"})
+        else:
+            self._pending_requests += 1
+            self.com.on_recognize_message.emit(
+                RecognizeRequest(
+                    socket=socket,
+                    id=header.get("id"),
+                    options={
+                        k: v for k, v in header.items() if k not in {"command", "id"}
+                    },
+                    image=body,
+                )
+            )
+
+    def respond(self, request: RecognizeRequest, response: dict) -> None:
+        """Send the response to a request. Can be called from any thread."""
+        self.com.on_response_ready.emit(request, response)
+
+    @QtCore.Slot(object, object)
+    def _send_response(self, request: RecognizeRequest, response: dict) -> None:
+        self._pending_requests -= 1
+        self._write(request.socket, {"id": request.id, **response})
+
+    def _write(self, socket: QtNetwork.QLocalSocket, header: dict) -> None:
+        if socket not in self._buffers:
+            logger.debug("Client disconnected before receiving its response")
+            return
+        socket.write(encode_message(header))
 
     def close(self) -> None:
         if self._out:
@@ -28,6 +28,7 @@ class Communicate(QtCore.QObject):
     """System Tray's communication bus."""
 
     on_tray_clicked = QtCore.Signal()
+    on_cancel_clicked = QtCore.Signal()
     on_menu_capture_clicked = QtCore.Signal()
     on_menu_exit_clicked = QtCore.Signal()
 
@@ -40,6 +41,7 @@ class SystemTray(QtWidgets.QSystemTrayIcon):
     def __init__(self, parent: QtCore.QObject, keep_in_tray: bool) -> None:
         super().__init__(parent)
         self.keep_in_tray = keep_in_tray
+        self.is_processing = False
 
         self.com = Communicate()
 
@@ -66,10 +68,12 @@ class SystemTray(QtWidgets.QSystemTrayIcon):
         self, reason: QtWidgets.QSystemTrayIcon.ActivationReason
     ) -> None:
         logger.debug("Tray event: %s", reason)
-        if (
-            reason == QtWidgets.QSystemTrayIcon.ActivationReason.Trigger
-            and self.keep_in_tray
-        ):
+        if reason != QtWidgets.QSystemTrayIcon.ActivationReason.Trigger:
+            return
+
+        if self.is_processing:
+            self.com.on_cancel_clicked.emit()
+        elif self.keep_in_tray:
             self.com.on_tray_clicked.emit()
 
     def _update_context_menu_entries(self) -> None:
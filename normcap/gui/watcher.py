@@ -0,0 +1,239 @@
+"""Watch selected regions of the screen and recognize their text whenever it changes.
+
+The screen is captured periodically. To be cheap enough to run all day, a capture is
+only recognized if its pixels changed noticeably since the last recognized capture.
+This is tested by comparing the mean brightness of small tiles of the regions, which
+ignores noise like antialiasing artifacts. Texts are only reported if they differ
+from the last reported text.
+
+The CPU usage is limited by a duty cycle: after capturing, comparing or recognizing,
+the watcher pauses long enough that the work doesn't exceed the given share of a
+single CPU core on average. The text recognition is therefore restricted to a single
+thread and runs at batch priority, i.e. in a worker with lowered OS priority.
+"""
+
+import functools
+import logging
+import os
+import time
+from collections.abc import Callable
+from typing import Any
+
+from PySide6 import QtCore, QtGui
+
+from normcap.detection import detector
+from normcap.detection.models import DetectionResult
+from normcap.detection.ocr.memo import BlockMemo
+from normcap.detection.scheduler import (
+    CancellationToken,
+    Job,
+    Priority,
+    Scheduler,
+    gather,
+)
+from normcap.gui import utils
+from normcap.system.models import Rect
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 2.0  # Seconds between two captures
+DEFAULT_MAX_CPU = 25.0  # Percent of a single core
+
+_TILE_SIZE = 8  # Edge length of the compared tiles in pixels
+_MAX_TILES = 64  # Max tiles per axis. For larger regions, the tiles get larger.
+_CHANGE_THRESHOLD = 12  # Min change of the mean brightness (0-255) of any tile
+
+# The memo of a region only grows if its layout changes, e.g. because values got
+# longer. It is cleared to not grow forever.
+_MAX_MEMO_BLOCKS = 1000
+
+
+def get_tile_means(image: QtGui.QImage) -> bytes:
+    """Calculate the mean brightness of the tiles of the image.
+
+    Returns:
+        One byte per tile, row by row.
+    """
+    cols = min(max(image.width() // _TILE_SIZE, 1), _MAX_TILES)
+    rows = min(max(image.height() // _TILE_SIZE, 1), _MAX_TILES)
+    tiles = image.convertToFormat(QtGui.QImage.Format.Format_Grayscale8).scaled(
+        cols,
+        rows,
+        QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+        QtCore.Qt.TransformationMode.SmoothTransformation,
+    )
+    bits = tiles.constBits()
+    line = tiles.bytesPerLine()
+    return b"".join(bytes(bits[y * line : y * line + cols]) for y in range(rows))
+
+
+def has_changed(
+    previous: bytes | None, current: bytes, threshold: int = _CHANGE_THRESHOLD
+) -> bool:
+    """Check if any tile's brightness changed by more than the threshold."""
+    if previous is None or len(previous) != len(current):
+        return True
+    return any(abs(a - b) > threshold for a, b in zip(previous, current, strict=True))
+
+
+class Communicate(QtCore.QObject):
+    """RegionWatcher's communication bus."""
+
+    on_text_changed = QtCore.Signal(str)
+    on_detection_finished = QtCore.Signal(object)
+
+
+class RegionWatcher(QtCore.QObject):
+    """Periodically recognize the text of screen regions and report changes."""
+
+    def __init__(
+        self,
+        regions: list[tuple[Rect, int]],
+        capture: Callable[[], list[QtGui.QImage]],
+        scheduler: Scheduler,
+        detect_kwargs: dict[str, Any],
+        interval: float,
+        max_cpu: float,
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        """Prepare watching, but don't start yet.
+
+        Args:
+            regions: Regions to watch and the indices of their screens.
+            capture: Function to take screenshots of all screens.
+            scheduler: Runs the detection jobs.
+            detect_kwargs: Arguments for detector.detect, except for the image.
+            interval: Seconds between two captures.
+            max_cpu: Max average CPU usage in percent of a single core.
+            parent: Owner of the watcher.
+        """
+        super().__init__(parent)
+        self.regions = regions
+        self.capture = capture
+        self.scheduler = scheduler
+        self.detect_kwargs = {**detect_kwargs, "max_threads": 1}
+        self.max_cpu = min(max(max_cpu, 1), 100)
+
+        self.com = Communicate(parent=self)
+        self.com.on_detection_finished.connect(self._process_detection_results)
+
+        self._timer = QtCore.QTimer(parent=self)
+        self._timer.setInterval(int(interval * 1000))
+        self._timer.timeout.connect(self._check_regions)
+
+        self._memos = [BlockMemo() for _ in regions]
+        self._tile_means: list[bytes | None] = [None] * len(regions)
+        self._texts = [""] * len(regions)
+        self._last_text: str | None = None
+        self._job: Job[list[list[DetectionResult]]] | None = None
+        self._pending: list[tuple[int, bytes]] = []
+        self._resume_at = 0.0
+
+    def start(self, screenshots: list[QtGui.QImage] | None = None) -> None:
+        """Recognize the regions right away, then whenever they changed.
+
+        Args:
+            screenshots: Already taken screenshots of all screens to recognize first,
+                e.g. those on which the regions were selected. If omitted, the first
+                capture is taken after the interval.
+        """
+        logger.info("Watch %s region(s)", len(self.regions))
+        self._timer.start()
+        if screenshots:
+            self._check_regions(screenshots=screenshots)
+
+    def stop(self) -> None:
+        """Stop watching and cancel a running detection."""
+        self._timer.stop()
+        if self._job:
+            self._job.cancel()
+
+    def is_active(self) -> bool:
+        return self._timer.isActive()
+
+    def _throttle(self, seconds: float) -> None:
+        """Pause long enough to keep the work of the given duration within budget."""
+        pause = seconds * (100 / self.max_cpu - 1)
+        self._resume_at = max(self._resume_at, time.monotonic() + pause)
+
+    @QtCore.Slot()
+    def _check_regions(self, screenshots: list[QtGui.QImage] | None = None) -> None:
+        """Capture the screen and start the detection of changed regions."""
+        if self._job is not None or time.monotonic() < self._resume_at:
+            return
+
+        start_time = time.monotonic()
+        try:
+            screenshots = screenshots or self.capture()
+        except Exception as exc:
+            logger.warning("Capturing the screen failed: %s", exc)
+            return
+
+        changed = []
+        for idx, (rect, screen_idx) in enumerate(self.regions):
+            image = utils.crop_image(image=screenshots[screen_idx], rect=rect)
+            tile_means = get_tile_means(image)
+            if has_changed(self._tile_means[idx], tile_means):
+                changed.append((idx, image, tile_means))
+        self._throttle(time.monotonic() - start_time)
+
+        if not changed:
+            logger.debug("Watched regions did not change")
+            return
+
+        jobs = []
+        for idx, image, _ in changed:
+            if len(self._memos[idx]) > _MAX_MEMO_BLOCKS:
+                self._memos[idx].clear()
+            jobs.append(
+                self.scheduler.submit(
+                    functools.partial(self._detect, image=image, memo=self._memos[idx]),
+                    priority=Priority.BATCH,
+                    preemptible=True,
+                    name=f"watch-region-{idx}",
+                )
+            )
+        self._pending = [(idx, tile_means) for idx, _, tile_means in changed]
+        self._job = gather(jobs, name="watch-regions")
+        self._job.add_done_callback(self.com.on_detection_finished.emit)
+
+    def _detect(
+        self, token: CancellationToken, image: QtGui.QImage, memo: BlockMemo
+    ) -> list[DetectionResult]:
+        results = detector.detect(
+            **self.detect_kwargs,
+            image=image,
+            memo=memo.region(left=0, top=0),
+            cancel_token=token,
+        )
+        # Detection returns no results on cancellation. Raise, so that a preempted
+        # job gets re-queued instead of reporting the region as empty.
+        token.raise_if_cancelled()
+        return results
+
+    @QtCore.Slot(object)
+    def _process_detection_results(self, job: Job[list[list[DetectionResult]]]) -> None:
+        """Report the text of all regions, if it changed."""
+        self._job = None
+        if job.started_at is not None and job.finished_at is not None:
+            self._throttle(job.finished_at - job.started_at)
+        if job.cancelled():
+            return
+        try:
+            region_results = job.result()
+        except Exception as exc:
+            logger.warning("Detection of watched regions failed: %s", exc)
+            return
+
+        # Only now the captures count as recognized. Otherwise, they get retried.
+        for (idx, tile_means), results in zip(
+            self._pending, region_results, strict=True
+        ):
+            self._tile_means[idx] = tile_means
+            self._texts[idx] = os.linesep.join(r.text for r in results)
+
+        text = os.linesep.join(t for t in self._texts if t)
+        if text != self._last_text:
+            self._last_text = text
+            if text:
+                self.com.on_text_changed.emit(text)
@@ -18,6 +18,7 @@ from typing import cast
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from normcap import positioning
+from normcap.detection.ocr.index import WordIndex
 from normcap.gui.menu_button import MenuButton
 from normcap.gui.settings import Settings
 from normcap.system import info
@@ -50,6 +51,12 @@ class UiContainerLabel(QtWidgets.QLabel):
 
         self.rect: QtCore.QRect = QtCore.QRect()
         self.rect_pen = QtGui.QPen(self.color, 2, QtCore.Qt.PenStyle.DashLine)
+        self.added_rects: list[QtCore.QRect] = []
+        self.added_rect_pen = QtGui.QPen(self.color, 2, QtCore.Qt.PenStyle.SolidLine)
+
+        self.word_rects: list[QtCore.QRect] = []
+        self.word_brush = QtGui.QColor(self.color)
+        self.word_brush.setAlpha(60)
         self.get_parse_text = parse_text_func
 
         self.setObjectName("ui_container")
@@ -101,15 +108,25 @@ class UiContainerLabel(QtWidgets.QLabel):
             painter.drawText(10, 20 * (idx + 1), line)
 
     def paintEvent(self, event: QtGui.QPaintEvent) -> None:  # noqa: N802
-        """Draw selection rectangle and mode indicator icon."""
+        """Draw highlighted words, selection rectangles and mode indicator icon."""
         super().paintEvent(event)
 
-        if not (self.rect or self.debug_info):
+        if not (self.rect or self.debug_info or self.word_rects or self.added_rects):
             return
 
         painter = QtGui.QPainter(self)
         self.rect = self.rect.normalized()
 
+        if self.word_rects:
+            painter.setPen(QtCore.Qt.PenStyle.NoPen)
+            painter.setBrush(self.word_brush)
+            painter.drawRects(self.word_rects)
+            painter.setBrush(QtCore.Qt.BrushStyle.NoBrush)
+
+        if self.added_rects:
+            painter.setPen(self.added_rect_pen)
+            painter.drawRects(self.added_rects)
+
         if self.debug_info:
             self._draw_debug_infos(painter, self.rect)
 
@@ -134,12 +151,23 @@ class Communicate(QtCore.QObject):
     """Window's communication bus."""
 
     on_esc_key_pressed = QtCore.Signal()
+    on_enter_key_pressed = QtCore.Signal()
     on_region_selected = QtCore.Signal(Rect, int)
+    on_region_added = QtCore.Signal(Rect, int)
+    on_selection_settled = QtCore.Signal(Rect, int)
 
 
 class Window(QtWidgets.QMainWindow):
     """Provide fullscreen UI for interacting with NormCap."""
 
+    # Time the selection has to stay unchanged while dragging, before it is reported
+    # as settled. The region is then likely to be released as is.
+    _SELECTION_SETTLE_MS: int = 150
+
+    # Holding this key while releasing the mouse button adds the region to the
+    # selection, instead of finishing the selection
+    _ADD_REGION_MODIFIER = QtCore.Qt.KeyboardModifier.ShiftModifier
+
     def __init__(
         self,
         screen: Screen,
@@ -174,6 +202,12 @@ class Window(QtWidgets.QMainWindow):
         self.setEnabled(True)
 
         self.selection_rect: QtCore.QRect = QtCore.QRect()
+        self.word_index: WordIndex | None = None
+
+        self._settle_timer = QtCore.QTimer(parent=self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(self._SELECTION_SETTLE_MS)
+        self._settle_timer.timeout.connect(self._emit_selection_settled)
 
         self.image_container = QtWidgets.QLabel(scaledContents=True)
         self.setCentralWidget(self.image_container)
@@ -213,6 +247,83 @@ class Window(QtWidgets.QMainWindow):
         ui_container.raise_()
         return ui_container
 
+    def _get_word_rects(self, words: list[dict]) -> list[QtCore.QRect]:
+        """Boxes of words on the screenshot in coordinates of the window."""
+        factor = self._get_scale_factor()
+        return [
+            QtCore.QRectF(
+                w["left"] / factor,
+                w["top"] / factor,
+                w["width"] / factor,
+                w["height"] / factor,
+            ).toAlignedRect()
+            for w in words
+        ]
+
+    def _get_selected_words(self, rect: QtCore.QRect) -> list[dict]:
+        """Indexed words inside a rect of the window."""
+        if not self.word_index:
+            return []
+        factor = self._get_scale_factor()
+        return self.word_index.words_in(
+            round(rect.left() * factor),
+            round(rect.top() * factor),
+            round(rect.width() * factor),
+            round(rect.height() * factor),
+        )
+
+    def _update_word_highlights(self, pos: QtCore.QPoint) -> None:
+        """Highlight the words to be selected, or else the word under the cursor."""
+        if not self.word_index:
+            return
+        if self.selection_rect:
+            words = self._get_selected_words(self.selection_rect.normalized())
+        else:
+            factor = self._get_scale_factor()
+            word = self.word_index.word_at(pos.x() * factor, pos.y() * factor)
+            words = [word] if word else []
+
+        word_rects = self._get_word_rects(words)
+        previous_rects = self.ui_container.word_rects
+        if word_rects == previous_rects:
+            return
+        self.ui_container.word_rects = word_rects
+
+        # Only repaint the changed highlights, not the whole screenshot
+        changed_region = QtGui.QRegion()
+        for rect in (*previous_rects, *word_rects):
+            changed_region = changed_region.united(rect)
+        self.ui_container.update(changed_region)
+
+    def _get_snapped_selection(self) -> QtCore.QRect:
+        """Selection extended to whole words."""
+        selection = self.selection_rect.normalized()
+        for word_rect in self._get_word_rects(self._get_selected_words(selection)):
+            selection = selection.united(word_rect)
+        return selection
+
+    def _get_scaled_selection(self) -> Rect:
+        """Selection in coordinates of the screenshot, extended to whole words."""
+        selection_coords = cast(tuple, self._get_snapped_selection().getCoords())
+        return Rect(*selection_coords).scale(self._get_scale_factor())
+
+    @QtCore.Slot()
+    def _emit_selection_settled(self) -> None:
+        if self.selection_rect:
+            self.com.on_selection_settled.emit(
+                self._get_scaled_selection(), self.screen_.index
+            )
+
+    def set_word_index(self, word_index: WordIndex) -> None:
+        """Enable highlighting and snapping to the words recognized on the screenshot.
+
+        Args:
+            word_index: Words of the screenshot, in coordinates of the screenshot.
+        """
+        self.word_index = word_index
+        for widget in (self, self.image_container, self.ui_container):
+            widget.setMouseTracking(True)
+
     def _draw_background_image(self) -> None:
         """Draw screenshot as background image."""
         pixmap = QtGui.QPixmap()
@@ -284,14 +395,17 @@ class Window(QtWidgets.QMainWindow):
             )
 
     def clear_selection(self) -> None:
+        self._settle_timer.stop()
         self.selection_rect = QtCore.QRect()
         self.ui_container.rect = self.selection_rect
+        self.ui_container.word_rects = []
         self.update()
 
     def keyPressEvent(self, event: QtGui.QKeyEvent) -> None:  # noqa: N802
-        """Handle ESC key pressed.
+        """Handle ESC and Enter key pressed.
 
-        Cancels the selection progress (if ongoing), otherwise emit signal.
+        ESC cancels the selection progress (if ongoing), otherwise emit signal.
+        Enter finishes the selection, if regions were added to it.
         """
         super().keyPressEvent(event)
         if event.key() == QtCore.Qt.Key.Key_Escape:
@@ -299,6 +413,8 @@ class Window(QtWidgets.QMainWindow):
                 self.clear_selection()
             else:
                 self.com.on_esc_key_pressed.emit()
+        elif event.key() in (QtCore.Qt.Key.Key_Return, QtCore.Qt.Key.Key_Enter):
+            self.com.on_enter_key_pressed.emit()
 
     def mousePressEvent(self, event: QtGui.QMouseEvent) -> None:  # noqa: N802
         """Handle left mouse button clicked.
@@ -319,15 +435,32 @@ class Window(QtWidgets.QMainWindow):
             self.update()
 
     def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:  # noqa: N802
-        """Update position of bottom right point of selection rectangle."""
+        """Update position of bottom right point of selection rectangle.
+
+        Once the selection stays unchanged for a moment, it is reported as settled,
+        e.g. to start the detection speculatively.
+
+        If words were recognized in advance, the words inside the selection, or the
+        word under the cursor, get highlighted.
+        """
         super().mouseMoveEvent(event)
-        if self.selection_rect:
-            self.selection_rect.setBottomRight(event.position().toPoint())
+        position = event.position().toPoint()
+        if self.selection_rect and position != self.selection_rect.bottomRight():
+            self.selection_rect.setBottomRight(position)
             self.ui_container.rect = self.selection_rect
+            self._settle_timer.start()
             self.update()
+        self._update_word_highlights(position)
 
     def mouseReleaseEvent(self, event: QtGui.QMouseEvent) -> None:  # noqa: N802
-        """Start OCR workflow on left mouse button release."""
+        """Start OCR workflow on left mouse button release.
+
+        If the modifier key for adding regions is held, the region is only added to
+        the selection and further regions, also on other screens, can be selected.
+
+        If words were recognized in advance, the selection gets extended to fully
+        contain the words inside of it.
+        """
         super().mouseReleaseEvent(event)
         if (
             event.button() != QtCore.Qt.MouseButton.LeftButton
@@ -336,9 +469,13 @@ class Window(QtWidgets.QMainWindow):
             return
 
         self.selection_rect.setBottomRight(event.position().toPoint())
+        scaled_selection_rect = self._get_scaled_selection()
 
-        selection_coords = cast(tuple, self.selection_rect.normalized().getCoords())
-        scaled_selection_rect = Rect(*selection_coords).scale(self._get_scale_factor())
+        if event.modifiers() & self._ADD_REGION_MODIFIER:
+            self.ui_container.added_rects.append(self._get_snapped_selection())
+            self.clear_selection()
+            self.com.on_region_added.emit(scaled_selection_rect, self.screen_.index)
+            return
 
         self.clear_selection()
 
@@ -0,0 +1,464 @@
+"""Detect text and codes in images as they arrive, until stopped.
+
+Usage: normcap stream [options] (--watch <directory> | --stdin)
+
+With --watch, image files added to a directory are detected, including those which
+are already in it. With --stdin, images are read from the standard input as frames,
+each consisting of the size of the image file in bytes (4 bytes, big endian) and the
+content of the image file (e.g. PNG or JPEG).
+
+One JSON object per image is written (JSONL) as soon as it is detected. Like with
+the batch command, the images are detected by a pool of warmed up worker processes.
+Only a limited number of images is queued: if the workers can't keep up, reading
+from stdin pauses, which in turn blocks the writer on the other end of the pipe,
+and new files in the watched directory are picked up later.
+
+Images read from stdin are decoded before they are submitted. The workers receive
+them in grayscale via shared memory, instead of the pickled file content.
+
+Sending SIGUSR1 prints counters of the throughput and latency to stderr.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import json
+import logging
+import queue
+import signal
+import statistics
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, TextIO
+
+from PySide6 import QtCore, QtGui
+
+from normcap import batch
+from normcap import logger_config as logger_
+from normcap.detection import thread_budget
+from normcap.detection.shared_image import ImageHandle, SharedImage
+
+logger = logging.getLogger(__name__)
+
+_FRAME_HEADER = struct.Struct(">I")
+_MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+# Files modified more recently are probably still being written
+_SETTLE_TIME = 0.5
+
+# Number of latest latencies used for the statistics
+_LATENCY_WINDOW = 1000
+
+
+class _Item(NamedTuple):
+    arrived_at: float
+    source: str | bytes
+    metadata: dict
+
+
+class Stats:
+    """Counters of the processed images, which can be updated from any thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.received = 0
+        self.finished = 0
+        self.failed = 0
+        self.latencies: collections.deque[float] = collections.deque(
+            maxlen=_LATENCY_WINDOW
+        )
+
+    def add_received(self) -> None:
+        with self._lock:
+            self.received += 1
+
+    def add_finished(self, latency: float, failed: bool) -> None:
+        with self._lock:
+            self.finished += 1
+            self.failed += failed
+            self.latencies.append(latency)
+
+    def format(self) -> str:
+        """Summarize the counters in a single line."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            finished, failed, received = self.finished, self.failed, self.received
+        elapsed = time.monotonic() - self.started_at
+        summary = (
+            f"received={received} finished={finished} failed={failed} "
+            f"pending={received - finished} throughput={finished / elapsed:.2f}/s"
+        )
+        if latencies:
+            p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+            summary += (
+                f" latency_mean={statistics.fmean(latencies):.3f}s"
+                f" latency_p95={p95:.3f}s latency_max={latencies[-1]:.3f}s"
+            )
+        return summary
+
+
+def _share_image(
+    source: str | bytes,
+) -> tuple[str | bytes | ImageHandle, SharedImage | None]:
+    """Decode image content into shared memory, to not pickle it to a worker.
+
+    Returns:
+        What to send to the worker, and the shared image to be closed afterwards.
+        Paths and undecodable content are sent as they are.
+    """
+    if isinstance(source, str):
+        return source, None
+    image = QtGui.QImage.fromData(source)
+    if image.isNull():
+        return source, None  # The worker reports the error
+    shared = SharedImage(image)
+    return shared.handle, shared
+
+
+class Communicate(QtCore.QObject):
+    """Stream's communication bus."""
+
+    on_capacity_available = QtCore.Signal()
+    on_finished = QtCore.Signal()
+
+
+class Stream(QtCore.QObject):
+    """Detect queued images in a worker pool and write the results."""
+
+    def __init__(
+        self,
+        pool: concurrent.futures.Executor,
+        out: TextIO,
+        max_in_flight: int,
+        queue_size: int,
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        """Prepare the stream, but don't start yet.
+
+        Args:
+            pool: Runs batch.detect_image in initialized workers.
+            out: Where to write the results to.
+            max_in_flight: Max number of images submitted to the pool at once.
+            queue_size: Max number of images waiting to be submitted.
+            parent: Owner of the stream.
+        """
+        super().__init__(parent)
+        self.pool = pool
+        self.out = out
+        self.max_in_flight = max_in_flight
+        self.stats = Stats()
+        self.com = Communicate(parent=self)
+
+        self._queue: queue.Queue[_Item | None] = queue.Queue(maxsize=queue_size)
+        self._slots = threading.Semaphore(max_in_flight)
+        self._write_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="stream-dispatcher", daemon=True
+        )
+
+    def start(self) -> None:
+        self._dispatcher.start()
+
+    def stop(self) -> None:
+        """Stop submitting images. Already submitted ones are still written."""
+        self._stopped.set()
+        self._dispatcher.join()
+
+    def put(self, source: str | bytes, metadata: dict, block: bool = True) -> bool:
+        """Queue an image for detection.
+
+        Args:
+            source: Path of an image file, or the content of one.
+            metadata: Information to include in the result.
+            block: Wait for space in the queue, instead of rejecting the image.
+
+        Returns:
+            If the image got queued.
+        """
+        try:
+            self._queue.put(_Item(time.monotonic(), source, metadata), block=block)
+        except queue.Full:
+            return False
+        self.stats.add_received()
+        return True
+
+    def close(self) -> None:
+        """Signal that no more images will be put. Emits on_finished when done."""
+        self._queue.put(None)
+
+    def _dispatch(self) -> None:
+        """Submit queued images to the pool, while it has capacity."""
+        # Take images from the queue only when they can be submitted. Otherwise,
+        # one more image than the queue's size would be waiting.
+        while self._acquire_slot():
+            item = self._get_item()
+            if item is None:
+                break
+            source, shared = _share_image(item.source)
+            future = self.pool.submit(batch.detect_image, source, item.metadata)
+            future.add_done_callback(functools.partial(self._write, item, shared))
+
+        if self._stopped.is_set():
+            return
+
+        # Closed, so wait for the other images in flight
+        for _ in range(self.max_in_flight - 1):
+            if not self._acquire_slot():
+                return
+        self.com.on_finished.emit()
+
+    def _get_item(self) -> _Item | None:
+        """Wait for the next image, or None if the stream is closed or stopped."""
+        while not self._stopped.is_set():
+            with contextlib.suppress(queue.Empty):
+                return self._queue.get(timeout=0.1)
+        return None
+
+    def _acquire_slot(self) -> bool:
+        """Wait until less images are in flight than allowed, or until stopped."""
+        while not self._slots.acquire(timeout=0.1):
+            if self._stopped.is_set():
+                return False
+        return True
+
+    def _write(
+        self,
+        item: _Item,
+        shared: SharedImage | None,
+        future: concurrent.futures.Future,
+    ) -> None:
+        """Write the result of a finished image. Called from a pool thread."""
+        try:
+            if future.cancelled():
+                return
+            try:
+                record = future.result()
+            except Exception as exc:
+                logger.warning("Detection of %s failed: %s", item.metadata, exc)
+                record = {**item.metadata, "error": str(exc)}
+            with self._write_lock:
+                self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.out.flush()
+            self.stats.add_finished(
+                latency=time.monotonic() - item.arrived_at, failed="error" in record
+            )
+        finally:
+            if shared:
+                shared.close()
+            self._slots.release()
+            self.com.on_capacity_available.emit()
+
+
+class DirectoryFeeder(QtCore.QObject):
+    """Put image files added to a directory into a stream."""
+
+    def __init__(
+        self,
+        directory: Path,
+        stream: Stream,
+        skip: set[str],
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        """Watch the directory and put the images already in it.
+
+        Args:
+            directory: Directory to watch, not recursively.
+            stream: Receives the images.
+            skip: Paths of files which are already detected.
+            parent: Owner of the feeder.
+        """
+        super().__init__(parent)
+        self.directory = directory
+        self.stream = stream
+        self._seen = set(skip)
+        self._is_throttled = False
+
+        self._watcher = QtCore.QFileSystemWatcher([str(directory)], parent=self)
+        self._watcher.directoryChanged.connect(lambda _: self.scan())
+        self.stream.com.on_capacity_available.connect(self._on_capacity_available)
+
+        self._settle_timer = QtCore.QTimer(parent=self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(int(_SETTLE_TIME * 1000))
+        self._settle_timer.timeout.connect(self.scan)
+
+        self.scan()
+
+    @QtCore.Slot()
+    def scan(self) -> None:
+        """Put new images of the directory, until the stream's queue is full."""
+        self._is_throttled = False
+        now = time.time()
+        for path in sorted(self.directory.iterdir()):
+            if (
+                str(path) in self._seen
+                or path.suffix.lower() not in batch.IMAGE_SUFFIXES
+                or not path.is_file()
+            ):
+                continue
+            if now - path.stat().st_mtime < _SETTLE_TIME:
+                self._settle_timer.start()
+                continue
+            if not self.stream.put(str(path), {"path": str(path)}, block=False):
+                logger.debug("Queue is full, pick up remaining files later")
+                self._is_throttled = True
+                return
+            self._seen.add(str(path))
+
+    @QtCore.Slot()
+    def _on_capacity_available(self) -> None:
+        if self._is_throttled:
+            self.scan()
+
+
+def read_frames(stream: BinaryIO) -> Iterator[bytes]:
+    """Read length-prefixed frames until the end of the stream.
+
+    Raises:
+        ValueError: If a frame is truncated or too large.
+    """
+    while header := stream.read(_FRAME_HEADER.size):
+        if len(header) < _FRAME_HEADER.size:
+            raise ValueError("Truncated frame header")
+        (size,) = _FRAME_HEADER.unpack(header)
+        if size > _MAX_FRAME_SIZE:
+            raise ValueError(f"Frame of {size} bytes exceeds the limit")
+        data = stream.read(size)
+        if len(data) < size:
+            raise ValueError("Truncated frame")
+        yield data
+
+
+def _feed_frames(source: BinaryIO, stream: Stream) -> None:
+    """Put the frames of the source into the stream, waiting while it is full."""
+    try:
+        for index, frame in enumerate(read_frames(source)):
+            stream.put(frame, {"frame": index})
+    except ValueError as exc:
+        logger.warning("Stop reading frames: %s", exc)
+    finally:
+        stream.close()
+
+
+def _create_argparser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="normcap stream",
+        description=(
+            "Detect text and codes in images added to a directory or sent to stdin, "
+            "and write results as JSONL."
+        ),
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--watch",
+        type=Path,
+        metavar="DIRECTORY",
+        help="Detect image files in this directory and those added to it",
+    )
+    source.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Detect images read from stdin, each prefixed by its size in bytes",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help=(
+            "Append results to this file instead of printing them. With --watch, "
+            "files already contained in it are skipped"
+        ),
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,
+        help="Max number of images waiting for a worker (default: %(default)s)",
+    )
+    batch.add_detection_arguments(parser)
+    return parser
+
+
+def _install_signal_handlers(app: QtCore.QCoreApplication, stats: Stats) -> None:
+    def _print_stats(*_: object) -> None:
+        print(stats.format(), file=sys.stderr, flush=True)  # noqa: T201
+
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _print_stats)
+
+    # Python only handles signals when it runs, so regularly interrupt Qt's loop
+    timer = QtCore.QTimer(parent=app)
+    timer.timeout.connect(lambda: None)
+    timer.start(200)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the stream with the given command line arguments.
+
+    Returns:
+        Exit code, 1 if any image failed.
+    """
+    args = _create_argparser().parse_args(argv)
+    logger_.prepare_logging(log_level=args.verbosity)
+    if args.watch and not args.watch.is_dir():
+        logger.error("%s is not a directory", args.watch)
+        return 2
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    workers = args.workers or thread_budget.available_cpus()
+    skip = batch.read_finished_paths(args.output) if args.output else set()
+
+    with contextlib.ExitStack() as stack:
+        out: TextIO = (
+            stack.enter_context(args.output.open("a", encoding="utf-8"))
+            if args.output
+            else sys.stdout
+        )
+        pool = stack.enter_context(
+            concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=batch.init_worker,
+                initargs=(batch.get_detect_kwargs(args, workers),),
+            )
+        )
+        # Forking the workers later, while other threads run, could deadlock them
+        pool.submit(int).result()
+
+        stream = Stream(
+            pool=pool,
+            out=out,
+            max_in_flight=workers * batch.IN_FLIGHT_PER_WORKER,
+            queue_size=max(args.queue_size, 1),
+        )
+        stream.com.on_finished.connect(app.quit)
+        _install_signal_handlers(app, stream.stats)
+        stream.start()
+
+        if args.watch:
+            logger.info("Watch %s using %s worker(s)", args.watch, workers)
+            DirectoryFeeder(args.watch, stream, skip=skip, parent=app)
+        else:
+            logger.info("Read frames from stdin using %s worker(s)", workers)
+            threading.Thread(
+                target=_feed_frames,
+                args=(sys.stdin.buffer, stream),
+                name="stream-stdin",
+                daemon=True,
+            ).start()
+
+        app.exec()
+        stream.stop()
+        pool.shutdown(cancel_futures=True)
+
+    logger.info("Stopped: %s", stream.stats.format())
+    return 1 if stream.stats.failed else 0
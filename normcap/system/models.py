@@ -69,6 +69,15 @@ class Rect:
         """Width and height of rect."""
         return (self.width, self.height)
 
+    def contains(self, other: "Rect") -> bool:
+        """Check if the other rect lies completely inside this one."""
+        return (
+            self.left <= other.left
+            and self.top <= other.top
+            and self.right >= other.right
+            and self.bottom >= other.bottom
+        )
+
     # ONHOLD: Annotate as Self with Python 3.11
     def scale(self, factor: float):  # noqa: ANN201
         """Create an integer-scaled copy of the Rect."""
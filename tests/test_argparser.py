@@ -30,6 +30,7 @@ def test_argparser_defaults_are_complete():
         "background_mode",
         "cli_mode",
         "clipboard_handler",
+        "code_formats",
         "color",
         "dbus_activation",
         "detect_codes",
@@ -38,14 +39,26 @@ def test_argparser_defaults_are_complete():
         "log_file",
         "notification_handler",
         "notification",
+        "ocr_background",
+        "ocr_engine",
+        "ocr_threads",
+        "ocr_timeout",
+        "ocr_timeout_retry",
+        "output_format",
         "parse_text",
+        "profile",
+        "region",
         "reset",
+        "screen",
         "screenshot_handler",
         "show_introduction",
         "tray",
         "update",
         "verbosity",
         "version",
+        "watch",
+        "watch_interval",
+        "watch_max_cpu",
     }
     args_keys = set(vars(parsed_args).keys())
     assert args_keys == expected_options
@@ -105,10 +118,16 @@ def test_argparser_attributes_in_settings():
         "dbus_activation",
         "log_file",
         "notification_handler",
+        "output_format",
+        "region",
         "reset",
+        "screen",
         "screenshot_handler",
         "verbosity",
         "version",
+        "watch",
+        "watch_interval",
+        "watch_max_cpu",
     }
     for arg in argparser_defaults:
         if arg in args_without_setting:
@@ -137,6 +156,7 @@ def test_argparser_defaults_are_correct():
     assert argparser_defaults.pop("cli_mode") is False
     assert argparser_defaults.pop("background_mode") is False
     assert argparser_defaults.pop("dbus_activation") is False
+    assert argparser_defaults.pop("watch") is False
     assert argparser_defaults.pop("verbosity") == "warning"
     for value in argparser_defaults.values():
         assert value is None
@@ -161,3 +181,48 @@ def test_get_args(monkeypatch):
     assert args.parse_text is False
     assert args.language == ["eng", "deu"]
     assert args.tray is True
+
+
+@pytest.mark.parametrize(
+    ("output_format", "cli_mode"), [("json", True), ("hocr", True), ("text", False)]
+)
+def test_get_args_output_format_implies_cli_mode(monkeypatch, output_format, cli_mode):
+    with monkeypatch.context() as m:
+        m.setattr(sys, "argv", [sys.argv[0], "--output-format", output_format])
+        args = argparser.get_args()
+
+    assert args.output_format == output_format
+    assert args.cli_mode is cli_mode
+
+
+def test_get_args_watch_rejects_structured_output(monkeypatch, capsys):
+    with monkeypatch.context() as m:
+        m.setattr(sys, "argv", [sys.argv[0], "--watch", "--output-format", "json"])
+        with pytest.raises(SystemExit):
+            _ = argparser.get_args()
+
+    assert "--watch only supports" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    ("region", "expected"),
+    [
+        ("10,20,300,40", (10, 20, 300, 40)),
+        ("0,0,1,1", (0, 0, 1, 1)),
+        ("10,20,300", None),
+        ("10,20,0,40", None),
+        ("-1,20,300,40", None),
+        ("a,b,c,d", None),
+    ],
+)
+def test_argparser_parses_region(region, expected, capsys):
+    parser = argparser._create_argparser()
+
+    if expected is None:
+        with pytest.raises(SystemExit):
+            parser.parse_args(["--region", region])
+        assert "--region" in capsys.readouterr().err
+    else:
+        args = parser.parse_args(["--region", region, "--screen", "1"])
+        assert args.region == expected
+        assert args.screen == 1
@@ -0,0 +1,138 @@
+import concurrent.futures
+import json
+import threading
+import time
+
+import pytest
+from PySide6 import QtGui
+
+from normcap import batch
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("b.png", "a.JPG", "sub/c.png", "notes.txt"):
+        (tmp_path / name).write_text("")
+    return tmp_path
+
+
+def test_collect_paths_expands_directories_and_globs(image_dir):
+    # GIVEN a directory, a glob and a file, which overlap
+    patterns = [
+        str(image_dir / "sub"),
+        str(image_dir / "**" / "*.png"),
+        str(image_dir / "notes.txt"),
+    ]
+
+    # WHEN the paths are collected
+    paths = batch.collect_paths(patterns)
+
+    # THEN each image is contained once, in order of the patterns
+    # AND files which aren't images are only included if named explicitly
+    assert paths == [
+        str(image_dir / "sub" / "c.png"),
+        str(image_dir / "b.png"),
+        str(image_dir / "notes.txt"),
+    ]
+    assert batch.collect_paths([str(image_dir)]) == [
+        str(image_dir / "a.JPG"),
+        str(image_dir / "b.png"),
+        str(image_dir / "sub" / "c.png"),
+    ]
+
+
+def test_read_finished_paths_skips_errors_and_truncated_lines(tmp_path):
+    # GIVEN the output of an interrupted run
+    output_file = tmp_path / "out.jsonl"
+    output_file.write_text(
+        json.dumps({"path": "a.png", "results": []})
+        + "\n"
+        + json.dumps({"path": "b.png", "error": "Could not read image"})
+        + "\n"
+        + '{"path": "c.png", "resu'
+    )
+
+    # WHEN the finished paths are read
+    # THEN only successfully detected files count as finished
+    assert batch.read_finished_paths(output_file) == {"a.png"}
+    assert batch.read_finished_paths(tmp_path / "missing.jsonl") == set()
+
+
+def test_detect_files_limits_files_in_flight(monkeypatch):
+    # GIVEN a slow detection which records the files processed at once
+    in_flight: set[str] = set()
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def _detect_image(path, metadata):
+        nonlocal max_in_flight
+        with lock:
+            in_flight.add(path)
+            max_in_flight = max(max_in_flight, len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.discard(path)
+        if path == "3.png":
+            raise ValueError("Could not read image")
+        return {"path": path}
+
+    monkeypatch.setattr(batch, "detect_image", _detect_image)
+    paths = [f"{i}.png" for i in range(20)]
+
+    # WHEN many files are detected with a limit of 3 files in flight
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        records = list(batch._detect_files(pool, paths, max_in_flight=3))
+
+    # THEN no more files were submitted at once
+    # AND every file got a record, failed ones with the error
+    assert max_in_flight <= 3
+    assert sorted(r["path"] for r in records) == sorted(paths)
+    assert {"path": "3.png", "error": "Could not read image"} in records
+
+
+def test_main_resumes_interrupted_run(monkeypatch, tmp_path, image_dir):
+    # GIVEN an output file in which one image is already finished
+    output_file = tmp_path / "out.jsonl"
+    output_file.write_text(json.dumps({"path": str(image_dir / "b.png")}) + "\n")
+
+    detected = []
+
+    def _detect_image(path, metadata):
+        detected.append(path)
+        return {"path": path, "results": []}
+
+    # Run the workers as threads, to detect with the patched function
+    monkeypatch.setattr(
+        concurrent.futures, "ProcessPoolExecutor", concurrent.futures.ThreadPoolExecutor
+    )
+    monkeypatch.setattr(batch, "init_worker", lambda detect_kwargs: None)
+    monkeypatch.setattr(batch, "detect_image", _detect_image)
+
+    # WHEN the batch runs again on the directory
+    exit_code = batch.main([str(image_dir), "-o", str(output_file), "-w", "2"])
+
+    # THEN only the other images get detected and appended to the output
+    assert exit_code == 0
+    assert sorted(detected) == [
+        str(image_dir / "a.JPG"),
+        str(image_dir / "sub" / "c.png"),
+    ]
+    records = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [r["path"] for r in records[1:]] == detected
+
+
+def test_detect_image_raises_on_timeout(monkeypatch, tmp_path):
+    # GIVEN a detection whose text recognition times out
+    def _detect(details, **_):
+        details.timed_out = True
+        return []
+
+    monkeypatch.setattr(batch.detector, "detect", _detect)
+    image_path = tmp_path / "image.png"
+    QtGui.QImage(20, 10, QtGui.QImage.Format.Format_RGB32).save(str(image_path))
+
+    # WHEN an image is detected
+    # THEN the timeout is raised, to be reported as error
+    with pytest.raises(TimeoutError, match="timed out"):
+        batch.detect_image(str(image_path), {"path": str(image_path)})
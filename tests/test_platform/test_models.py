@@ -39,6 +39,22 @@ def test_rect_scaled_coords(coords, factor, expected_scaled_coords):
     assert rect_scaled.coords == expected_scaled_coords
 
 
+@pytest.mark.parametrize(
+    ("coords", "expected"),
+    [
+        ((10, 20, 110, 220), True),
+        ((20, 30, 100, 200), True),
+        ((9, 20, 110, 220), False),
+        ((10, 20, 110, 221), False),
+        ((200, 300, 400, 500), False),
+    ],
+)
+def test_rect_contains(coords, expected):
+    rect = Rect(left=10, top=20, right=110, bottom=220)
+
+    assert rect.contains(Rect(*coords)) is expected
+
+
 def test_screen_properties():
     # GIVEN a Screen is instantiated with certain rect information
     screen = Screen(
@@ -0,0 +1,157 @@
+import concurrent.futures
+import io
+import json
+import os
+import struct
+import threading
+import time
+
+import pytest
+from PySide6 import QtCore, QtGui
+
+from normcap import batch, stream
+from normcap.detection import shared_image
+
+
+def _frame(data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + data
+
+
+def test_read_frames():
+    frames = io.BytesIO(_frame(b"first") + _frame(b"") + _frame(b"third"))
+    assert list(stream.read_frames(frames)) == [b"first", b"", b"third"]
+
+
+@pytest.mark.parametrize(
+    ("data", "error"),
+    [
+        (b"\x00\x00", "Truncated frame header"),
+        (_frame(b"complete")[:-2], "Truncated frame"),
+        (struct.pack(">I", 2**31), "exceeds the limit"),
+    ],
+)
+def test_read_frames_raises_on_invalid_frames(data, error):
+    with pytest.raises(ValueError, match=error):
+        list(stream.read_frames(io.BytesIO(data)))
+
+
+@pytest.fixture
+def pool():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def test_stream_applies_backpressure(qtbot, monkeypatch, pool):
+    # GIVEN a stream whose detection blocks until released
+    release = threading.Event()
+    in_flight = []
+
+    def _detect_image(source, metadata):
+        in_flight.append(source)
+        release.wait(timeout=5)
+        return {**metadata, "results": []}
+
+    monkeypatch.setattr(batch, "detect_image", _detect_image)
+    out = io.StringIO()
+    image_stream = stream.Stream(pool=pool, out=out, max_in_flight=2, queue_size=2)
+    image_stream.start()
+
+    try:
+        # WHEN more images arrive than can be in flight and queued
+        queued = [image_stream.put(b"", {"frame": i}, block=False) for i in range(2)]
+        qtbot.waitUntil(lambda: len(in_flight) == 2)
+        queued += [
+            image_stream.put(b"", {"frame": i}, block=False) for i in range(2, 6)
+        ]
+
+        # THEN the pool only gets its share and further images are rejected
+        assert queued == [True] * 4 + [False] * 2
+        time.sleep(0.2)
+        assert len(in_flight) == 2
+
+        # WHEN the detection continues and the stream gets closed
+        release.set()
+        with qtbot.waitSignal(image_stream.com.on_finished):
+            image_stream.close()
+    finally:
+        release.set()
+        image_stream.stop()
+
+    # THEN a result is written for each accepted image
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sorted(r["frame"] for r in records) == [0, 1, 2, 3]
+    assert image_stream.stats.finished == 4
+    assert "received=4 finished=4 failed=0" in image_stream.stats.format()
+
+
+def test_stream_passes_decoded_frames_via_shared_memory(qtbot, monkeypatch, pool):
+    # GIVEN a stream whose detection reads the images it receives
+    handles = []
+
+    def _detect_image(source, metadata):
+        handles.append(source)
+        with shared_image.attach(source) as image:
+            return {**metadata, "size": [image.width(), image.height()]}
+
+    monkeypatch.setattr(batch, "detect_image", _detect_image)
+    image = QtGui.QImage(30, 20, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    data = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(data)
+    buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+
+    out = io.StringIO()
+    image_stream = stream.Stream(pool=pool, out=out, max_in_flight=2, queue_size=2)
+    image_stream.start()
+
+    # WHEN an image file's content is put into the stream
+    try:
+        image_stream.put(data.data(), {"frame": 0})
+        with qtbot.waitSignal(image_stream.com.on_finished):
+            image_stream.close()
+    finally:
+        image_stream.stop()
+
+    # THEN the worker receives the decoded image as handle to shared memory
+    assert isinstance(handles[0], shared_image.ImageHandle)
+    assert json.loads(out.getvalue()) == {"frame": 0, "size": [30, 20]}
+
+    # THEN the shared memory is released after the result got written
+    with pytest.raises(FileNotFoundError), shared_image.attach(handles[0]):
+        pass
+
+
+def test_directory_feeder_detects_new_files(qtbot, monkeypatch, tmp_path, pool):
+    # GIVEN a directory with an already detected image and a new one
+    monkeypatch.setattr(stream, "_SETTLE_TIME", 0.1)
+    monkeypatch.setattr(
+        batch, "detect_image", lambda source, metadata: {**metadata, "results": []}
+    )
+    (tmp_path / "done.png").write_text("")
+    (tmp_path / "old.png").write_text("")
+    past = time.time() - 10
+    for name in ("done.png", "old.png"):
+        os.utime(tmp_path / name, (past, past))
+
+    out = io.StringIO()
+    image_stream = stream.Stream(pool=pool, out=out, max_in_flight=2, queue_size=2)
+    image_stream.start()
+
+    try:
+        # WHEN the directory is watched and further files are added
+        feeder = stream.DirectoryFeeder(
+            tmp_path, image_stream, skip={str(tmp_path / "done.png")}
+        )
+        (tmp_path / "new.png").write_text("")
+        (tmp_path / "notes.txt").write_text("")
+
+        # THEN the images, which aren't detected yet, are detected once
+        qtbot.waitUntil(lambda: image_stream.stats.finished == 2)
+        qtbot.wait(300)
+    finally:
+        image_stream.stop()
+
+    assert not feeder._is_throttled
+    paths = [json.loads(line)["path"] for line in out.getvalue().splitlines()]
+    assert sorted(paths) == [str(tmp_path / "new.png"), str(tmp_path / "old.png")]
@@ -0,0 +1,257 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+import zxingcpp
+from PySide6 import QtCore, QtGui
+
+from normcap.detection.codes import detector
+from normcap.detection.models import DetectionDetails, TextDetector, TextType
+
+
+def _draw_code(image, text, code_format, position, scale=4):
+    code = zxingcpp.write_barcode_to_image(
+        zxingcpp.create_barcode(text, code_format), scale=scale
+    )
+    code_height, code_width = memoryview(code).shape
+    code_image = QtGui.QImage(
+        bytes(memoryview(code)),
+        code_width,
+        code_height,
+        code_width,
+        QtGui.QImage.Format.Format_Grayscale8,
+    )
+    painter = QtGui.QPainter(image)
+    painter.drawImage(*position, code_image)
+    painter.end()
+
+
+def _render_code(text, code_format, size=(1003, 701), position=(300, 200), scale=4):
+    """Draw a code onto a white image, whose width results in padded lines."""
+    image = QtGui.QImage(*size, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    _draw_code(image, text, code_format, position=position, scale=scale)
+    return image
+
+
+def _get_corners_in_region(image, region):
+    details = DetectionDetails()
+    detector.detect_codes(image.copy(region), details=details)
+    return [
+        (x + region.left(), y + region.top()) for x, y in details.codes[0]["corners"]
+    ]
+
+
+def test_image_to_image_view_requires_grayscale():
+    image = QtGui.QImage(10, 10, QtGui.QImage.Format.Format_RGB32)
+    with pytest.raises(ValueError, match="grayscale"):
+        detector._image_to_image_view(image)
+
+
+def test_detect_codes_finds_qr_code():
+    image = _render_code("https://normcap.test", zxingcpp.BarcodeFormat.QRCode)
+    gray_image = image.convertToFormat(QtGui.QImage.Format.Format_Grayscale8)
+    assert gray_image.bytesPerLine() > gray_image.width()  # lines are padded
+    details = DetectionDetails()
+
+    results = detector.detect_codes(image, details=details)
+
+    assert [(r.text, r.text_type, r.detector) for r in results] == [
+        ("https://normcap.test", TextType.URL, TextDetector.QR)
+    ]
+    assert details.codes[0]["format"] == "QRCode"
+
+
+@pytest.mark.parametrize(
+    ("formats", "expected"),
+    [
+        (None, ()),
+        ("all", ()),
+        (["qr", "all"], ()),
+        (
+            "qr",
+            (
+                zxingcpp.BarcodeFormat.QRCode,
+                zxingcpp.BarcodeFormat.MicroQRCode,
+                zxingcpp.BarcodeFormat.RMQRCode,
+            ),
+        ),
+        (
+            ["linear", "datamatrix"],
+            (zxingcpp.BarcodeFormat.DataMatrix, zxingcpp.BarcodeFormat.AllLinear),
+        ),
+    ],
+)
+def test_get_zxing_formats(formats, expected):
+    assert detector._get_zxing_formats(formats) == expected
+
+
+def test_detect_codes_respects_formats():
+    image = _render_code("data matrix", zxingcpp.BarcodeFormat.DataMatrix)
+
+    assert detector.detect_codes(image, formats=["datamatrix"])
+    assert not detector.detect_codes(image, formats=["qr"])
+
+
+def test_detect_codes_on_large_image_scans_lower_resolution(monkeypatch):
+    # GIVEN a 4K image with a QR code
+    image = _render_code(
+        "https://normcap.test", zxingcpp.BarcodeFormat.QRCode, size=(3840, 2160)
+    )
+    scans = []
+    read_barcodes = zxingcpp.read_barcodes
+
+    def _read_barcodes(image_view, **kwargs):
+        results = read_barcodes(image_view, **kwargs)
+        scans.append(kwargs)
+        return results
+
+    monkeypatch.setattr(detector.zxingcpp, "read_barcodes", _read_barcodes)
+    details = DetectionDetails()
+
+    # WHEN codes are detected
+    results = detector.detect_codes(image, details=details)
+
+    # THEN the code is found in a single pass at the lower resolution
+    #    and its position is mapped back to the full resolution
+    assert [r.text for r in results] == ["https://normcap.test"]
+    assert len(scans) == 1
+    expected = _get_corners_in_region(image, QtCore.QRect(0, 0, 1000, 700))
+    for (x, y), (expected_x, expected_y) in zip(
+        details.codes[0]["corners"], expected, strict=True
+    ):
+        assert abs(x - expected_x) <= 2 / detector._PYRAMID_SCALE
+        assert abs(y - expected_y) <= 2 / detector._PYRAMID_SCALE
+
+
+def test_detect_codes_on_large_image_rescans_candidates(monkeypatch):
+    # GIVEN a 4K image with a QR code, which can't be decoded at lower resolution
+    image = _render_code(
+        "https://normcap.test", zxingcpp.BarcodeFormat.QRCode, size=(3840, 2160)
+    )
+    read_barcodes = zxingcpp.read_barcodes
+    scans = []
+
+    def _read_barcodes(image_view, return_errors=False, **kwargs):
+        results = read_barcodes(image_view, return_errors=return_errors, **kwargs)
+        scans.append(kwargs)
+        if return_errors:
+            # Simulate that the code was located, but could not be decoded
+            return [
+                SimpleNamespace(valid=False, text="", position=r.position)
+                for r in results
+            ]
+        return results
+
+    monkeypatch.setattr(detector.zxingcpp, "read_barcodes", _read_barcodes)
+    details = DetectionDetails()
+
+    # WHEN codes are detected
+    results = detector.detect_codes(image, details=details)
+
+    # THEN the region of the code is scanned again in full resolution
+    assert [r.text for r in results] == ["https://normcap.test"]
+    assert len(scans) == 2
+    expected = _get_corners_in_region(image, QtCore.QRect(0, 0, 1000, 700))
+    assert details.codes[0]["corners"] == expected
+
+
+def test_codes_in_region():
+    image = _render_code("https://normcap.test", zxingcpp.BarcodeFormat.QRCode)
+    located_codes = detector.locate_codes(image)
+    left, top = located_codes[0].corners[0]
+
+    inside = detector.codes_in_region(
+        located_codes, QtCore.QRect(left - 10, top - 20, 300, 300)
+    )
+    assert inside[0].corners[0] == (10, 20)
+    assert inside[0].result.text == "https://normcap.test"
+
+    assert not detector.codes_in_region(
+        located_codes, QtCore.QRect(left + 10, top, 300, 300)
+    )
+
+
+@pytest.mark.parametrize("size", [(500, 300), (1024, 1024), (3840, 1080), (5120, 2880)])
+def test_get_tiles_cover_image_with_overlap(size):
+    image = QtGui.QImage(*size, QtGui.QImage.Format.Format_Grayscale8)
+
+    tiles = detector._get_tiles(image)
+
+    assert all(image.rect().contains(t) for t in tiles)
+    covered = QtGui.QRegion()
+    for tile in tiles:
+        covered = covered.united(tile)
+    assert covered == QtGui.QRegion(image.rect())
+
+    # Every square of the overlap's size fits completely into one of the tiles
+    step = detector._TILE_SIZE - detector._TILE_OVERLAP
+    for x in range(0, max(size[0] - detector._TILE_OVERLAP, 0) + 1, step // 2):
+        for y in range(0, max(size[1] - detector._TILE_OVERLAP, 0) + 1, step // 2):
+            square = QtCore.QRect(
+                x, y, detector._TILE_OVERLAP, detector._TILE_OVERLAP
+            ).intersected(image.rect())
+            assert any(t.contains(square) for t in tiles)
+
+
+def test_locate_codes_tiled(monkeypatch):
+    # GIVEN a dual monitor screenshot with codes in different tiles, one of them
+    #    across the border of tiles, and one too large for a single tile
+    image = QtGui.QImage(3840, 1080, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    qr_code = zxingcpp.BarcodeFormat.QRCode
+    _draw_code(image, "first", qr_code, position=(100, 100))
+    _draw_code(image, "border", qr_code, position=(1990, 700))
+    _draw_code(image, "data matrix", zxingcpp.BarcodeFormat.DataMatrix, (3600, 800))
+    _draw_code(image, "large", qr_code, position=(2400, 40), scale=40)
+    expected = detector.locate_codes(image)
+    monkeypatch.setattr(detector.thread_budget, "available_cpus", lambda: 4)
+    scanning_threads = set()
+    read_region = detector._read_region
+
+    def _read_region(*args, **kwargs):
+        scanning_threads.add(threading.current_thread().name)
+        return read_region(*args, **kwargs)
+
+    monkeypatch.setattr(detector, "_read_region", _read_region)
+
+    # WHEN codes are located in tiles
+    codes = detector.locate_codes(image, tiled=True, max_threads=4)
+
+    # THEN the tiles are scanned by several threads
+    assert len(scanning_threads) > 1
+    assert all(name.startswith("scan-tile") for name in scanning_threads)
+
+    #    and all codes are found once, at the same position as in a single scan
+    assert sorted(c.result.text for c in codes) == [
+        "border",
+        "data matrix",
+        "first",
+        "large",
+    ]
+    for code in codes:
+        expected_code = next(e for e in expected if e.result.text == code.result.text)
+        assert code.format == expected_code.format
+        for (x, y), (expected_x, expected_y) in zip(
+            code.corners, expected_code.corners, strict=True
+        ):
+            assert abs(x - expected_x) <= 2 / detector._PYRAMID_SCALE
+            assert abs(y - expected_y) <= 2 / detector._PYRAMID_SCALE
+
+
+def test_locate_codes_tiled_on_small_image_scans_once(monkeypatch):
+    monkeypatch.setattr(detector.thread_budget, "available_cpus", lambda: 4)
+    image = _render_code("https://normcap.test", zxingcpp.BarcodeFormat.QRCode)
+    scans = []
+    read_barcodes = zxingcpp.read_barcodes
+
+    def _read_barcodes(image_view, **kwargs):
+        scans.append(kwargs)
+        return read_barcodes(image_view, **kwargs)
+
+    monkeypatch.setattr(detector.zxingcpp, "read_barcodes", _read_barcodes)
+
+    codes = detector.locate_codes(image, tiled=True, max_threads=4)
+
+    assert [c.result.text for c in codes] == ["https://normcap.test"]
+    assert len(scans) == 1
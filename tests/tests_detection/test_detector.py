@@ -0,0 +1,206 @@
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+from PySide6 import QtGui
+
+from normcap.detection import detector, ocr
+from normcap.detection.codes.models import LocatedCode
+from normcap.detection.models import (
+    DetectionDetails,
+    DetectionMode,
+    DetectionResult,
+    Profile,
+    TextDetector,
+    TextType,
+)
+from normcap.detection.ocr.models import OcrEngine
+from normcap.detection.scheduler import CancellationToken
+
+TEXT_RESULT = DetectionResult(
+    text="text", text_type=TextType.SINGLE_LINE, detector=TextDetector.OCR_PARSED
+)
+
+
+@pytest.fixture
+def detect():
+    def _detect(**kwargs):
+        kwargs.setdefault("detect_mode", DetectionMode.TESSERACT)
+        return detector.detect(
+            image=QtGui.QImage(200, 50, QtGui.QImage.Format.Format_RGB32),
+            tesseract_bin_path=Path("tesseract"),
+            tessdata_path=None,
+            language="eng",
+            parse_text=True,
+            **kwargs,
+        )
+
+    return _detect
+
+
+@pytest.fixture
+def timing_out_profiles(monkeypatch):
+    """Let text detection time out for all profiles except 'fast'."""
+    used_configs = []
+
+    def _detect_text(config, **_):
+        used_configs.append(config)
+        if config.model_variant != "fast":
+            raise subprocess.TimeoutExpired(cmd="tesseract", timeout=1)
+        return [TEXT_RESULT]
+
+    monkeypatch.setattr(detector, "_detect_text", _detect_text)
+    return used_configs
+
+
+def test_detect_retries_with_faster_profile_on_timeout(detect, timing_out_profiles):
+    results = detect(profile=Profile.BEST, timeout=1, retry_on_timeout=True)
+
+    assert results == [TEXT_RESULT]
+    assert [c.model_variant for c in timing_out_profiles] == ["best", "", "fast"]
+
+
+def test_detect_returns_empty_on_timeout_without_retry(detect, timing_out_profiles):
+    details = DetectionDetails()
+    results = detect(
+        profile=Profile.BEST, timeout=1, retry_on_timeout=False, details=details
+    )
+
+    assert results == []
+    assert details.timed_out
+    assert len(timing_out_profiles) == 1
+
+
+def test_detect_returns_empty_when_cancelled(detect, monkeypatch):
+    def _detect_text(cancel_token, **_):
+        cancel_token.cancel()
+        cancel_token.raise_if_cancelled()
+
+    monkeypatch.setattr(detector, "_detect_text", _detect_text)
+
+    token = CancellationToken()
+    results = detect(cancel_token=token)
+
+    assert results == []
+    assert token.is_cancelled
+
+
+def test_detect_aborts_ocr_if_cancelled_during_code_detection(detect, monkeypatch):
+    token = CancellationToken()
+    monkeypatch.setattr(
+        detector.codes.detector, "detect_codes", lambda *_, **__: token.cancel()
+    )
+
+    def _detect_text(cancel_token, **_):
+        assert cancel_token.wait(timeout=5)
+        cancel_token.raise_if_cancelled()
+
+    monkeypatch.setattr(detector, "_detect_text", _detect_text)
+
+    results = detect(
+        cancel_token=token, detect_mode=DetectionMode.CODES | DetectionMode.TESSERACT
+    )
+    assert results == []
+
+
+def test_detect_aborts_ocr_if_codes_are_found(detect, monkeypatch):
+    code_result = DetectionResult(
+        text="code", text_type=TextType.URL, detector=TextDetector.QR
+    )
+    monkeypatch.setattr(
+        detector.codes.detector, "detect_codes", lambda *_, **__: [code_result]
+    )
+    ocr_tokens = []
+
+    def _detect_text(cancel_token, **_):
+        ocr_tokens.append(cancel_token)
+        assert cancel_token.wait(timeout=5)
+        cancel_token.raise_if_cancelled()
+
+    monkeypatch.setattr(detector, "_detect_text", _detect_text)
+
+    token = CancellationToken()
+    results = detect(
+        cancel_token=token, detect_mode=DetectionMode.CODES | DetectionMode.TESSERACT
+    )
+
+    assert results == [code_result]
+    assert ocr_tokens[0].is_cancelled
+    assert not token.is_cancelled
+
+
+def test_detect_runs_code_detection_and_ocr_concurrently(detect, monkeypatch):
+    # GIVEN code detection and OCR, which both take some time
+    delay = 0.5
+
+    def _detect_codes(*_, **__):
+        time.sleep(delay)
+        return []
+
+    def _detect_text(**_):
+        time.sleep(delay)
+        return [TEXT_RESULT]
+
+    monkeypatch.setattr(detector.codes.detector, "detect_codes", _detect_codes)
+    monkeypatch.setattr(detector, "_detect_text", _detect_text)
+
+    # WHEN an image without codes is processed
+    start_time = time.perf_counter()
+    results = detect(detect_mode=DetectionMode.CODES | DetectionMode.TESSERACT)
+    duration = time.perf_counter() - start_time
+
+    # THEN the text is returned, and the code detection did not add latency
+    assert results == [TEXT_RESULT]
+    assert duration < delay * 1.8
+
+
+def test_detect_returns_codes_located_in_advance(detect, monkeypatch):
+    code = LocatedCode(
+        result=DetectionResult(
+            text="code", text_type=TextType.URL, detector=TextDetector.QR
+        ),
+        format="QRCode",
+        corners=[(0, 0), (10, 0), (10, 10), (0, 10)],
+    )
+
+    def _detect(*_, **__):
+        raise AssertionError("Detection should be skipped")
+
+    monkeypatch.setattr(detector.codes.detector, "detect_codes", _detect)
+    monkeypatch.setattr(detector, "_detect_text", _detect)
+    details = DetectionDetails()
+
+    results = detect(
+        detect_mode=DetectionMode.CODES | DetectionMode.TESSERACT,
+        located_codes=[code],
+        details=details,
+    )
+
+    assert results == [code.result]
+    assert details.codes == [code.as_dict()]
+
+
+def test_onnx_engine_falls_back_to_tesseract(tmp_path):
+    backend = detector._get_backend(
+        ocr_engine=OcrEngine.ONNX,
+        tesseract_bin_path=Path("tesseract"),
+        model_path=tmp_path,
+        num_threads=2,
+    )
+    assert isinstance(backend, ocr.tesseract.TesseractBackend)
+    assert backend.omp_thread_limit == 2
+
+
+def test_detect_compiles_text_from_words_recognized_in_advance(detect, monkeypatch):
+    def _detect_text(*_, **__):
+        raise AssertionError("OCR should be skipped")
+
+    monkeypatch.setattr(detector, "_detect_text", _detect_text)
+    words = [{"text": "indexed", "left": 10, "top": 10, "width": 50, "height": 12}]
+    details = DetectionDetails()
+
+    results = detect(indexed_words=words, details=details)
+
+    assert [r.text for r in results] == ["indexed"]
+    assert details.words[0]["text"] == "indexed"
@@ -0,0 +1,151 @@
+import json
+from xml.etree import ElementTree
+
+import pytest
+
+from normcap.detection import output
+from normcap.detection.models import (
+    DetectionDetails,
+    DetectionResult,
+    OutputFormat,
+    TextDetector,
+    TextType,
+)
+
+
+def _word(text, left, top, conf=90.0):
+    return {
+        "text": text,
+        "conf": conf,
+        "left": left,
+        "top": top,
+        "width": 10 * len(text),
+        "height": 10,
+        "block_num": 1,
+        "par_num": 1,
+        "line_num": 1,
+        "word_num": 1,
+    }
+
+
+@pytest.fixture
+def results():
+    return [
+        DetectionResult(
+            text="one two",
+            text_type=TextType.SINGLE_LINE,
+            detector=TextDetector.OCR_RAW,
+        )
+    ]
+
+
+@pytest.fixture
+def details():
+    return DetectionDetails(
+        image_size=(100, 30),
+        profile="balanced",
+        ocr_engine="tesseract",
+        words=[_word("one", 5, 5, conf=91.5), _word("two", 40, 5)],
+        transformer="SINGLE_LINE",
+        transformer_scores={"SINGLE_LINE": 50.0},
+        codes=[{"text": "abc", "format": "QRCode", "corners": [[0, 0]]}],
+        timings={"ocr": 0.1234567},
+    )
+
+
+def test_format_results_json(results, details):
+    # WHEN the results are formatted as JSON
+    text = output.format_results(
+        OutputFormat.JSON, results, details, metadata={"region": {"left": 1}}
+    )
+
+    # THEN all information should be contained
+    data = json.loads(text)
+    assert data["region"] == {"left": 1}
+    assert data["image"] == {"width": 100, "height": 30}
+    assert data["results"][0] == {
+        "text": "one two",
+        "text_type": "SINGLE_LINE",
+        "detector": "OCR_RAW",
+    }
+    assert [w["text"] for w in data["words"]] == ["one", "two"]
+    assert data["words"][0]["conf"] == 91.5
+    assert data["codes"][0]["format"] == "QRCode"
+    assert data["timings"] == {"ocr": 0.123457}
+
+
+def test_format_results_jsonl_is_single_line(results, details):
+    text = output.format_results("jsonl", results, details)
+    assert "\n" not in text
+    assert json.loads(text)["transformer"] == "SINGLE_LINE"
+
+
+def test_format_results_hocr(results, details):
+    text = output.format_results(OutputFormat.HOCR, results, details)
+    assert 'class="ocr_page"' in text
+    assert text.count('class="ocr_line"') == 1
+    assert 'title="bbox 5 5 35 15; x_wconf 92"' in text
+    assert ">two</span>" in text
+
+
+def test_format_results_alto(results, details):
+    text = output.format_results(OutputFormat.ALTO, results, details)
+    assert "<TextLine" in text
+    assert 'CONTENT="one"' in text
+    assert 'WC="0.92"' in text
+    assert text.count("<SP") == 1
+
+
+def test_format_results_text(results, details):
+    assert output.format_results(OutputFormat.TEXT, results, details) == "one two"
+
+
+@pytest.fixture
+def regions(results, details):
+    other_details = DetectionDetails(
+        image_size=(50, 20), words=[_word("three", 5, 5, conf=80.0)]
+    )
+    return [
+        output.Region(results, details, {"region": {"left": 1}}),
+        output.Region([], other_details, {"region": {"left": 2}}),
+    ]
+
+
+def test_format_regions_json_is_array_of_regions(regions):
+    data = json.loads(output.format_regions(OutputFormat.JSON, regions))
+
+    assert [r["region"] for r in data] == [{"left": 1}, {"left": 2}]
+    assert [w["text"] for w in data[1]["words"]] == ["three"]
+
+
+def test_format_regions_jsonl_has_line_per_region(regions):
+    lines = output.format_regions(OutputFormat.JSONL, regions).splitlines()
+
+    assert [json.loads(line)["region"] for line in lines] == [
+        {"left": 1},
+        {"left": 2},
+    ]
+
+
+def test_format_regions_hocr_has_page_per_region(regions):
+    text = output.format_regions(OutputFormat.HOCR, regions)
+
+    html = ElementTree.fromstring(text.split("\n", 2)[2])
+    pages = html.findall(".//{*}div[@class='ocr_page']")
+    assert [p.get("title") for p in pages] == ["bbox 0 0 100 30", "bbox 0 0 50 20"]
+    assert [w.text for w in pages[1].iter() if w.get("class") == "ocrx_word"] == [
+        "three"
+    ]
+    ids = [e.get("id") for e in html.iter() if e.get("id")]
+    assert len(ids) == len(set(ids))
+
+
+def test_format_regions_alto_has_page_per_region(regions):
+    text = output.format_regions(OutputFormat.ALTO, regions)
+
+    alto = ElementTree.fromstring(text.split("\n", 1)[1])
+    pages = alto.findall(".//{*}Page")
+    assert [p.get("WIDTH") for p in pages] == ["100", "50"]
+    assert [s.get("CONTENT") for s in pages[1].findall(".//{*}String")] == ["three"]
+    ids = [e.get("ID") for e in alto.iter() if e.get("ID")]
+    assert len(ids) == len(set(ids))
@@ -0,0 +1,83 @@
+import pytest
+from PySide6 import QtGui
+
+from normcap.detection import profiles
+from normcap.detection.models import Profile
+from normcap.detection.ocr.models import PSM
+
+
+def test_profiles_are_complete():
+    assert set(profiles.PROFILES) == set(Profile)
+
+
+def test_get_config_accepts_name():
+    assert profiles.get_config("fast") == profiles.PROFILES[Profile.FAST]
+
+
+def test_balanced_profile_keeps_previous_defaults():
+    config = profiles.get_config(Profile.BALANCED)
+    assert config.resize_factor == 2
+    assert config.padding_size == 80
+    assert config.code_try_harder
+
+
+@pytest.mark.parametrize(
+    ("profile", "size", "expected_psm"),
+    [
+        (Profile.BALANCED, (600, 30), PSM.AUTO),
+        (Profile.FAST, (600, 30), PSM.SINGLE_LINE),
+        (Profile.FAST, (600, 300), PSM.AUTO),
+        (Profile.BEST, (100, 30), PSM.AUTO),
+        (Profile.BEST, (600, 30), PSM.SINGLE_LINE),
+    ],
+)
+def test_get_psm(profile, size, expected_psm):
+    image = QtGui.QImage(*size, QtGui.QImage.Format.Format_RGB32)
+    psm = profiles.get_psm(config=profiles.get_config(profile), image=image)
+    assert psm == expected_psm
+
+
+def test_get_tessdata_path_uses_variant(tmp_path):
+    tessdata = tmp_path / "tessdata"
+    tessdata_fast = tmp_path / "tessdata_fast"
+    for path in (tessdata, tessdata_fast):
+        path.mkdir()
+        for lang in ("eng", "deu"):
+            (path / f"{lang}.traineddata").touch()
+
+    config = profiles.get_config(Profile.FAST)
+    path = profiles.get_tessdata_path(
+        config=config, tessdata_path=tessdata, languages=["eng", "deu"]
+    )
+    assert path == tessdata_fast
+
+
+@pytest.mark.parametrize(
+    ("profile", "languages"),
+    [
+        (Profile.BALANCED, "eng"),
+        (Profile.FAST, "eng+deu"),  # language missing in variant
+        (Profile.BEST, "eng"),  # variant directory missing
+    ],
+)
+def test_get_tessdata_path_falls_back(tmp_path, profile, languages):
+    tessdata = tmp_path / "tessdata"
+    tessdata_fast = tmp_path / "tessdata_fast"
+    for path in (tessdata, tessdata_fast):
+        path.mkdir()
+    (tessdata / "eng.traineddata").touch()
+    (tessdata / "deu.traineddata").touch()
+    (tessdata_fast / "eng.traineddata").touch()
+
+    config = profiles.get_config(profile)
+    path = profiles.get_tessdata_path(
+        config=config, tessdata_path=tessdata, languages=languages
+    )
+    assert path == tessdata
+
+
+def test_get_tessdata_path_keeps_system_default():
+    config = profiles.get_config(Profile.BEST)
+    assert (
+        profiles.get_tessdata_path(config, tessdata_path=None, languages="eng") is None
+    )
@@ -0,0 +1,200 @@
+import threading
+import time
+
+import pytest
+
+from normcap.detection.scheduler import (
+    CancellationToken,
+    CancelledError,
+    Priority,
+    Scheduler,
+    gather,
+)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler(interactive_workers=1, background_workers=1)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def _wait_for_cancel(token: CancellationToken) -> str:
+    token.wait(timeout=5)
+    token.raise_if_cancelled()
+    return "not cancelled"
+
+
+def test_submit_returns_result(scheduler):
+    job = scheduler.submit(lambda _: 42)
+    assert job.result(timeout=5) == 42
+    assert job.done()
+    assert job.wait_time is not None
+
+
+def test_submit_propagates_exception(scheduler):
+    def _fail(_):
+        raise ValueError("Broken")
+
+    job = scheduler.submit(_fail)
+    with pytest.raises(ValueError, match="Broken"):
+        job.result(timeout=5)
+
+
+def test_cancel_running_job(scheduler):
+    job = scheduler.submit(_wait_for_cancel, priority=Priority.BACKGROUND)
+    while job.started_at is None:
+        time.sleep(0.01)
+
+    job.cancel()
+
+    with pytest.raises(CancelledError):
+        job.result(timeout=5)
+    assert job.cancelled()
+
+
+def test_cancel_queued_job_is_never_started(scheduler):
+    started = []
+    release = threading.Event()
+    blocker = scheduler.submit(lambda _: release.wait(5), priority=Priority.BATCH)
+    job = scheduler.submit(lambda _: started.append(True), priority=Priority.BATCH)
+
+    job.cancel()
+    release.set()
+
+    assert blocker.result(timeout=5)
+    with pytest.raises(CancelledError):
+        job.result(timeout=5)
+    assert not started
+
+
+def test_background_jobs_run_in_priority_order(scheduler):
+    order = []
+    release = threading.Event()
+    blocker = scheduler.submit(lambda _: release.wait(5), priority=Priority.BATCH)
+    jobs = [
+        scheduler.submit(lambda _, p=p: order.append(p), priority=p)
+        for p in (Priority.SPECULATIVE, Priority.BACKGROUND, Priority.BATCH)
+    ]
+
+    release.set()
+    blocker.result(timeout=5)
+    for job in jobs:
+        job.result(timeout=5)
+
+    assert order == [Priority.BATCH, Priority.BACKGROUND, Priority.SPECULATIVE]
+
+
+def test_interactive_job_outranks_busy_background_worker(scheduler):
+    release = threading.Event()
+    background = scheduler.submit(
+        lambda _: release.wait(5), priority=Priority.BACKGROUND, preemptible=False
+    )
+    interactive = scheduler.submit(lambda _: "done", priority=Priority.INTERACTIVE)
+
+    assert interactive.result(timeout=1) == "done"
+    assert not background.done()
+    release.set()
+    assert background.result(timeout=5)
+
+
+def test_interactive_job_preempts_background_job(scheduler):
+    runs = []
+
+    def _background(token: CancellationToken) -> str:
+        runs.append(token)
+        if len(runs) == 1:
+            _wait_for_cancel(token)
+        return "finished"
+
+    background = scheduler.submit(_background, priority=Priority.BACKGROUND)
+    while not runs:
+        time.sleep(0.01)
+
+    interactive = scheduler.submit(lambda _: "done", priority=Priority.INTERACTIVE)
+
+    assert interactive.result(timeout=5) == "done"
+    assert background.result(timeout=5) == "finished"
+    assert len(runs) == 2
+    assert runs[0].is_cancelled
+    assert not runs[1].is_cancelled
+
+
+def test_metrics(scheduler):
+    release = threading.Event()
+    blocker = scheduler.submit(lambda _: release.wait(5), priority=Priority.BATCH)
+    queued = scheduler.submit(lambda _: None, priority=Priority.SPECULATIVE)
+    while blocker.started_at is None:
+        time.sleep(0.01)
+
+    metrics = scheduler.metrics()
+    assert metrics.queue_depth[Priority.SPECULATIVE] == 1
+    assert metrics.running == 1
+
+    time.sleep(0.05)
+    release.set()
+    queued.result(timeout=5)
+
+    metrics = scheduler.metrics()
+    assert metrics.completed == 2
+    assert metrics.queue_depth[Priority.SPECULATIVE] == 0
+    assert metrics.max_wait[Priority.SPECULATIVE] >= 0.05
+
+
+def test_cancellation_token_callbacks():
+    calls = []
+    token = CancellationToken()
+    unregister = token.on_cancel(lambda: calls.append("first"))
+    token.on_cancel(lambda: calls.append("second"))
+    unregister()
+
+    token.cancel()
+    token.cancel()
+    token.on_cancel(lambda: calls.append("late"))
+
+    assert calls == ["second", "late"]
+
+
+def test_submit_after_shutdown_raises(scheduler):
+    scheduler.shutdown()
+    with pytest.raises(RuntimeError, match="shut down"):
+        scheduler.submit(lambda _: None)
+
+
+def test_gather_returns_results_in_order():
+    scheduler = Scheduler(interactive_workers=2, background_workers=1)
+    try:
+        release = threading.Event()
+        slow = scheduler.submit(lambda _: release.wait(5) and "slow")
+        fast = scheduler.submit(lambda _: "fast")
+
+        combined = gather([slow, fast])
+        assert fast.result(timeout=5) == "fast"
+        assert not combined.done()
+
+        release.set()
+        assert combined.result(timeout=5) == ["slow", "fast"]
+        assert combined.started_at is not None
+    finally:
+        scheduler.shutdown()
+
+
+def test_gather_cancels_all_jobs(scheduler):
+    jobs = [scheduler.submit(_wait_for_cancel) for _ in range(2)]
+
+    combined = gather(jobs)
+    combined.cancel()
+
+    with pytest.raises(CancelledError):
+        combined.result(timeout=5)
+    assert all(job.cancelled() for job in jobs)
+
+
+def test_gather_propagates_exception(scheduler):
+    def _fail(_):
+        raise ValueError("Broken")
+
+    combined = gather([scheduler.submit(lambda _: 1), scheduler.submit(_fail)])
+
+    with pytest.raises(ValueError, match="Broken"):
+        combined.result(timeout=5)
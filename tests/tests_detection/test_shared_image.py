@@ -0,0 +1,75 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from PySide6 import QtGui
+
+from normcap.detection.shared_image import ImageHandle, SharedImage, attach
+
+
+@pytest.fixture
+def image():
+    """Image of odd width, where each pixel's gray value encodes its position."""
+    image = QtGui.QImage(7, 5, QtGui.QImage.Format.Format_RGB32)
+    for y in range(image.height()):
+        for x in range(image.width()):
+            value = y * 10 + x
+            image.setPixelColor(x, y, QtGui.QColor(value, value, value))
+    return image
+
+
+def _read_pixels(handle: ImageHandle) -> list[list[int]]:
+    with attach(handle) as tile:
+        return [
+            [tile.pixelColor(x, y).red() for x in range(tile.width())]
+            for y in range(tile.height())
+        ]
+
+
+def test_attach_reads_whole_image(image):
+    with SharedImage(image) as shared:
+        pixels = _read_pixels(shared.handle)
+
+    assert shared.handle.stride % 4 == 0
+    assert pixels[0] == [0, 1, 2, 3, 4, 5, 6]
+    assert pixels[4][6] == 46
+
+
+def test_crop_shares_buffer(image):
+    with SharedImage(image) as shared:
+        handle = shared.handle.crop(left=2, top=3, width=3, height=2)
+        pixels = _read_pixels(handle)
+
+    assert handle.name == shared.handle.name
+    assert handle.offset == 3 * shared.handle.stride + 2
+    assert pixels == [[32, 33, 34], [42, 43, 44]]
+
+
+def test_crop_raises_outside_of_image(image):
+    with SharedImage(image) as shared, pytest.raises(ValueError, match="exceeds"):
+        shared.handle.crop(left=5, top=0, width=3, height=1)
+
+
+@pytest.mark.parametrize(
+    ("overlap", "expected_sizes"),
+    [
+        (0, [(3, 2), (4, 2), (3, 3), (4, 3)]),
+        (1, [(4, 3), (5, 3), (4, 4), (5, 4)]),
+    ],
+)
+def test_tiles_cover_image(image, overlap, expected_sizes):
+    with SharedImage(image) as shared:
+        tiles = shared.tiles(rows=2, cols=2, overlap=overlap)
+
+    assert [(t.width, t.height) for t in tiles] == expected_sizes
+
+
+def test_workers_read_tiles_from_shared_memory(image):
+    with SharedImage(image) as shared:
+        tiles = shared.tiles(rows=1, cols=2)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=2, mp_context=context) as pool:
+            left, right = pool.map(_read_pixels, tiles)
+
+    assert left[1] == [10, 11, 12]
+    assert right[1] == [13, 14, 15, 16]
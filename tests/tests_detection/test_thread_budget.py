@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+
+from normcap.detection import thread_budget
+
+
+@pytest.fixture
+def cpus(monkeypatch):
+    def _set_cpus(count: int):
+        monkeypatch.setattr(thread_budget, "available_cpus", lambda: count)
+
+    return _set_cpus
+
+
+@pytest.mark.parametrize(
+    ("available", "kwargs", "expected"),
+    [
+        (32, {}, (1, 4)),
+        (32, {"pixels": 10_000}, (1, 1)),
+        (32, {"job_size": 100}, (32, 1)),
+        (32, {"job_size": 8}, (8, 4)),
+        (32, {"job_size": 8, "concurrent_jobs": 4}, (8, 1)),
+        (32, {"max_threads": 2}, (1, 2)),
+        (32, {"job_size": 8, "max_threads": 3}, (3, 1)),
+        (2, {"concurrent_jobs": 5}, (1, 1)),
+        (1, {"job_size": 10}, (1, 1)),
+    ],
+)
+def test_plan(cpus, available, kwargs, expected):
+    cpus(available)
+    budget = thread_budget.plan(**kwargs)
+    assert budget == expected
+
+
+def test_plan_logs_decision(cpus, caplog):
+    cpus(8)
+    with caplog.at_level(logging.DEBUG):
+        budget = thread_budget.plan(job_size=2)
+    assert str(budget) in caplog.text
+
+
+def test_reserve_shares_cpus_between_concurrent_jobs(cpus):
+    cpus(8)
+    with thread_budget.reserve(job_size=8) as first:
+        with thread_budget.reserve(job_size=8) as second:
+            assert second.workers < first.workers
+        with thread_budget.reserve(job_size=8) as third:
+            assert third == second
+
+    with thread_budget.reserve(job_size=8) as fourth:
+        assert fourth == first
+
+
+def test_available_cpus():
+    assert thread_budget.available_cpus() >= 1
@@ -0,0 +1,66 @@
+import pytest
+
+from normcap.detection.ocr.index import WordIndex
+
+
+def _word(text, left, top, width=60, height=12):
+    return {"text": text, "left": left, "top": top, "width": width, "height": height}
+
+
+@pytest.fixture
+def word_index():
+    return WordIndex(
+        [
+            _word("top-left", 10, 10),
+            _word("wide", 50, 100, width=300),
+            _word("bottom-right", 900, 600),
+            _word(" ", 20, 20),
+            {"text": "no box"},
+        ],
+        cell_size=64,
+    )
+
+
+def test_word_index_skips_empty_words_and_words_without_box(word_index):
+    assert len(word_index) == 3
+
+
+def test_word_index_query_returns_words_in_region_coordinates(word_index):
+    words = word_index.query(0, 0, 400, 200)
+
+    assert [w["text"] for w in words] == ["top-left", "wide"]
+    assert (words[1]["left"], words[1]["top"]) == (50, 100)
+
+    words = word_index.query(800, 500, 200, 200)
+
+    assert [(w["text"], w["left"], w["top"]) for w in words] == [
+        ("bottom-right", 100, 100)
+    ]
+
+
+def test_word_index_query_selects_words_by_center(word_index):
+    # The center of the word "wide" is at (200, 106)
+    assert [w["text"] for w in word_index.query(190, 90, 20, 20)] == ["wide"]
+    assert word_index.query(0, 90, 190, 30) == []
+
+
+def test_word_index_query_returns_words_spanning_several_cells_once(word_index):
+    words = word_index.query(0, 0, 1000, 1000)
+
+    assert [w["text"] for w in words] == ["top-left", "wide", "bottom-right"]
+
+
+@pytest.mark.parametrize(
+    ("position", "expected"),
+    [
+        ((10, 10), "top-left"),
+        ((69, 21), "top-left"),
+        ((70, 10), None),
+        ((340, 105), "wide"),
+        ((500, 500), None),
+    ],
+)
+def test_word_index_word_at(word_index, position, expected):
+    word = word_index.word_at(*position)
+
+    assert (word["text"] if word else None) == expected
@@ -0,0 +1,136 @@
+import os
+import time
+
+import pytest
+
+from normcap.detection.ocr import layout
+
+
+def _words(lines, left=0, top=0, height=10, line_spacing=15, char_width=6):
+    """Create word records for lines of text, typeset with a monospace font."""
+    words = []
+    for line_idx, line in enumerate(lines):
+        x = left
+        for text in line.split(" "):
+            if text:
+                words.append(
+                    {
+                        "block_num": 1,
+                        "par_num": 1,
+                        "line_num": 1,
+                        "left": x,
+                        "top": top + line_idx * line_spacing,
+                        "width": len(text) * char_width,
+                        "height": height,
+                        "text": text,
+                    }
+                )
+            x += (len(text) + 1) * char_width
+    return words
+
+
+def test_reconstruct_splits_columns_below_heading():
+    heading = _words(["A heading spanning over both columns"], left=0, top=0)
+    left_column = _words(["left one", "left two", "left three"], left=0, top=30)
+    right_column = _words(["right one", "right two"], left=150, top=30)
+
+    # Tesseract order and numbering are ignored
+    blocks = layout.reconstruct(right_column + left_column + heading)
+
+    assert layout.to_text(blocks, block_sep="|", line_sep="/") == (
+        "A heading spanning over both columns"
+        "|left one/left two/left three"
+        "|right one/right two"
+    )
+
+
+def test_reconstruct_merges_words_on_same_baseline():
+    small = _words(["small text"], top=10, height=10)
+    big = _words(["BIG"], left=100, top=0, height=20, char_width=12)
+
+    blocks = layout.reconstruct(big + small)
+
+    assert len(blocks) == 1
+    assert len(blocks[0].paragraphs) == 1
+    assert layout.to_text(blocks) == "small text BIG"
+
+
+def test_reconstruct_splits_paragraphs_by_font_size():
+    words = (
+        _words(["small one", "small two"], height=10, line_spacing=14)
+        + _words(["large one", "large two"], top=28, height=16, line_spacing=20)
+        + _words(["huge"], top=68, height=24)
+    )
+
+    blocks = layout.reconstruct(words)
+
+    assert len(blocks) == 1
+    assert [len(p.lines) for p in blocks[0].paragraphs] == [2, 2, 1]
+    assert layout.to_text(blocks, line_sep=" ", par_sep=os.linesep) == os.linesep.join(
+        ["small one small two", "large one large two", "huge"]
+    )
+
+
+def test_reconstruct_splits_sections_at_vertical_gaps():
+    words = _words(["first paragraph", "continues"]) + _words(
+        ["second paragraph"], top=50
+    )
+
+    blocks = layout.reconstruct(words)
+
+    assert [layout.to_text([b], line_sep=" ") for b in blocks] == [
+        "first paragraph continues",
+        "second paragraph",
+    ]
+
+
+def test_reconstruct_keeps_wide_spaced_single_line_together():
+    words = _words(["File"]) + _words(["Edit"], left=100) + _words(["View"], left=200)
+
+    blocks = layout.reconstruct(words)
+
+    assert layout.to_text(blocks) == "File Edit View"
+
+
+@pytest.mark.parametrize(
+    ("words", "expected"),
+    [
+        ([], ""),
+        (
+            [
+                {"text": "one", "block_num": 1, "par_num": 1, "line_num": 1},
+                {"text": "two", "block_num": 1, "par_num": 1, "line_num": 2},
+                {"text": "three", "block_num": 1, "par_num": 2, "line_num": 1},
+                {"text": "four", "block_num": 2, "par_num": 1, "line_num": 1},
+            ],
+            "one/two|three#four",
+        ),
+    ],
+)
+def test_reconstruct_falls_back_to_tesseract_numbers(words, expected):
+    blocks = layout.reconstruct(words)
+    text = layout.to_text(blocks, block_sep="#", par_sep="|", line_sep="/")
+    assert text == expected
+
+
+def test_reconstruct_is_fast_for_many_words():
+    lines = [" ".join(f"w{i}x{j}" for j in range(20)) for i in range(150)]
+    words = _words(lines) + _words(lines, left=1000)
+
+    start = time.perf_counter()
+    blocks = layout.reconstruct(words)
+    duration = time.perf_counter() - start
+
+    assert len(blocks) == 2
+    assert sum(len(p.lines) for b in blocks for p in b.paragraphs) == 300
+    assert duration < 1
+
+
+def test_reconstruct_splits_many_sections_in_one_cut():
+    # GIVEN more sections than the recursion limit allows levels of cuts
+    words = [w for i in range(1500) for w in _words([f"section {i}"], top=i * 40)]
+
+    blocks = layout.reconstruct(words)
+
+    assert len(blocks) == 1500
+    assert layout.to_text([blocks[-1]]) == "section 1499"
@@ -0,0 +1,122 @@
+import pytest
+from PySide6 import QtCore, QtGui
+
+from normcap.detection import ocr
+from normcap.detection.ocr.memo import BlockMemo
+
+CONFIG = ("TesseractBackend", "eng")
+
+
+def _word(text, left, top, width=60, height=12):
+    return {
+        "text": text,
+        "conf": 90,
+        "left": left,
+        "top": top,
+        "width": width,
+        "height": height,
+        "block_num": 1,
+        "par_num": 1,
+        "line_num": 1,
+        "word_num": 1,
+    }
+
+
+@pytest.fixture
+def screenshot():
+    image = QtGui.QImage(400, 200, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    painter = QtGui.QPainter(image)
+    painter.fillRect(QtCore.QRect(100, 50, 60, 12), QtGui.QColor("black"))
+    painter.fillRect(QtCore.QRect(300, 150, 60, 12), QtGui.QColor("black"))
+    painter.end()
+    return image
+
+
+def test_memo_reuses_block_in_larger_region(screenshot):
+    # GIVEN a block was recognized in a small region of the screenshot
+    memo = BlockMemo()
+    small = memo.region(left=70, top=30)
+    small.store(screenshot.copy(70, 30, 120, 50), CONFIG, [_word("old", 30, 20)])
+
+    # WHEN a larger region containing the block is looked up
+    blocks = memo.region(left=0, top=0).lookup(screenshot, CONFIG)
+
+    # THEN the block should be found in coordinates of the larger region
+    assert len(memo) == 1
+    assert [(w["text"], w["left"], w["top"]) for b in blocks for w in b] == [
+        ("old", 100, 50)
+    ]
+
+
+def test_memo_ignores_changed_pixels_and_other_config(screenshot):
+    memo = BlockMemo()
+    memo.region(left=0, top=0).store(screenshot, CONFIG, [_word("old", 100, 50)])
+
+    changed = screenshot.copy()
+    changed.setPixel(110, 55, QtGui.QColor("white").rgb())
+
+    assert memo.region(left=0, top=0).lookup(screenshot, CONFIG)
+    assert not memo.region(left=0, top=0).lookup(changed, CONFIG)
+    assert not memo.region(left=0, top=0).lookup(screenshot, ("other",))
+
+
+def test_memo_skips_blocks_at_region_border(screenshot):
+    memo = BlockMemo()
+
+    # Block touches the right border of the region, it might be cut off
+    memo.region(left=80, top=40).store(
+        screenshot.copy(80, 40, 85, 40), CONFIG, [_word("cut", 20, 10, width=65)]
+    )
+
+    assert len(memo) == 0
+
+
+def test_mask_paints_blocks_in_background_color(screenshot):
+    masked = ocr.memo.mask(screenshot, [[_word("old", 100, 50)]])
+
+    assert QtGui.QColor(masked.pixel(130, 56)) == QtGui.QColor("white")
+    assert QtGui.QColor(masked.pixel(330, 156)) == QtGui.QColor("black")
+
+
+def test_get_text_from_image_reuses_memorized_blocks(screenshot):
+    class _Backend:
+        install_instructions = ""
+
+        def __init__(self, words):
+            self.words = words
+
+        def is_installed(self):
+            return True
+
+        def recognize(self, image, args, timeout=None, cancel_token=None):
+            self.image = image
+            return self.words
+
+    memo = BlockMemo()
+
+    # GIVEN the upper block was recognized before
+    ocr.recognize.get_text_from_image(
+        tesseract_bin_path="not-used",
+        image=screenshot.copy(0, 0, 400, 100),
+        languages="eng",
+        parse=False,
+        backend=_Backend([_word("upper", 100, 50)]),
+        memo=memo.region(left=0, top=0),
+    )
+
+    # WHEN the whole screenshot gets recognized
+    backend = _Backend([_word("lower", 300, 150)])
+    results = ocr.recognize.get_text_from_image(
+        tesseract_bin_path="not-used",
+        image=screenshot,
+        languages="eng",
+        parse=False,
+        backend=backend,
+        memo=memo.region(left=0, top=0),
+    )
+
+    # THEN the upper block should have been masked and its words reused
+    assert QtGui.QColor(backend.image.pixel(130, 56)) == QtGui.QColor("white")
+    assert results[0].text.split() == ["upper", "lower"]
+    assert len(memo) == 2
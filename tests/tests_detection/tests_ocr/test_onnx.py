@@ -0,0 +1,132 @@
+import pytest
+from PySide6 import QtCore, QtGui
+
+from normcap.detection.ocr import onnx
+
+np = pytest.importorskip("numpy")
+
+
+def test_find_regions_connects_diagonal_and_u_shaped_runs():
+    mask = np.array(
+        [
+            [1, 0, 1, 0, 0, 0],
+            [1, 0, 1, 0, 0, 1],
+            [1, 1, 1, 0, 0, 1],
+            [0, 0, 0, 1, 0, 0],
+            [0, 0, 0, 0, 0, 0],
+        ],
+        dtype=bool,
+    )
+    regions = onnx._find_regions(mask)
+    assert sorted(regions) == [(0, 0, 4, 4), (5, 1, 6, 3)]
+
+
+def test_get_text_boxes_scales_and_filters_by_score():
+    prob_map = np.zeros((40, 100), dtype=np.float32)
+    prob_map[10:20, 10:50] = 0.9  # confident text
+    prob_map[25:35, 60:90] = 0.4  # above pixel but below box threshold
+    prob_map[0:1, 0:1] = 0.9  # too small
+
+    boxes = onnx._get_text_boxes(prob_map, scale_x=2, scale_y=2, width=200, height=80)
+
+    assert len(boxes) == 1
+    box = boxes[0]
+    # Box is unclipped and mapped to the input image
+    assert box.left < 20
+    assert box.right > 100
+    assert box.top < 20
+    assert box.bottom > 40
+    assert box.score == pytest.approx(0.9)
+
+
+def test_decode_ctc_and_split_words():
+    chars = ["", "a", "b", " "]
+    # Time steps: a a - b - ␣ a -
+    steps = [1, 1, 0, 2, 0, 3, 1, 0]
+    probs = np.full((len(steps), len(chars)), 0.1, dtype=np.float32)
+    for step, idx in enumerate(steps):
+        probs[step, idx] = 0.8
+
+    decoded = onnx._decode_ctc(probs, chars)
+    assert "".join(c.text for c in decoded) == "ab a"
+
+    box = onnx._Box(left=100, top=0, right=180, bottom=20, score=1)
+    words = onnx._split_words(decoded, box=box, num_steps=len(steps))
+    assert [w[0] for w in words] == ["ab", "a"]
+    assert words[0][1:3] == (100, 140)
+    assert words[1][1:3] == (160, 170)
+    assert words[0][3] == pytest.approx(80)
+
+
+def test_group_lines():
+    first_right = onnx._Box(left=50, top=0, right=90, bottom=10, score=1)
+    first_left = onnx._Box(left=0, top=2, right=40, bottom=12, score=1)
+    second = onnx._Box(left=0, top=20, right=40, bottom=30, score=1)
+
+    lines = onnx._group_lines([second, first_right, first_left])
+
+    assert lines == [[first_left, first_right], [second]]
+
+
+def test_image_to_array_ignores_row_padding():
+    image = QtGui.QImage(3, 2, QtGui.QImage.Format.Format_RGB888)
+    image.fill(QtGui.QColor(10, 20, 30))
+    image.setPixelColor(QtCore.QPoint(2, 1), QtGui.QColor(1, 2, 3))
+    assert image.bytesPerLine() > 3 * 3
+
+    rgb = onnx._image_to_array(image)
+
+    assert rgb.shape == (2, 3, 3)
+    assert rgb[0, 0].tolist() == [10, 20, 30]
+    assert rgb[1, 2].tolist() == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [((100, 10), (96, 32)), ((1920, 960), (960, 480)), ((20, 20), (32, 32))],
+)
+def test_get_detection_size(size, expected):
+    assert onnx._get_detection_size(*size) == expected
+
+
+def test_is_installed_requires_model_files(tmp_path):
+    pytest.importorskip("onnxruntime")
+    backend = onnx.OnnxBackend(model_path=tmp_path)
+    assert not backend.is_installed()
+
+    for file_name in (onnx.DET_MODEL_FILE, onnx.REC_MODEL_FILE, onnx.DICT_FILE):
+        (tmp_path / file_name).touch()
+    assert backend.is_installed()
+
+
+def test_recognize_returns_word_records(monkeypatch):
+    class _Input:
+        name = "x"
+
+    class _DetSession:
+        def get_inputs(self):
+            return [_Input()]
+
+        def run(self, _, inputs):
+            _, _, height, width = inputs["x"].shape
+            prob_map = np.zeros((1, 1, height, width), dtype=np.float32)
+            prob_map[0, 0, 8:16, 8:56] = 0.9
+            return [prob_map]
+
+    class _RecSession(_DetSession):
+        def run(self, _, inputs):
+            probs = np.zeros((1, 4, 3), dtype=np.float32)
+            probs[0, [0, 1, 2, 3], [1, 0, 2, 0]] = 1
+            return [probs]
+
+    monkeypatch.setattr(
+        onnx, "_load_models", lambda *_: (_DetSession(), _RecSession(), ["", "a", "b"])
+    )
+    image = QtGui.QImage(64, 32, QtGui.QImage.Format.Format_RGB32)
+
+    words = onnx.OnnxBackend(model_path="models").recognize(image=image, args=None)
+
+    assert [w["text"] for w in words] == ["ab"]
+    assert words[0]["line_num"] == 1
+    assert words[0]["conf"] == pytest.approx(100)
+    assert 0 <= words[0]["left"] < 8
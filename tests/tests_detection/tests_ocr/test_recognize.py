@@ -1,9 +1,11 @@
+import os
 from difflib import SequenceMatcher
 
 import pytest
 from PySide6 import QtGui
 
 from normcap.detection import ocr
+from normcap.detection.models import DetectionDetails
 
 from .testcases import testcases
 
@@ -27,3 +29,93 @@ def test_remove_spaces_in_chi(testcase, tesseract_cmd):
         result.text,
         testcase.transformed,
     )
+
+
+def test_get_text_from_image_uses_backend():
+    class _Backend:
+        install_instructions = ""
+
+        def is_installed(self):
+            return True
+
+        def recognize(self, image, args, timeout=None, cancel_token=None):
+            self.args = args
+            return [
+                {"block_num": 1, "par_num": 1, "line_num": 1, "conf": 90, "text": t}
+                for t in ("from", "backend")
+            ]
+
+    backend = _Backend()
+    results = ocr.recognize.get_text_from_image(
+        tesseract_bin_path="not-used",
+        image=QtGui.QImage(100, 20, QtGui.QImage.Format.Format_RGB32),
+        languages=["eng", "deu"],
+        parse=False,
+        backend=backend,
+    )
+
+    assert backend.args.lang == "eng+deu"
+    assert [r.text for r in results] == ["from backend"]
+
+
+def test_get_text_from_image_fills_details():
+    class _Backend:
+        install_instructions = ""
+
+        def is_installed(self):
+            return True
+
+        def recognize(self, image, args, timeout=None, cancel_token=None):
+            return [
+                {
+                    "block_num": 1,
+                    "par_num": 1,
+                    "line_num": 1,
+                    "conf": 90,
+                    "text": "word",
+                    "left": 30,
+                    "top": 20,
+                    "width": 40,
+                    "height": 20,
+                }
+            ]
+
+    details = DetectionDetails()
+    ocr.recognize.get_text_from_image(
+        tesseract_bin_path="not-used",
+        image=QtGui.QImage(100, 20, QtGui.QImage.Format.Format_RGB32),
+        languages="eng",
+        resize_factor=2,
+        padding_size=10,
+        backend=_Backend(),
+        details=details,
+    )
+
+    word = details.words[0]
+    assert (word["left"], word["top"], word["width"], word["height"]) == (10, 5, 20, 10)
+    assert details.transformer == "SINGLE_LINE"
+    assert {"ocr_preprocess", "ocr_recognize", "ocr_transform"} <= set(details.timings)
+
+
+def test_get_text_from_words():
+    # GIVEN words cut from a larger layout, with their original numbers
+    words = [
+        {"text": "second", "left": 80, "top": 40, "width": 60, "height": 20},
+        {"text": "first", "left": 10, "top": 40, "width": 60, "height": 20},
+        {"text": "next", "left": 10, "top": 70, "width": 40, "height": 20},
+    ]
+    words = [{**w, "block_num": 5, "par_num": 2, "line_num": 7} for w in words]
+    details = DetectionDetails()
+
+    # WHEN text is compiled from them
+    results = ocr.recognize.get_text_from_words(
+        languages="eng", words=words, parse=False, details=details
+    )
+
+    # THEN the words are numbered according to their layout
+    assert results[0].text == f"first second{os.linesep}next"
+    assert [(w["text"], w["line_num"]) for w in details.words] == [
+        ("first", 1),
+        ("second", 1),
+        ("next", 2),
+    ]
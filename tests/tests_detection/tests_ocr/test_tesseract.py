@@ -1,10 +1,14 @@
 import subprocess
 import sys
+import threading
+import time
+from pathlib import Path
 
 import pytest
 from PySide6 import QtGui
 
 from normcap.detection.ocr import tesseract
+from normcap.detection.scheduler import CancellationToken, CancelledError
 
 
 @pytest.mark.skipif(sys.platform == "win32", reason="Not implemented for Windows")
@@ -66,3 +70,45 @@ def test_ocr_perform_raises_on_wrong_cmd():
         _ = tesseract.perform_ocr(
             tesseract_bin_path=tesseract_cmd, image=img, args=[""]
         )
+
+
+def test_perform_ocr_limits_omp_threads(monkeypatch):
+    captured_kwargs = {}
+
+    def mocked_run(cmd_args, **kwargs):
+        captured_kwargs.update(kwargs)
+        with Path(f"{cmd_args[2]}.tsv").open("w", encoding="utf-8") as fh:
+            fh.write("level\ttext\n")
+        return subprocess.CompletedProcess(args=cmd_args, returncode=0, stdout="")
+
+    monkeypatch.setattr(tesseract.subprocess, "run", mocked_run)
+    img = QtGui.QImage(200, 50, QtGui.QImage.Format.Format_RGB32)
+    _ = tesseract.perform_ocr(
+        tesseract_bin_path="tesseract", image=img, args=[], omp_thread_limit=2
+    )
+
+    assert captured_kwargs["env"]["OMP_THREAD_LIMIT"] == "2"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Not implemented for Windows")
+def test_run_command_kills_process_on_cancel():
+    token = CancellationToken()
+    threading.Timer(0.1, token.cancel).start()
+
+    start = time.monotonic()
+    with pytest.raises(CancelledError):
+        _ = tesseract._run_command(cmd_args=["sleep", "10"], cancel_token=token)
+
+    assert time.monotonic() - start < 5
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Not implemented for Windows")
+@pytest.mark.parametrize("cancel_token", [None, CancellationToken()])
+def test_run_command_raises_on_timeout(cancel_token):
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        _ = tesseract._run_command(
+            cmd_args=["sleep", "10"], timeout=0.1, cancel_token=cancel_token
+        )
+
+    assert time.monotonic() - start < 5
@@ -18,6 +18,7 @@ from normcap.detection.ocr.models import Transformer
                 Transformer.PARAGRAPH: 50,
                 Transformer.MAIL: 0,
                 Transformer.URL: 0,
+                Transformer.TABLE: 0,
             },
         ),
         (
@@ -37,6 +38,7 @@ from normcap.detection.ocr.models import Transformer
                 Transformer.PARAGRAPH: 0,
                 Transformer.MAIL: 0,
                 Transformer.URL: 78,
+                Transformer.TABLE: 0,
             },
         ),
     ],
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from normcap.detection.ocr import transformer
+from normcap.detection.ocr.models import Transformer
+from normcap.detection.ocr.transformers.table import TableTransformer
+
+
+def _grid(rows, col_lefts=(0, 120, 240), top=0, row_height=20, height=10):
+    """Create word records for table rows, cells separated by '|'."""
+    words = []
+    for row_idx, row in enumerate(rows):
+        for cell, left in zip(row.split("|"), col_lefts, strict=False):
+            x = left
+            for text in cell.split():
+                words.append(
+                    {
+                        "block_num": 1,
+                        "par_num": 1,
+                        "line_num": row_idx + 1,
+                        "left": x,
+                        "top": top + row_idx * row_height,
+                        "width": len(text) * 6,
+                        "height": height,
+                        "conf": 90,
+                        "text": text,
+                    }
+                )
+                x += (len(text) + 1) * 6
+    return words
+
+
+def test_table_transforms_to_tsv(ocr_result):
+    ocr_result.words = _grid(
+        [
+            "Name|Amount|Due date",
+            "Rent|1200|Jan 1",
+            "Power bill|80|",
+            "Phone|25|Jan 15",
+        ]
+    )
+
+    score = TableTransformer.score(ocr_result)
+    transformed = TableTransformer.transform(ocr_result)
+
+    assert score == pytest.approx(100 * 11 / 12)
+    assert transformed == [
+        os.linesep.join(
+            [
+                "Name\tAmount\tDue date",
+                "Rent\t1200\tJan 1",
+                "Power bill\t80\t",
+                "Phone\t25\tJan 15",
+            ]
+        )
+    ]
+
+
+def test_table_wins_over_other_transformers(ocr_result):
+    ocr_result.words = _grid(["a|b|c", "d|e|f", "g|h|i"])
+
+    result = transformer.apply(ocr_result)
+
+    assert result.best_scored_transformer == Transformer.TABLE
+    assert result.parsed == [os.linesep.join(["a\tb\tc", "d\te\tf", "g\th\ti"])]
+
+
+def test_table_keeps_title_row_in_first_column(ocr_result):
+    ocr_result.words = _grid(
+        ["A very long title spanning columns", "k1|v1", "k2|v2"], col_lefts=(0, 240)
+    )
+
+    transformed = TableTransformer.transform(ocr_result)
+
+    assert transformed == [
+        os.linesep.join(["A very long title spanning columns\t", "k1\tv1", "k2\tv2"])
+    ]
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        ["single|row|only"],
+        ["no wide gaps", "in these lines"],
+        [
+            "some longer prose in a first column|and more prose in the second one",
+            "which continues over multiple lines|just like in a newspaper layout",
+        ],
+    ],
+)
+def test_table_scores_zero_for_non_tables(ocr_result, rows):
+    ocr_result.words = _grid(rows, col_lefts=(0, 300))
+    assert TableTransformer.score(ocr_result) == 0
+
+
+def test_table_scores_zero_without_boxes(ocr_result):
+    ocr_result.words = [{"text": "a", "block_num": 1, "par_num": 1, "line_num": 1}]
+    assert TableTransformer.score(ocr_result) == 0
+
+
+def test_table_is_fast_for_many_cells(ocr_result):
+    lefts = tuple(range(0, 1200, 120))
+    ocr_result.words = _grid(
+        ["|".join(f"r{r}c{c}" for c in range(10)) for r in range(100)],
+        col_lefts=lefts,
+    )
+
+    start = time.perf_counter()
+    score = TableTransformer.score(ocr_result)
+    transformed = TableTransformer.transform(ocr_result)
+    duration = time.perf_counter() - start
+
+    assert score == 100
+    assert transformed[0].count("\t") == 100 * 9
+    assert duration < 1
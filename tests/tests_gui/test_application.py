@@ -1,7 +1,20 @@
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
+from PySide6 import QtCore, QtGui
 
-from normcap.detection import ocr
+from normcap.detection import codes, detector, ocr
+from normcap.detection.codes.models import LocatedCode
+from normcap.detection.models import DetectionResult, TextDetector, TextType
+from normcap.detection.scheduler import Priority
+from normcap.gui.dbus_application_service import DBusApplicationService
 from normcap.gui.settings import Settings
+from normcap.gui.socket_server import RecognizeRequest
+from normcap.system import info
+from normcap.system.models import Rect
 
 
 def test_debug_language_manager_is_deactivated(qapp):
@@ -31,3 +44,546 @@ def test_sanitize_active_language(qapp, monkeypatch, active, available, sanitize
     finally:
         for k in settings.allKeys():
             settings.remove(k)
+
+
+def test_run_detection_processes_result_of_worker_thread(qapp, qtbot, monkeypatch):
+    # GIVEN a detection that takes some time
+    #   and a screenshot on which a region got selected
+    results = [
+        DetectionResult(
+            text="Hello", text_type=TextType.SINGLE_LINE, detector=TextDetector.OCR_RAW
+        )
+    ]
+
+    def _slow_detect(**_):
+        time.sleep(0.1)
+        return results
+
+    monkeypatch.setattr(detector, "detect", _slow_detect)
+    monkeypatch.setattr(qapp, "_minimize_to_tray_or_exit", lambda **_: None)
+    copied = {}
+    monkeypatch.setattr(qapp, "_copy_to_clipboard", copied.update)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"notification": False}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+
+    try:
+        # WHEN the detection is started
+        with qtbot.waitSignal(qapp.com.on_detection_finished, timeout=5000):
+            qapp._run_detection(
+                rect=Rect(left=0, top=0, right=99, bottom=99), screen_idx=0
+            )
+            # THEN the UI stays responsive while the detection runs in background
+            assert copied == {}
+
+        # THEN the result is processed in the main thread
+        qtbot.waitUntil(lambda: copied == {"text": "Hello"})
+    finally:
+        settings.clear()
+
+
+def test_cancel_detection_discards_result(qapp, qtbot, monkeypatch):
+    # GIVEN a detection which runs until it gets cancelled
+    def _detect_until_cancelled(cancel_token, **_):
+        cancel_token.wait(timeout=5)
+        return []
+
+    monkeypatch.setattr(detector, "detect", _detect_until_cancelled)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    minimize_calls = []
+    monkeypatch.setattr(
+        qapp, "_minimize_to_tray_or_exit", lambda **kw: minimize_calls.append(kw)
+    )
+    copied = {}
+    monkeypatch.setattr(qapp, "_copy_to_clipboard", copied.update)
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(organization="normcap_TEST")
+    monkeypatch.setattr(qapp, "settings", settings)
+
+    try:
+        qapp._run_detection(rect=Rect(left=0, top=0, right=99, bottom=99), screen_idx=0)
+        assert qapp.tray.is_processing
+
+        # WHEN the detection gets cancelled (e.g. by clicking the tray icon)
+        with qtbot.waitSignal(qapp.com.on_detection_finished, timeout=1000):
+            qapp.tray.com.on_cancel_clicked.emit()
+
+        # THEN nothing is copied and NormCap minimizes or exits
+        qtbot.waitUntil(lambda: minimize_calls == [{"delay": 0}])
+        assert copied == {}
+        assert not qapp.tray.is_processing
+    finally:
+        settings.clear()
+
+
+def test_code_scan_provides_codes_inside_selection(qapp, qtbot, monkeypatch):
+    # GIVEN a code located on the screenshot by the speculative scan
+    code = LocatedCode(
+        result=DetectionResult(
+            text="code", text_type=TextType.URL, detector=TextDetector.QR
+        ),
+        format="QRCode",
+        corners=[(50, 50), (80, 50), (80, 80), (50, 80)],
+    )
+    monkeypatch.setattr(codes.detector, "locate_codes", lambda *_, **__: [code])
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"detect_codes": True}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+
+    try:
+        # WHEN the scan has finished
+        qapp._start_code_scans()
+        qtbot.waitUntil(qapp._code_scans[0].done)
+
+        # THEN codes inside the selection are provided in its coordinates
+        inside = qapp._get_scanned_codes(
+            rect=Rect(left=40, top=30, right=99, bottom=99), screen_idx=0
+        )
+        assert [c.corners[0] for c in inside] == [(10, 20)]
+
+        #    and codes cut by the selection are ignored
+        outside = qapp._get_scanned_codes(
+            rect=Rect(left=60, top=30, right=99, bottom=99), screen_idx=0
+        )
+        assert outside == []
+    finally:
+        settings.clear()
+
+
+def test_text_index_provides_words_inside_selection(qapp, qtbot, monkeypatch):
+    # GIVEN the background recognition finds words on the screenshot
+    words = [
+        {"text": "inside", "left": 50, "top": 50, "width": 30, "height": 10},
+        {"text": "outside", "left": 150, "top": 50, "width": 30, "height": 10},
+    ]
+    detect_calls = []
+
+    def _detect(details, **kwargs):
+        detect_calls.append(kwargs)
+        details.words = words
+        return []
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"ocr_background": True}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+
+    try:
+        # WHEN the recognition has finished
+        qapp._start_text_indexing()
+        qtbot.waitUntil(qapp._word_indexes[0].done)
+
+        # THEN the whole screenshot was recognized without timeout
+        assert detect_calls[0]["image"] is qapp.screens[0].screenshot
+        assert detect_calls[0]["timeout"] is None
+
+        #    and the words inside the selection are provided in its coordinates
+        inside = qapp._get_indexed_words(
+            rect=Rect(left=40, top=30, right=99, bottom=99), screen_idx=0
+        )
+        assert [(w["text"], w["left"], w["top"]) for w in inside] == [
+            ("inside", 10, 20)
+        ]
+    finally:
+        settings.clear()
+        qapp._word_indexes = {}
+
+
+def test_text_index_gets_applied_to_window(qapp, qtbot, monkeypatch):
+    # GIVEN the background recognition is running while a window is open
+    def _detect(details, **_):
+        details.words = [
+            {"text": "word", "left": 50, "top": 50, "width": 30, "height": 10}
+        ]
+        return []
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"ocr_background": True}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+    applied = []
+    monkeypatch.setattr(
+        qapp, "windows", {0: SimpleNamespace(set_word_index=applied.append)}
+    )
+
+    try:
+        # WHEN the recognition finishes
+        qapp._start_text_indexing()
+
+        # THEN the window receives the recognized words
+        qtbot.waitUntil(lambda: len(applied) == 1)
+        assert applied[0].word_at(60, 55)["text"] == "word"
+    finally:
+        settings.clear()
+        qapp._word_indexes = {}
+
+
+@pytest.fixture
+def speculative_setup(qapp, monkeypatch):
+    """Count detections and provide the settings for them."""
+    detect_calls = []
+
+    def _detect(details, **kwargs):
+        detect_calls.append(kwargs)
+        details.words = [
+            {"text": "first", "left": 10, "top": 10, "width": 30, "height": 10},
+            {"text": "second", "left": 10, "top": 60, "width": 30, "height": 10},
+        ]
+        return [
+            DetectionResult(
+                text="first second",
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_PARSED,
+            )
+        ]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    monkeypatch.setattr(qapp, "_minimize_to_tray_or_exit", lambda **_: None)
+    monkeypatch.setattr(qapp, "_copy_to_clipboard", lambda **_: None)
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"notification": False}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+    yield detect_calls
+    settings.clear()
+
+
+def test_speculative_detection_is_reused_for_same_selection(
+    qapp, qtbot, speculative_setup
+):
+    # GIVEN a detection was finished while the selection was still being dragged
+    rect = Rect(left=20, top=20, right=99, bottom=99)
+    qapp._start_speculative_detection(rect=rect, screen_idx=0)
+    speculative_job = qapp._speculative_detection.job
+    qtbot.waitUntil(speculative_job.done)
+
+    # WHEN the same region gets selected
+    with qtbot.waitSignal(qapp.com.on_detection_finished) as result:
+        qapp._run_detection(rect=rect, screen_idx=0)
+
+    # THEN the speculative detection delivers the result
+    assert result.args[0].result() == [speculative_job.result()]
+    assert len(speculative_setup) == 1
+    assert qapp._speculative_detection is None
+
+
+def test_unfinished_speculative_detection_is_resubmitted_as_interactive(
+    qapp, qtbot, monkeypatch, speculative_setup
+):
+    # GIVEN a running detection, started while the selection was still being dragged
+    detect_calls = []
+
+    def _detect_until_cancelled(cancel_token, **kwargs):
+        detect_calls.append(kwargs)
+        if len(detect_calls) == 1:
+            cancel_token.wait(timeout=5)
+        return []
+
+    monkeypatch.setattr(detector, "detect", _detect_until_cancelled)
+    rect = Rect(left=20, top=20, right=99, bottom=99)
+    qapp._start_speculative_detection(rect=rect, screen_idx=0)
+    speculative_job = qapp._speculative_detection.job
+    qtbot.waitUntil(lambda: speculative_job.started_at is not None)
+
+    # WHEN the same region gets selected before the detection finished
+    with qtbot.waitSignal(qapp.com.on_detection_finished, timeout=5000) as result:
+        qapp._run_detection(rect=rect, screen_idx=0)
+
+    # THEN the speculative detection is replaced by an interactive one
+    assert speculative_job.cancelled()
+    assert len(detect_calls) == 2
+    assert result.args[0].priority == Priority.INTERACTIVE
+
+
+@pytest.fixture
+def preempted_detect(qapp, monkeypatch, speculative_setup):
+    """Let the first detection be preempted by an interactive job."""
+    detect_calls = []
+
+    def _detect(cancel_token, **_):
+        detect_calls.append(cancel_token)
+        if len(detect_calls) == 1:
+            qapp.scheduler.submit(lambda _: None, priority=Priority.INTERACTIVE)
+            if cancel_token.wait(timeout=5):
+                return []
+        return [
+            DetectionResult(
+                text="text",
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_RAW,
+            )
+        ]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    return detect_calls
+
+
+def _png() -> bytes:
+    image = QtGui.QImage(40, 20, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    data = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(data)
+    buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    return data.data()
+
+
+def test_preempted_socket_request_is_requeued(
+    qapp, qtbot, monkeypatch, preempted_detect
+):
+    responses = []
+    monkeypatch.setattr(
+        qapp,
+        "_socket_server",
+        SimpleNamespace(respond=lambda _, response: responses.append(response)),
+        raising=False,
+    )
+
+    # WHEN the detection of an image sent to the socket gets preempted
+    qapp._recognize_socket_request(
+        RecognizeRequest(socket=None, id=1, options={}, image=_png())
+    )
+
+    # THEN it is detected again and the result is sent
+    qtbot.waitUntil(lambda: len(responses) == 1)
+    assert len(preempted_detect) == 2
+    assert [r["text"] for r in responses[0]["results"]] == ["text"]
+
+
+def test_preempted_dbus_request_is_requeued(qapp, preempted_detect):
+    service = DBusApplicationService()
+    service.recognize_image = qapp.recognize_image
+
+    # WHEN the detection of an image sent via DBus gets preempted
+    report = service.Recognize(QtCore.QByteArray(_png()), {})
+
+    # THEN it is detected again and the result is returned
+    assert len(preempted_detect) == 2
+    assert [r["text"] for r in json.loads(report)["results"]] == ["text"]
+
+
+def test_failed_detection_finishes_capture(
+    qapp, qtbot, monkeypatch, speculative_setup
+):
+    # GIVEN a detection which fails, e.g. because tesseract crashed
+    def _detect(**_):
+        raise RuntimeError("tesseract failed")
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    minimize_calls = []
+    monkeypatch.setattr(
+        qapp, "_minimize_to_tray_or_exit", lambda **kw: minimize_calls.append(kw)
+    )
+    notified = []
+    monkeypatch.setattr(
+        qapp,
+        "_send_notification",
+        lambda detection_results: notified.append(detection_results),
+    )
+    qapp.settings.setValue("notification", True)
+
+    # WHEN a region gets selected
+    with qtbot.waitSignal(qapp.com.on_detection_finished):
+        qapp._run_detection(
+            rect=Rect(left=20, top=20, right=99, bottom=99), screen_idx=0
+        )
+
+    # THEN the capture is finished and nothing detected gets notified
+    qtbot.waitUntil(lambda: len(minimize_calls) == 1)
+    assert notified == [[]]
+
+
+def test_speculative_detection_provides_words_for_contained_selection(
+    qapp, qtbot, speculative_setup
+):
+    # GIVEN a finished detection of a region, started while the selection was
+    #    still being dragged
+    qapp._start_speculative_detection(
+        rect=Rect(left=20, top=20, right=99, bottom=99), screen_idx=0
+    )
+    qtbot.waitUntil(qapp._speculative_detection.job.done)
+
+    # WHEN a smaller region inside of it gets selected
+    with qtbot.waitSignal(qapp.com.on_detection_finished):
+        qapp._run_detection(
+            rect=Rect(left=20, top=50, right=99, bottom=99), screen_idx=0
+        )
+
+    # THEN the detection uses the words recognized inside the smaller region
+    assert len(speculative_setup) == 2
+    assert [w["text"] for w in speculative_setup[1]["indexed_words"]] == ["second"]
+    assert speculative_setup[1]["indexed_words"][0]["top"] == 30
+
+
+def test_speculative_detection_is_cancelled_for_other_selection(
+    qapp, qtbot, monkeypatch, speculative_setup
+):
+    # GIVEN a running detection, started while the selection was still being dragged
+    def _detect_until_cancelled(cancel_token, **_):
+        cancel_token.wait(timeout=5)
+        return []
+
+    monkeypatch.setattr(detector, "detect", _detect_until_cancelled)
+    qapp._start_speculative_detection(
+        rect=Rect(left=20, top=20, right=99, bottom=99), screen_idx=0
+    )
+    speculative_job = qapp._speculative_detection.job
+    qtbot.waitUntil(lambda: speculative_job.started_at is not None)
+
+    # WHEN a different region gets selected
+    qapp._run_detection(rect=Rect(left=0, top=0, right=50, bottom=50), screen_idx=0)
+
+    # THEN the speculative detection is cancelled
+    qtbot.waitUntil(speculative_job.done)
+    assert speculative_job.cancelled()
+    assert qapp._detection_job is not speculative_job
+
+    with qtbot.waitSignal(qapp.com.on_detection_finished, timeout=5000):
+        qapp.cancel_detection()
+
+
+def test_added_regions_are_detected_in_parallel_and_joined_in_order(
+    qapp, qtbot, monkeypatch
+):
+    # GIVEN a detection which takes longer for the first region than for the second
+    def _detect(image, **_):
+        if image.width() == 50:
+            time.sleep(0.2)
+        return [
+            DetectionResult(
+                text=f"width {image.width()}",
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_RAW,
+            )
+        ]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    monkeypatch.setattr(qapp, "_minimize_to_tray_or_exit", lambda **_: None)
+    copied = {}
+    monkeypatch.setattr(qapp, "_copy_to_clipboard", copied.update)
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"notification": False}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+
+    try:
+        # WHEN a region is added to the selection before another one is selected
+        qapp._add_region(rect=Rect(left=0, top=0, right=49, bottom=49), screen_idx=0)
+        with qtbot.waitSignal(qapp.com.on_detection_finished, timeout=5000):
+            qapp._run_detection(
+                rect=Rect(left=0, top=100, right=29, bottom=129), screen_idx=0
+            )
+
+        # THEN the results of both regions are joined in order of selection
+        qtbot.waitUntil(lambda: bool(copied))
+        assert copied["text"].splitlines() == ["width 50", "width 30"]
+        assert qapp._selected_regions == []
+    finally:
+        settings.clear()
+
+
+def test_watch_mode_outputs_text_until_cancelled(qapp, qtbot, monkeypatch):
+    # GIVEN a detection which finds some text
+    def _detect(**_):
+        return [
+            DetectionResult(
+                text="value",
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_RAW,
+            )
+        ]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    monkeypatch.setattr(qapp, "_take_screenshots", lambda **_: [])
+    minimize_calls = []
+    monkeypatch.setattr(
+        qapp, "_minimize_to_tray_or_exit", lambda **kw: minimize_calls.append(kw)
+    )
+    copied = {}
+    monkeypatch.setattr(qapp, "_copy_to_clipboard", copied.update)
+    qapp.screens[0].screenshot = QtGui.QImage(200, 200, QtGui.QImage.Format_RGB32)
+    settings = Settings(organization="normcap_TEST")
+    monkeypatch.setattr(qapp, "settings", settings)
+
+    try:
+        # WHEN a region gets watched
+        qapp._start_watching(
+            rect=Rect(left=0, top=0, right=99, bottom=99), screen_idx=0
+        )
+
+        # THEN its text is output
+        qtbot.waitUntil(lambda: copied == {"text": "value"})
+        assert qapp.tray.is_processing
+
+        # WHEN watching gets cancelled
+        watcher = qapp.watcher
+        qapp.cancel_detection()
+
+        # THEN the watcher is stopped and NormCap minimizes or exits
+        assert not watcher.is_active()
+        assert qapp.watcher is None
+        assert minimize_calls == [{"delay": 0}]
+        assert not qapp.tray.is_processing
+    finally:
+        settings.clear()
+
+
+def test_detect_region_skips_windows(qapp, qtbot, monkeypatch):
+    # GIVEN a detection which reports the size of the image
+    def _detect(image, **_):
+        return [
+            DetectionResult(
+                text=f"{image.width()}x{image.height()}",
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_RAW,
+            )
+        ]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    screenshot = QtGui.QImage(300, 200, QtGui.QImage.Format_RGB32)
+    monkeypatch.setattr(qapp, "_take_screenshots", lambda **_: [screenshot])
+    monkeypatch.setattr(qapp, "_minimize_to_tray_or_exit", lambda **_: None)
+    monkeypatch.setattr(qapp, "_create_window", lambda *_: pytest.fail("UI shown"))
+    copied = {}
+    monkeypatch.setattr(qapp, "_copy_to_clipboard", copied.update)
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"notification": False}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+
+    try:
+        # WHEN a region given as left, top, width and height is detected
+        qapp._detect_region(region=(10, 20, 150, 40), screen_idx=0)
+
+        # THEN the cropped region of the screenshot is detected
+        qtbot.waitUntil(lambda: copied == {"text": "150x40"})
+        assert qapp.screens[0].screenshot is screenshot
+
+        # WHEN the screen doesn't exist
+        exit_calls = []
+        monkeypatch.setattr(
+            qapp, "_exit_application", lambda **kwargs: exit_calls.append(kwargs)
+        )
+        qapp._detect_region(region=(10, 20, 150, 40), screen_idx=1)
+
+        # THEN the application exits with an error
+        assert exit_calls == [{"exit_code": 2}]
+    finally:
+        settings.clear()
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+
+import pytest
+from PySide6 import QtCore, QtDBus, QtGui
+
+from normcap.detection.scheduler import Priority, Scheduler
+from normcap.gui.dbus_application_service import DBusApplicationService
+
+
+@pytest.fixture
+def service(qapp):
+    scheduler = Scheduler()
+
+    def _recognize_image(read_image, options):
+        if "invalid" in options:
+            raise ValueError("Unknown option(s) invalid")
+
+        def _recognize(_):
+            image = QtGui.QImage.fromData(read_image())
+            return {"size": [image.width(), image.height()], **options}
+
+        return scheduler.submit(_recognize, priority=Priority.BATCH)
+
+    service = DBusApplicationService()
+    service.recognize_image = _recognize_image
+    yield service
+    scheduler.shutdown()
+
+
+def _png(path) -> bytes:
+    image = QtGui.QImage(33, 22, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    image.save(str(path))
+    return path.read_bytes()
+
+
+def test_recognize_returns_report(service, tmp_path):
+    # GIVEN the content of an image file
+    data = _png(tmp_path / "image.png")
+
+    # WHEN it is sent to the Recognize method
+    report = service.Recognize(QtCore.QByteArray(data), {"language": ["deu"]})
+
+    # THEN the result of the detection with the options is returned as JSON
+    assert json.loads(report) == {"size": [33, 22], "language": ["deu"]}
+
+    # WHEN an option is invalid
+    report = service.Recognize(QtCore.QByteArray(data), {"invalid": True})
+
+    # THEN an error is returned
+    assert json.loads(report) == {"error": "Unknown option(s) invalid"}
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Linux only")
+def test_recognize_fd_reads_from_start(service, tmp_path):
+    # GIVEN an image written to a memfd, whose position is at the end
+    fd = os.memfd_create("image")
+    os.write(fd, _png(tmp_path / "image.png"))
+
+    # WHEN the descriptor is sent to the RecognizeFd method
+    try:
+        report = service.RecognizeFd(QtDBus.QDBusUnixFileDescriptor(fd), {})
+    finally:
+        os.close(fd)
+
+    # THEN the whole image is detected
+    assert json.loads(report) == {"size": [33, 22]}
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Linux only")
+def test_recognize_fd_reads_pipe(service, tmp_path):
+    # GIVEN an image written to a pipe
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, _png(tmp_path / "image.png"))
+    os.close(write_fd)
+
+    # WHEN the pipe is sent to the RecognizeFd method
+    try:
+        report = service.RecognizeFd(QtDBus.QDBusUnixFileDescriptor(read_fd), {})
+    finally:
+        os.close(read_fd)
+
+    # THEN the image is detected
+    assert json.loads(report) == {"size": [33, 22]}
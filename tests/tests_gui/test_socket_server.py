@@ -0,0 +1,125 @@
+from pathlib import Path
+
+import pytest
+from PySide6 import QtGui, QtNetwork
+
+from normcap.detection import detector
+from normcap.detection.models import DetectionResult, TextDetector, TextType
+from normcap.gui import socket_server
+from normcap.gui.settings import Settings
+from normcap.system import info
+
+
+def test_decode_messages_keeps_incomplete_message():
+    # GIVEN a buffer with a complete message and the start of another one
+    second = socket_server.encode_message({"command": "recognize"}, b"image")
+    buffer = bytearray(socket_server.encode_message({"command": "capture"}))
+    buffer += second[:-2]
+
+    # WHEN the messages are decoded
+    # THEN only the complete message is taken from the buffer
+    assert socket_server.decode_messages(buffer) == [({"command": "capture"}, b"")]
+    assert buffer == second[:-2]
+
+    # WHEN the rest arrives
+    buffer += second[-2:]
+
+    # THEN the second message is decoded as well
+    assert socket_server.decode_messages(buffer) == [
+        ({"command": "recognize"}, b"image")
+    ]
+    assert buffer == b""
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"\x00\x00\x00\x04\x00\x00\x00\x00null",
+        b"\xff\xff\xff\xff\x00\x00\x00\x00",
+        b"\x00\x00\x00\x04\x00\x00\x00\x00{x:1",
+    ],
+)
+def test_decode_messages_raises_on_invalid_message(data):
+    with pytest.raises(ValueError, match=r"."):
+        socket_server.decode_messages(bytearray(data))
+
+
+def _png(path: Path, width: int, height: int) -> bytes:
+    image = QtGui.QImage(width, height, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    image.save(str(path))
+    return path.read_bytes()
+
+
+class _Client:
+    def __init__(self, name: str) -> None:
+        self.socket = QtNetwork.QLocalSocket()
+        self.socket.connectToServer(name)
+        assert self.socket.waitForConnected(1000)
+        self.responses: list[dict] = []
+        self._buffer = bytearray()
+        self.socket.readyRead.connect(self._read)
+
+    def send(self, header: dict, body: bytes = b"") -> None:
+        self.socket.write(socket_server.encode_message(header, body))
+
+    def _read(self) -> None:
+        self._buffer += self.socket.readAll().data()
+        self.responses += [h for h, _ in socket_server.decode_messages(self._buffer)]
+
+
+def test_socket_server_recognizes_images_of_concurrent_clients(
+    qapp, qtbot, monkeypatch, tmp_path
+):
+    # GIVEN a detection which reports the size of the image and the language
+    def _detect(image, language, **_):
+        return [
+            DetectionResult(
+                text=f"{image.width()}x{image.height()} {'+'.join(language)}",
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_RAW,
+            )
+        ]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    monkeypatch.setattr(info, "get_tesseract_bin_path", lambda **_: Path("tesseract"))
+    settings = Settings(
+        organization="normcap_TEST", init_settings={"language": ["eng"]}
+    )
+    monkeypatch.setattr(qapp, "settings", settings)
+    assert qapp._socket_server.is_first_instance
+
+    try:
+        # WHEN two clients send several requests without waiting for responses
+        first = _Client(qapp._socket_server._name)
+        second = _Client(qapp._socket_server._name)
+        first.send({"command": "recognize", "id": 1}, _png(tmp_path / "1.png", 40, 20))
+        second.send(
+            {"command": "recognize", "id": "a", "language": "deu"},
+            _png(tmp_path / "a.png", 9, 9),
+        )
+        first.send(
+            {"command": "recognize", "id": 2, "profile": "x"},
+            _png(tmp_path / "2.png", 30, 10),
+        )
+        second.send(
+            {"command": "recognize", "id": "b", "size": 5},
+            _png(tmp_path / "a.png", 9, 9),
+        )
+        first.send({"command": "recognize", "id": 3}, b"no image")
+
+        # THEN each client receives the responses to its requests
+        qtbot.waitUntil(
+            lambda: len(first.responses) == 3 and len(second.responses) == 2
+        )
+    finally:
+        settings.clear()
+
+    first_responses = {r["id"]: r for r in first.responses}
+    assert first_responses[1]["results"][0]["text"] == "40x20 eng"
+    assert "error" in first_responses[2]
+    assert first_responses[3]["error"] == "Could not read image"
+
+    second_responses = {r["id"]: r for r in second.responses}
+    assert second_responses["a"]["results"][0]["text"] == "9x9 deu"
+    assert second_responses["b"]["error"] == "Unknown option(s) size"
@@ -0,0 +1,184 @@
+import time
+
+import pytest
+from PySide6 import QtGui
+
+from normcap.detection import detector
+from normcap.detection.models import DetectionResult, TextDetector, TextType
+from normcap.detection.scheduler import Priority, Scheduler
+from normcap.gui import watcher
+from normcap.system.models import Rect
+
+
+def _screenshot(text: str) -> QtGui.QImage:
+    image = QtGui.QImage(200, 100, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    painter = QtGui.QPainter(image)
+    painter.setPen(QtGui.QColor("black"))
+    painter.setFont(QtGui.QFont(QtGui.QFont().family(), 20))
+    painter.drawText(10, 50, text)
+    painter.end()
+    return image
+
+
+def test_has_changed_detects_changed_text(qapp):
+    # GIVEN the tiles of a screenshot showing a value
+    previous = watcher.get_tile_means(_screenshot("42.1"))
+
+    # WHEN the value changes
+    # THEN the screenshot has changed
+    assert watcher.has_changed(previous, watcher.get_tile_means(_screenshot("47.1")))
+    assert watcher.has_changed(None, previous)
+
+    # WHEN only a single pixel changes
+    noisy = _screenshot("42.1")
+    noisy.setPixelColor(150, 80, QtGui.QColor("gray"))
+
+    # THEN the screenshot is considered unchanged
+    assert not watcher.has_changed(previous, watcher.get_tile_means(noisy))
+
+
+def test_get_tile_means_limits_number_of_tiles(qapp):
+    image = QtGui.QImage(4000, 12, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+
+    tile_means = watcher.get_tile_means(image)
+
+    assert len(tile_means) == 64
+    assert set(tile_means) == {255}
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler()
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_region_watcher_reports_changed_text_only(qtbot, monkeypatch, scheduler):
+    # GIVEN a detection returning the value shown on the screen
+    shown = {"text": "42.1", "captures": 0}
+    detect_calls = []
+
+    def _detect(image, **kwargs):
+        detect_calls.append(kwargs)
+        return [
+            DetectionResult(
+                text=shown["text"],
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_RAW,
+            )
+        ]
+
+    def _capture():
+        shown["captures"] += 1
+        return [_screenshot(shown["text"])]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    region_watcher = watcher.RegionWatcher(
+        regions=[(Rect(left=0, top=0, right=150, bottom=80), 0)],
+        capture=_capture,
+        scheduler=scheduler,
+        detect_kwargs={"max_threads": 4},
+        interval=0.05,
+        max_cpu=100,
+    )
+    texts = []
+    region_watcher.com.on_text_changed.connect(texts.append)
+
+    try:
+        # WHEN the watcher starts with the already taken screenshot
+        region_watcher.start(screenshots=[_screenshot(shown["text"])])
+
+        # THEN its text is reported right away
+        qtbot.waitUntil(lambda: texts == ["42.1"])
+        assert detect_calls[0]["max_threads"] == 1
+
+        # WHEN further captures show the same screen
+        qtbot.waitUntil(lambda: shown["captures"] >= 3)
+
+        # THEN they are not recognized again
+        assert len(detect_calls) == 1
+
+        # WHEN the shown value changes
+        shown["text"] = "47.9"
+
+        # THEN the new text is reported
+        qtbot.waitUntil(lambda: texts == ["42.1", "47.9"])
+        assert len(detect_calls) == 2
+    finally:
+        region_watcher.stop()
+
+    assert not region_watcher.is_active()
+
+
+def test_region_watcher_retries_preempted_detection(qtbot, monkeypatch, scheduler):
+    # GIVEN a detection which returns no results when cancelled
+    detect_calls = []
+
+    def _detect(cancel_token, **_):
+        detect_calls.append(cancel_token)
+        if len(detect_calls) == 1 and cancel_token.wait(timeout=5):
+            return []
+        return [
+            DetectionResult(
+                text="42.1",
+                text_type=TextType.SINGLE_LINE,
+                detector=TextDetector.OCR_RAW,
+            )
+        ]
+
+    monkeypatch.setattr(detector, "detect", _detect)
+    region_watcher = watcher.RegionWatcher(
+        regions=[(Rect(left=0, top=0, right=150, bottom=80), 0)],
+        capture=lambda: [_screenshot("42.1")],
+        scheduler=scheduler,
+        detect_kwargs={},
+        interval=0.05,
+        max_cpu=100,
+    )
+    texts = []
+    region_watcher.com.on_text_changed.connect(texts.append)
+
+    try:
+        region_watcher.start(screenshots=[_screenshot("42.1")])
+        qtbot.waitUntil(lambda: len(detect_calls) == 1)
+
+        # WHEN the running detection gets preempted by an interactive job
+        scheduler.submit(lambda _: None, priority=Priority.INTERACTIVE).result(5)
+
+        # THEN the detection is retried and its text reported
+        qtbot.waitUntil(lambda: texts == ["42.1"])
+        assert len(detect_calls) == 2
+    finally:
+        region_watcher.stop()
+
+
+def test_region_watcher_limits_cpu_usage(qtbot, monkeypatch, scheduler):
+    # GIVEN a capture which takes some time
+    captures = []
+
+    def _capture():
+        captures.append(time.monotonic())
+        time.sleep(0.02)
+        return [_screenshot("1")]
+
+    monkeypatch.setattr(detector, "detect", lambda **_: [])
+    region_watcher = watcher.RegionWatcher(
+        regions=[(Rect(left=0, top=0, right=150, bottom=80), 0)],
+        capture=_capture,
+        scheduler=scheduler,
+        detect_kwargs={},
+        interval=0.01,
+        max_cpu=10,
+    )
+
+    try:
+        # WHEN watching at a limit of 10% of a core
+        region_watcher.start()
+        qtbot.wait(500)
+    finally:
+        region_watcher.stop()
+
+    # THEN the watcher pauses ~9x the duration of each capture
+    assert 1 <= len(captures) <= 3
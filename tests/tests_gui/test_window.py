@@ -1,6 +1,7 @@
 import pytest
 from PySide6 import QtCore, QtGui
 
+from normcap.detection.ocr.index import WordIndex
 from normcap.gui import window
 from normcap.system.models import Screen
 
@@ -121,3 +122,175 @@ def test_window_esc_key_pressed_while_selecting(qtbot, temp_settings):
 
     # THEN the selection should be cleared
     assert not win.selection_rect
+
+
+def _mouse_event(
+    event_type,
+    pos,
+    button=QtCore.Qt.MouseButton.NoButton,
+    modifiers=QtCore.Qt.KeyboardModifier.NoModifier,
+):
+    return QtGui.QMouseEvent(
+        event_type,
+        QtCore.QPointF(*pos),
+        QtCore.QPointF(*pos),
+        button,
+        button,
+        modifiers,
+    )
+
+
+@pytest.fixture
+def indexed_window(qtbot, temp_settings):
+    # A screenshot with twice the resolution of the window, e.g. due to scaling
+    image = QtGui.QImage(1200, 800, QtGui.QImage.Format.Format_RGB32)
+    screen = Screen(
+        device_pixel_ratio=2.0,
+        left=0,
+        top=0,
+        right=599,
+        bottom=399,
+        index=0,
+        screenshot=image,
+    )
+    win = window.Window(
+        screen=screen, index=0, settings=temp_settings, installed_languages=["eng"]
+    )
+    qtbot.add_widget(win)
+    win.resize(600, 400)
+    win.set_word_index(
+        WordIndex(
+            [
+                {"text": "one", "left": 100, "top": 100, "width": 80, "height": 20},
+                {"text": "two", "left": 200, "top": 100, "width": 80, "height": 20},
+            ]
+        )
+    )
+    return win
+
+
+@pytest.mark.gui
+def test_window_highlights_word_under_cursor(indexed_window):
+    # WHEN the cursor hovers a word
+    indexed_window.mouseMoveEvent(_mouse_event(QtCore.QEvent.Type.MouseMove, (60, 55)))
+
+    # THEN the word's box is highlighted in window coordinates
+    assert indexed_window.ui_container.word_rects == [QtCore.QRect(50, 50, 40, 10)]
+
+    # WHEN the cursor leaves the word
+    indexed_window.mouseMoveEvent(_mouse_event(QtCore.QEvent.Type.MouseMove, (95, 55)))
+
+    # THEN nothing is highlighted
+    assert indexed_window.ui_container.word_rects == []
+
+
+@pytest.mark.gui
+def test_window_repaints_changed_word_highlights_only(monkeypatch, indexed_window):
+    updated_regions = []
+    monkeypatch.setattr(indexed_window.ui_container, "update", updated_regions.append)
+
+    # GIVEN a highlighted word
+    indexed_window.mouseMoveEvent(_mouse_event(QtCore.QEvent.Type.MouseMove, (60, 55)))
+    assert len(updated_regions) == 1
+
+    # WHEN the cursor moves within the same word
+    indexed_window.mouseMoveEvent(_mouse_event(QtCore.QEvent.Type.MouseMove, (70, 55)))
+
+    # THEN nothing is repainted
+    assert len(updated_regions) == 1
+
+    # WHEN the cursor moves to the other word
+    indexed_window.mouseMoveEvent(_mouse_event(QtCore.QEvent.Type.MouseMove, (110, 55)))
+
+    # THEN only the boxes of both words are repainted
+    assert updated_regions[-1] == QtGui.QRegion(QtCore.QRect(50, 50, 40, 10)).united(
+        QtCore.QRect(100, 50, 40, 10)
+    )
+
+
+@pytest.mark.gui
+def test_window_snaps_selection_to_words(qtbot, indexed_window):
+    left_button = QtCore.Qt.MouseButton.LeftButton
+
+    # GIVEN a selection cutting through both words, but containing only the center
+    #    of the first word
+    indexed_window.mousePressEvent(
+        _mouse_event(QtCore.QEvent.Type.MouseButtonPress, (55, 45), left_button)
+    )
+    indexed_window.mouseMoveEvent(
+        _mouse_event(QtCore.QEvent.Type.MouseMove, (105, 65), left_button)
+    )
+
+    # THEN the first word is highlighted as part of the selection
+    assert indexed_window.ui_container.word_rects == [QtCore.QRect(50, 50, 40, 10)]
+
+    # WHEN the selection is finished
+    with qtbot.waitSignal(indexed_window.com.on_region_selected) as result:
+        indexed_window.mouseReleaseEvent(
+            _mouse_event(QtCore.QEvent.Type.MouseButtonRelease, (105, 65), left_button)
+        )
+
+    # THEN the selected region is extended to contain the whole first word
+    rect, _ = result.args
+    assert (rect.left, rect.top) == (100, 90)
+    assert (rect.right, rect.bottom) == (210, 130)
+
+
+@pytest.mark.gui
+def test_window_reports_settled_selection(qtbot, indexed_window):
+    left_button = QtCore.Qt.MouseButton.LeftButton
+    indexed_window.mousePressEvent(
+        _mouse_event(QtCore.QEvent.Type.MouseButtonPress, (55, 45), left_button)
+    )
+
+    # WHEN the selection stops changing while the button is still pressed
+    with qtbot.waitSignal(
+        indexed_window.com.on_selection_settled, timeout=1000
+    ) as result:
+        indexed_window.mouseMoveEvent(
+            _mouse_event(QtCore.QEvent.Type.MouseMove, (105, 65), left_button)
+        )
+
+    # THEN the selection is reported, as it would be on release
+    rect, screen_idx = result.args
+    assert rect.coords == (100, 90, 210, 130)
+    assert screen_idx == 0
+
+    # WHEN the selection is cleared before it settles
+    with qtbot.assertNotEmitted(indexed_window.com.on_selection_settled, wait=300):
+        indexed_window.mouseMoveEvent(
+            _mouse_event(QtCore.QEvent.Type.MouseMove, (150, 65), left_button)
+        )
+        indexed_window.clear_selection()
+
+
+@pytest.mark.gui
+def test_window_adds_regions_while_modifier_is_held(qtbot, indexed_window):
+    left_button = QtCore.Qt.MouseButton.LeftButton
+    shift = QtCore.Qt.KeyboardModifier.ShiftModifier
+
+    # WHEN a region is selected while the modifier key is held
+    indexed_window.mousePressEvent(
+        _mouse_event(QtCore.QEvent.Type.MouseButtonPress, (10, 10), left_button)
+    )
+    with (
+        qtbot.assertNotEmitted(indexed_window.com.on_region_selected),
+        qtbot.waitSignal(indexed_window.com.on_region_added) as result,
+    ):
+        indexed_window.mouseReleaseEvent(
+            _mouse_event(
+                QtCore.QEvent.Type.MouseButtonRelease, (30, 20), left_button, shift
+            )
+        )
+
+    # THEN the region is added to the selection and stays visible
+    rect, screen_idx = result.args
+    assert rect.coords == (20, 20, 60, 40)
+    assert screen_idx == 0
+    assert indexed_window.ui_container.added_rects == [QtCore.QRect(10, 10, 21, 11)]
+    assert not indexed_window.selection_rect
+
+    # WHEN Enter is pressed
+    # THEN the selection is reported to be finished
+    with qtbot.waitSignal(indexed_window.com.on_enter_key_pressed, timeout=1000):
+        qtbot.keyPress(indexed_window, QtCore.Qt.Key.Key_Return)